@@ -0,0 +1,116 @@
+"""
+Table rendering benchmark for TableFormatter
+
+Renders the same synthetic market data with the default list-of-dicts
+renderer and with the DataFrame + tabulate renderer, checks that both
+print exactly the same text and reports how long each takes.
+
+Usage (from the repository root):
+    python benchmarks/render.py               # 1,000 rows per table
+    python benchmarks/render.py --rows 300    # watch-sized tables
+    python benchmarks/render.py --json        # print the measurements as JSON
+
+Tables:
+    prices: print_stock_prices
+    top: print_top_list
+    sectors: print_sector_summary
+    index: print_table with sub-index rows
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from nepsense.formatters import TableFormatter  # noqa: E402
+
+def make_data(rows: int, seed: int = 0) -> dict:
+    """Synthetic rows shaped like the client's responses"""
+    rng = random.Random(seed)
+    prices, top, sectors = [], [], []
+    for i in range(rows):
+        prev = round(rng.uniform(100, 2000), 1)
+        ltp = round(prev * rng.uniform(0.9, 1.1), 1)
+        change = ltp - prev if i % 10 else 0
+        volume = rng.randint(0, 500000)
+        prices.append({
+            'Symbol': f"SYM{i}", 'LTP': ltp, 'change': change, '%change': change / prev * 100,
+            'Open': prev, 'High': max(ltp, prev) + 5, 'Low': min(ltp, prev) - 5,
+            'Volume': volume, 'Turnover': volume * ltp, 'Prev Close': prev
+        })
+        top.append({
+            'Symbol': f"SYM{i}", 'LTP': ltp, 'Change': change, '%Change': change / prev * 100,
+            'Open': prev, 'High': max(ltp, prev) + 5, 'Low': min(ltp, prev) - 5,
+            'Volume': volume, 'Turnover': '' if i % 7 == 0 else volume * ltp
+        })
+        sectors.append({
+            'Sector': f"Sub Index {i}", 'Value': ltp * 3, 'Change': change, '%Change': change / prev * 100
+        })
+    return {'prices': prices, 'top': top, 'sectors': sectors}
+
+def tables(data: dict) -> dict:
+    """name -> function printing that table with a given formatter"""
+    return {
+        'prices': lambda f: f.print_stock_prices(data['prices']),
+        'top': lambda f: f.print_top_list(data['top'], "Gainers"),
+        'sectors': lambda f: f.print_sector_summary(data['sectors']),
+        'index': lambda f: f.print_table(data['sectors']),
+    }
+
+def render(formatter: TableFormatter, draw) -> str:
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        draw(formatter)
+    return out.getvalue()
+
+def timed(formatter: TableFormatter, draw, repeat: int) -> float:
+    """Fastest of several renders, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render(formatter, draw)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def run(rows: int = 1000, repeat: int = 5) -> dict:
+    fast, legacy = TableFormatter(), TableFormatter(renderer="pandas")
+    results = {}
+    for name, draw in tables(make_data(rows)).items():
+        # Warm up (imports pandas/tabulate for the legacy path)
+        identical = render(fast, draw) == render(legacy, draw)
+        fast_ms, pandas_ms = timed(fast, draw, repeat), timed(legacy, draw, repeat)
+        results[name] = {
+            'rows': rows,
+            'fast_ms': round(fast_ms, 2),
+            'pandas_ms': round(pandas_ms, 2),
+            'speedup': round(pandas_ms / fast_ms, 1),
+            'identical': identical,
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare TableFormatter renderers")
+    parser.add_argument('--rows', type=int, default=1000, help="Rows per table")
+    parser.add_argument('--repeat', type=int, default=5, help="Renders per table (fastest is kept)")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            status = 'identical' if result['identical'] else 'OUTPUT DIFFERS'
+            print(f"{name:8} fast {result['fast_ms']:8.2f} ms  pandas {result['pandas_ms']:8.2f} ms  "
+                  f"x{result['speedup']:<5} {status}")
+    sys.exit(0 if all(result['identical'] for result in results.values()) else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Startup import budget for the priceof CLI
+
+Runs representative CLI code paths under ``python -X importtime`` and
+checks that the modules they import stay within a time budget and never
+pull in dependencies that the path does not need.
+
+Usage (from the repository root):
+    python benchmarks/startup.py            # check budgets, exit 1 on failure
+    python benchmarks/startup.py --json     # print the measurements as JSON
+
+Scenarios:
+    help: `priceof --help`
+    price: `priceof NABIL` end to end (argument parsing, symbol check,
+        client, transport and table rendering), replaying a response
+        recorded from the suite's stand-in NEPSE API
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# name -> (code, budget in ms, modules that must not be imported); the code
+# gets the fixtures directory (see record_fixtures) as sys.argv[1]
+SCENARIOS = {
+    'help': (
+        "import sys\n"
+        "sys.argv = ['priceof', '--help']\n"
+        "from nepsense.cli import main\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass\n",
+        60,
+        ['pandas', 'numpy', 'tabulate', 'nepse', 'tqdm'],
+    ),
+    'price': (
+        "import sys\n"
+        "sys.argv = ['priceof', 'NABIL', '--replay-fixtures', sys.argv[1]]\n"
+        "from nepsense.cli import main\n"
+        "main()\n",
+        150,
+        ['pandas', 'tabulate', 'nepse', 'nepsense.floorsheet', 'nepsense.analytics',
+         'nepsense.watch'],
+    ),
+}
+
+PRICE_SYMBOLS = ['NABIL']
+
+def record_fixtures(directory: Path):
+    """Record the price scenario's upstream responses from the suite's stand-in API"""
+    sys.path.insert(0, str(ROOT))
+    from nepsense.nepse_client import NepseClient
+    from nepsense.transport import RecordingTransport
+    from suite import StandInTransport
+    recorder = NepseClient(transport=RecordingTransport(StandInTransport(), directory))
+    recorder.show_progress = False
+    recorder.get_stock_prices(PRICE_SYMBOLS)
+
+def measure(code: str, directory: Path) -> dict:
+    """Run code under -X importtime and return total time and modules
+
+    The code runs with its own cache directory, so the user's cache and
+    company index are neither read nor written.
+    """
+    env = dict(os.environ, PYTHONPATH=str(ROOT) + os.pathsep + os.environ.get('PYTHONPATH', ''),
+               XDG_CACHE_HOME=str(directory / 'cache'))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code, str(directory / 'fixtures')],
+                          capture_output=True, text=True, env=env, cwd=ROOT)
+    # A failed lookup only warns, which would leave the real path unmeasured
+    if proc.returncode != 0 or any(line.startswith('Warning:') for line in proc.stderr.splitlines()):
+        raise RuntimeError(proc.stderr)
+
+    total_us = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.add(name.strip())
+        if not name[1:].startswith(' '):  # top-level import
+            total_us += int(cumulative)
+    return {'ms': total_us / 1000, 'modules': modules}
+
+def run(repeat: int = 5) -> dict:
+    """Measure every scenario, keeping the fastest of several runs"""
+    with tempfile.TemporaryDirectory(prefix='nepsense-startup-') as tmp:
+        directory = Path(tmp)
+        record_fixtures(directory / 'fixtures')
+        return _measure_all(directory, repeat)
+
+def _measure_all(directory: Path, repeat: int) -> dict:
+    baseline = min((measure('pass', directory) for _ in range(repeat)), key=lambda r: r['ms'])
+    results = {}
+    for name, (code, budget, forbidden) in SCENARIOS.items():
+        best = min((measure(code, directory) for _ in range(repeat)), key=lambda r: r['ms'])
+        ms = round(best['ms'] - baseline['ms'], 1)
+        loaded = sorted(module for module in forbidden if module in best['modules'])
+        results[name] = {
+            'import_ms': ms,
+            'budget_ms': budget,
+            'forbidden_loaded': loaded,
+            'ok': ms <= budget and not loaded,
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Check priceof startup import budgets")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per scenario (fastest is kept)")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            status = 'ok' if result['ok'] else 'FAIL'
+            extra = f" (loaded {', '.join(result['forbidden_loaded'])})" if result['forbidden_loaded'] else ''
+            print(f"{name:8} {result['import_ms']:8.1f} ms / {result['budget_ms']} ms  {status}{extra}")
+    sys.exit(0 if all(result['ok'] for result in results.values()) else 1)
+
+if __name__ == '__main__':
+    main()
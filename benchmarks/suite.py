@@ -0,0 +1,277 @@
+"""
+Benchmark suite for the client, table rendering and floorsheet analytics
+
+Every benchmark runs offline: prices come from NepseClient on a
+ReplayTransport over fixtures recorded from a local stand-in for the
+NEPSE API (with simulated network latency), and floorsheets are the
+bundled datas/ CSV tiled up to the requested number of rows.
+
+Usage (from the repository root):
+    python benchmarks/suite.py                            # full suite
+    python benchmarks/suite.py --quick                    # smaller sizes only
+    python benchmarks/suite.py -k fetch -k format         # benchmarks whose name contains these
+    python benchmarks/suite.py --output results/HEAD.json # save results as JSON
+    python benchmarks/suite.py --compare results/base.json --threshold 0.2
+
+Benchmarks (parameter in brackets):
+    fetch_prices[symbols]: get_stock_prices fan-out, 1 to 500 symbols
+    format_prices[rows]: TableFormatter.print_stock_prices
+    format_prices_pandas[rows]: the same with renderer="pandas"
+    broker_flow[rows]: BrokerFlow.add over one floorsheet, 40k to 4M rows
+    groupby_pandas[rows]: the notebook's broker/symbol DataFrame groupby
+    index_build[rows]: first indexed select (builds the row index)
+    index_select[rows]: symbol + buyer select on a built index
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from nepsense.analytics import BrokerFlow  # noqa: E402
+from nepsense.floorsheet import FloorsheetTable, read_floorsheet  # noqa: E402
+from nepsense.formatters import TableFormatter  # noqa: E402
+from nepsense.nepse_client import NepseClient  # noqa: E402
+from nepsense.transport import FixtureNotFound, RecordingTransport, ReplayTransport  # noqa: E402
+
+FLOORSHEET_CSV = ROOT / 'datas' / 'floorsheet_2021-06-16_Wednesday.csv'
+COMPANY_LIST = ROOT / 'datas' / 'company_list.csv'
+
+SYMBOL_COUNTS = [1, 10, 50, 100, 500]
+FLOORSHEET_ROWS = [40_000, 400_000, 4_000_000]
+QUICK_SYMBOL_COUNTS = [1, 10, 50]
+QUICK_FLOORSHEET_ROWS = [40_000, 400_000]
+
+# name -> (parameter values, quick parameter values, setup(param) -> timed callable)
+Benchmark = Tuple[List[int], List[int], Callable[[int], Callable[[], Any]]]
+
+class StandInTransport:
+    """Local stand-in for the NEPSE API returning deterministic responses"""
+
+    def call(self, method: str, *args) -> Any:
+        if method != 'getCompanyDetails':
+            raise FixtureNotFound(f"The stand-in API does not serve {method}")
+        symbol = args[0]
+        seed = int(hashlib.sha1(symbol.encode()).hexdigest()[:8], 16)
+        prev = 100 + seed % 2000
+        ltp = prev * (0.9 + (seed % 200) / 1000)
+        volume = seed % 500000
+        return {
+            'security': {'symbol': symbol},
+            'securityDailyTradeDto': {
+                'lastTradedPrice': round(ltp, 1), 'previousClose': float(prev),
+                'openPrice': float(prev), 'highPrice': round(max(ltp, prev) + 5, 1),
+                'lowPrice': round(min(ltp, prev) - 5, 1), 'totalTradeQuantity': volume,
+                'totalTradeValue': round(volume * ltp, 2),
+            },
+        }
+
+def symbols(count: int) -> List[str]:
+    """Listed symbols from the bundled company list, padded with synthetic ones"""
+    listed = list(dict.fromkeys(pd.read_csv(COMPANY_LIST)['symbol'].dropna().astype(str)))
+    return (listed + [f"SYM{i}" for i in range(count)])[:count]
+
+def record_fixtures(directory: Path, count: int):
+    """Record stand-in responses for the first `count` symbols"""
+    recorder = NepseClient(transport=RecordingTransport(StandInTransport(), directory))
+    recorder.show_progress = False
+    recorder.get_stock_prices(symbols(count))
+
+def tiled_floorsheet(rows: int) -> FloorsheetTable:
+    """The bundled floorsheet repeated (or cut) to exactly `rows` trades"""
+    base = read_floorsheet(FLOORSHEET_CSV)
+    reps = -(-rows // len(base))
+    columns = {name: np.tile(np.asarray(values), reps)[:rows] for name, values in base.columns.items()}
+    return FloorsheetTable(columns, base.symbols, date=base.date)
+
+def make_benchmarks(fixtures: Path, latency: float, workers: int) -> Dict[str, Benchmark]:
+    tables: Dict[int, FloorsheetTable] = {}
+
+    def table(rows: int) -> FloorsheetTable:
+        if rows not in tables:
+            tables.clear()  # Keep at most one large table alive
+            tables[rows] = tiled_floorsheet(rows)
+        return tables[rows]
+
+    def fetch_prices(count: int):
+        wanted = symbols(count)
+        transport = ReplayTransport(fixtures, latency=latency, jitter=latency / 4)
+
+        def run():
+            client = NepseClient(max_workers=workers, transport=transport)
+            client.show_progress = False
+            return client.get_stock_prices(wanted)
+        return run
+
+    def format_prices(renderer: str):
+        def setup(count: int):
+            client = NepseClient(transport=ReplayTransport(fixtures))
+            client.show_progress = False
+            rows = client.get_stock_prices(symbols(count))
+            formatter = TableFormatter(renderer=renderer)
+
+            def run():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    formatter.print_stock_prices(rows)
+            return run
+        return setup
+
+    def broker_flow(rows: int):
+        day = table(rows)
+        return lambda: BrokerFlow().add(day)
+
+    def groupby_pandas(rows: int):
+        frame = table(rows).to_frame()
+        return lambda: frame.groupby(['Buyer', 'Symbol'], observed=True)[['Quantity', 'Amount']].sum()
+
+    def index_build(rows: int):
+        day = table(rows)
+
+        def run():
+            fresh = FloorsheetTable(day.columns, day.symbols, date=day.date)
+            return fresh.select(symbol=day.symbols[0])
+        return run
+
+    def index_select(rows: int):
+        day = table(rows)
+        symbol, buyer = day.symbols[int(day['Symbol'][0])], int(day['Buyer'][0])
+        day.select(symbol=symbol, buyer=buyer)  # Build the index outside the timing
+        return lambda: day.select(symbol=symbol, buyer=buyer)
+
+    return {
+        'fetch_prices': (SYMBOL_COUNTS, QUICK_SYMBOL_COUNTS, fetch_prices),
+        'format_prices': (SYMBOL_COUNTS, QUICK_SYMBOL_COUNTS, format_prices('fast')),
+        'format_prices_pandas': (SYMBOL_COUNTS, QUICK_SYMBOL_COUNTS, format_prices('pandas')),
+        'broker_flow': (FLOORSHEET_ROWS, QUICK_FLOORSHEET_ROWS, broker_flow),
+        'groupby_pandas': (FLOORSHEET_ROWS, QUICK_FLOORSHEET_ROWS, groupby_pandas),
+        'index_build': (FLOORSHEET_ROWS, QUICK_FLOORSHEET_ROWS, index_build),
+        'index_select': (FLOORSHEET_ROWS, QUICK_FLOORSHEET_ROWS, index_select),
+    }
+
+def measure(func: Callable[[], Any], repeat: int, min_round: float = 0.01) -> Dict[str, Any]:
+    """Time func over several rounds, in seconds per call
+
+    Fast functions are called several times per round (like timeit's
+    autorange) so each round lasts at least min_round seconds and
+    microsecond benchmarks are not dominated by timer noise.
+    """
+    started = time.perf_counter()
+    func()  # Warm-up, also used to size the rounds
+    loops = max(1, int(min_round / max(time.perf_counter() - started, 1e-9)))
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        times.append((time.perf_counter() - started) / loops)
+    return {
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.fmean(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'rounds': repeat,
+        'loops': loops,
+    }
+
+def git_commit() -> Dict[str, Any]:
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    return {'commit': git('rev-parse', 'HEAD') or None,
+            'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+def run(quick: bool = False, selected: List[str] = (), repeat: int = 5,
+        latency: float = 0.02, workers: int = 8) -> Dict[str, Any]:
+    """Run the selected benchmarks and return results with run metadata"""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='nepsense-bench-') as tmp:
+        fixtures = Path(tmp)
+        record_fixtures(fixtures, max(SYMBOL_COUNTS))
+        for name, (params, quick_params, setup) in make_benchmarks(fixtures, latency, workers).items():
+            if selected and not any(key in name for key in selected):
+                continue
+            results[name] = {}
+            for param in (quick_params if quick else params):
+                func = setup(param)
+                rounds = repeat if param < 1_000_000 else max(1, min(repeat, 3))
+                results[name][str(param)] = measure(func, rounds)
+                print(f"{name}[{param}]: {results[name][str(param)]['median'] * 1000:.2f} ms", file=sys.stderr)
+
+    return {
+        'meta': {
+            **git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'latency_ms': latency * 1000,
+            'workers': workers,
+            'quick': quick,
+        },
+        'results': results,
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print median ratios against a baseline and return the regressions"""
+    regressions = []
+    for name, params in current['results'].items():
+        for param, result in params.items():
+            old = baseline.get('results', {}).get(name, {}).get(param)
+            if not old:
+                continue
+            ratio = result['median'] / old['median']
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  REGRESSION'
+                regressions.append(f"{name}[{param}]")
+            print(f"{name + '[' + param + ']':32} {old['median'] * 1000:10.2f} ms -> "
+                  f"{result['median'] * 1000:10.2f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the nepsense benchmark suite")
+    parser.add_argument('--quick', action='store_true', help="Skip the largest sizes")
+    parser.add_argument('-k', dest='selected', action='append', default=[],
+                        help="Only run benchmarks whose name contains this (repeatable)")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed rounds per benchmark")
+    parser.add_argument('--latency', type=float, default=20, help="Simulated API latency in ms (default: 20)")
+    parser.add_argument('--workers', type=int, default=8, help="Client max_workers (default: 8)")
+    parser.add_argument('--output', type=Path, help="Write results as JSON to this file")
+    parser.add_argument('--compare', type=Path, help="Baseline JSON to compare medians against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Slowdown ratio counted as a regression (default: 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = run(args.quick, args.selected, args.repeat, args.latency / 1000, args.workers)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+    elif not args.output:
+        print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
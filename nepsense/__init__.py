@@ -1,9 +1,23 @@
 """NEPSENSE - Complete NEPSE solution in command line"""
 
-from .cli import main
-from .nepse_client import NepseClient
-from .formatters import TableFormatter
+from importlib import import_module
 
 __version__ = "0.0.4"
 
 __all__ = ['main', 'NepseClient', 'TableFormatter']
+
+# Public names are resolved on first access so that `import nepsense` (and
+# the `priceof` entry point) does not pay for pandas, tabulate or nepse
+_LAZY_EXPORTS = {
+    'main': '.cli',
+    'NepseClient': '.nepse_client',
+    'TableFormatter': '.formatters',
+}
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        return getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_EXPORTS))
@@ -0,0 +1,177 @@
+"""
+Broker flow analytics over NEPSE floorsheets
+
+This module computes, for every broker at once, how much of each symbol
+it bought and sold. Trades are bucketed with a single np.bincount per
+side, so a full trading day is processed in one vectorized pass and
+several days can be accumulated incrementally.
+
+Classes:
+    BrokerFlow: Accumulated buy/sell quantity and amount per (broker, symbol)
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Union
+from pathlib import Path
+
+import numpy as np
+
+from .floorsheet import FloorsheetTable, read_floorsheet
+
+class BrokerFlow:
+    """Net buying and selling per (broker, symbol)
+
+    Quantities and amounts are stored in dense broker x symbol matrices
+    indexed by broker ID and by the position of the symbol in `symbols`.
+
+    Attributes:
+        symbols: Symbols seen so far, in first-seen order
+        buy_qty, sell_qty: Bought/sold quantity per (broker, symbol)
+        buy_amount, sell_amount: Bought/sold amount per (broker, symbol)
+        days: Trading dates accumulated so far
+    """
+
+    def __init__(self):
+        self.symbols: List[str] = []
+        self._symbol_ids: Dict[str, int] = {}
+        self.buy_qty = np.zeros((0, 0))
+        self.sell_qty = np.zeros((0, 0))
+        self.buy_amount = np.zeros((0, 0))
+        self.sell_amount = np.zeros((0, 0))
+        self.days: List[Optional[str]] = []
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[Union[str, Path]]) -> 'BrokerFlow':
+        """Accumulate floorsheet CSV files or columnar directories"""
+        flow = cls()
+        for path in paths:
+            flow.add(read_floorsheet(path))
+        return flow
+
+    def _resize(self, brokers: int, symbols: int):
+        rows = max(brokers, self.buy_qty.shape[0])
+        cols = max(symbols, self.buy_qty.shape[1])
+        if (rows, cols) == self.buy_qty.shape:
+            return
+        for name in ('buy_qty', 'sell_qty', 'buy_amount', 'sell_amount'):
+            matrix = getattr(self, name)
+            grown = np.zeros((rows, cols))
+            grown[:matrix.shape[0], :matrix.shape[1]] = matrix
+            setattr(self, name, grown)
+
+    def add(self, table: FloorsheetTable) -> 'BrokerFlow':
+        """Accumulate one day's floorsheet"""
+        for symbol in table.symbols:
+            if symbol not in self._symbol_ids:
+                self._symbol_ids[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+
+        # Translate the day's symbol codes to our global symbol positions
+        mapping = np.array([self._symbol_ids[symbol] for symbol in table.symbols], dtype=np.int64)
+        symbols = mapping[np.asarray(table['Symbol'], dtype=np.int64)] if len(mapping) else np.zeros(0, np.int64)
+        quantity = np.asarray(table['Quantity'], dtype=np.float64)
+        amount = np.asarray(table['Amount'], dtype=np.float64)
+        buyers = np.asarray(table['Buyer'], dtype=np.int64)
+        sellers = np.asarray(table['Seller'], dtype=np.int64)
+
+        top_broker = max(buyers.max(initial=-1), sellers.max(initial=-1))
+        self._resize(top_broker + 1, len(self.symbols))
+        n_brokers, n_symbols = self.buy_qty.shape
+
+        for brokers, qty_matrix, amount_matrix in ((buyers, self.buy_qty, self.buy_amount),
+                                                   (sellers, self.sell_qty, self.sell_amount)):
+            valid = brokers >= 0
+            cells = brokers[valid] * n_symbols + symbols[valid]
+            qty_matrix += np.bincount(cells, weights=quantity[valid],
+                                      minlength=n_brokers * n_symbols).reshape(n_brokers, n_symbols)
+            amount_matrix += np.bincount(cells, weights=amount[valid],
+                                         minlength=n_brokers * n_symbols).reshape(n_brokers, n_symbols)
+
+        self.days.append(table.date)
+        return self
+
+    @property
+    def net_qty(self) -> np.ndarray:
+        return self.buy_qty - self.sell_qty
+
+    @property
+    def net_amount(self) -> np.ndarray:
+        return self.buy_amount - self.sell_amount
+
+    def positions(self, broker: Optional[int] = None, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per (broker, symbol) flows, largest absolute net amount first
+
+        Args:
+            broker: Only return this broker's positions
+            symbol: Only return positions in this symbol
+        """
+        active = (self.buy_qty + self.sell_qty) > 0
+        if broker is not None:
+            keep = np.zeros(active.shape[0], dtype=bool)
+            if 0 <= broker < len(keep):
+                keep[broker] = True
+            active &= keep[:, None]
+        if symbol is not None:
+            keep = np.zeros(active.shape[1], dtype=bool)
+            if symbol in self._symbol_ids:
+                keep[self._symbol_ids[symbol]] = True
+            active &= keep[None, :]
+
+        brokers, symbols = np.nonzero(active)
+        net_amount = self.net_amount[brokers, symbols]
+        order = np.argsort(-np.abs(net_amount), kind='stable')
+        brokers, symbols = brokers[order], symbols[order]
+
+        return [{
+            'Broker': int(b),
+            'Symbol': self.symbols[s],
+            'Buy Qty': self.buy_qty[b, s],
+            'Sell Qty': self.sell_qty[b, s],
+            'Net Qty': self.buy_qty[b, s] - self.sell_qty[b, s],
+            'Buy Amount': self.buy_amount[b, s],
+            'Sell Amount': self.sell_amount[b, s],
+            'Net Amount': self.buy_amount[b, s] - self.sell_amount[b, s]
+        } for b, s in zip(brokers.tolist(), symbols.tolist())]
+
+    def broker_summary(self, top: int = 5) -> List[Dict[str, Any]]:
+        """Totals for every broker, largest turnover first
+
+        Args:
+            top: Number of symbols used for the concentration figure
+
+        Returns:
+            Rows with buy/sell/net amounts, turnover, number of symbols
+            traded, the share of turnover in the broker's top-N symbols
+            and those symbols
+        """
+        gross = self.buy_amount + self.sell_amount
+        turnover = gross.sum(axis=1)
+        brokers = np.nonzero(turnover)[0]
+        if not len(brokers):
+            return []
+        gross = gross[brokers]
+
+        # Top-N symbols per broker without fully sorting every row
+        top = max(1, min(top, gross.shape[1]))
+        top_idx = np.argpartition(-gross, top - 1, axis=1)[:, :top]
+        top_vals = np.take_along_axis(gross, top_idx, axis=1)
+        order = np.argsort(-top_vals, axis=1)
+        top_idx = np.take_along_axis(top_idx, order, axis=1)
+        top_vals = np.take_along_axis(top_vals, order, axis=1)
+        concentration = top_vals.sum(axis=1) / turnover[brokers] * 100
+
+        buy = self.buy_amount[brokers].sum(axis=1)
+        sell = self.sell_amount[brokers].sum(axis=1)
+        traded = (gross > 0).sum(axis=1)
+
+        rows = [{
+            'Broker': int(broker),
+            'Buy Amount': buy[i],
+            'Sell Amount': sell[i],
+            'Net Amount': buy[i] - sell[i],
+            'Turnover': turnover[broker],
+            'Symbols': int(traded[i]),
+            f'Top {top} %': concentration[i],
+            'Top Symbols': ', '.join(self.symbols[s] for s, v in zip(top_idx[i], top_vals[i]) if v > 0)
+        } for i, broker in enumerate(brokers.tolist())]
+        rows.sort(key=lambda row: row['Turnover'], reverse=True)
+        return rows
@@ -0,0 +1,229 @@
+"""
+On-disk response cache for NEPSE API calls
+
+This module persists raw API responses between runs so that repeated
+invocations (e.g. cron jobs polling the index) are served locally.
+Entries expire quickly while the market is trading and are kept until
+the next session opens once trading has stopped.
+
+Classes:
+    ResponseCache: Persistent, size-capped cache of API responses
+
+Functions:
+    user_cache_dir: Platform specific cache directory for nepsense
+    is_market_open: Whether NEPSE is currently in its trading session
+    next_session_open: Start of the next NEPSE trading session
+    session_date: Trading date the current prices belong to
+    market_ttl: Seconds a response fetched now stays fresh
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone, time as dtime
+from pathlib import Path
+from typing import Any, Optional, Sequence, Tuple
+
+NEPAL_TZ = timezone(timedelta(hours=5, minutes=45))
+TRADING_DAYS = {6, 0, 1, 2, 3}  # Sunday to Thursday
+SESSION_OPEN = dtime(11, 0)
+SESSION_CLOSE = dtime(15, 0)
+SETTLE_MINUTES = 15  # Prices are still adjusted shortly after the close
+
+DEFAULT_LIVE_TTL = 15
+DEFAULT_MAX_ENTRIES = 2000
+
+def user_cache_dir() -> Path:
+    """Return the directory nepsense uses for cached data"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or Path.home() / 'AppData' / 'Local'
+    elif sys.platform == 'darwin':
+        base = Path.home() / 'Library' / 'Caches'
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'nepsense'
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """Check whether the NEPSE trading session (plus settlement) is running"""
+    now = (now or datetime.now(NEPAL_TZ)).astimezone(NEPAL_TZ)
+    if now.weekday() not in TRADING_DAYS:
+        return False
+    opens = datetime.combine(now.date(), SESSION_OPEN, NEPAL_TZ)
+    closes = datetime.combine(now.date(), SESSION_CLOSE, NEPAL_TZ) + timedelta(minutes=SETTLE_MINUTES)
+    return opens <= now < closes
+
+def next_session_open(now: Optional[datetime] = None) -> datetime:
+    """Return when the next trading session starts
+
+    Public holidays are not known here, so on those days cached data
+    simply expires at the usual opening time and is refetched.
+    """
+    now = (now or datetime.now(NEPAL_TZ)).astimezone(NEPAL_TZ)
+    day = now.date()
+    if now.weekday() in TRADING_DAYS and now < datetime.combine(day, SESSION_OPEN, NEPAL_TZ):
+        return datetime.combine(day, SESSION_OPEN, NEPAL_TZ)
+    while True:
+        day += timedelta(days=1)
+        if day.weekday() in TRADING_DAYS:
+            return datetime.combine(day, SESSION_OPEN, NEPAL_TZ)
+
+def session_date(now: Optional[datetime] = None) -> date:
+    """Return the trading date whose prices are current at `now`
+
+    That is today once a trading day's session has opened, and the
+    previous trading day before the open or on weekends (public holidays
+    are not known here).
+    """
+    now = (now or datetime.now(NEPAL_TZ)).astimezone(NEPAL_TZ)
+    day = now.date()
+    if now.weekday() in TRADING_DAYS and now.time() >= SESSION_OPEN:
+        return day
+    while True:
+        day -= timedelta(days=1)
+        if day.weekday() in TRADING_DAYS:
+            return day
+
+def market_ttl(now: Optional[datetime] = None, live_ttl: float = DEFAULT_LIVE_TTL) -> float:
+    """Return how long (seconds) a response fetched at `now` stays fresh
+
+    Args:
+        now: Time of the fetch (defaults to the current time)
+        live_ttl: TTL to use while the market is trading
+    """
+    now = (now or datetime.now(NEPAL_TZ)).astimezone(NEPAL_TZ)
+    if is_market_open(now):
+        return live_ttl
+    return (next_session_open(now) - now).total_seconds()
+
+class ResponseCache:
+    """Persistent cache of API responses keyed by method and arguments
+
+    Each entry is a small JSON file under the cache directory. Reads touch
+    the file so that pruning evicts the least recently used entries once
+    max_entries is exceeded.
+
+    Attributes:
+        directory: Where entries are stored
+        max_entries: Maximum number of entries kept on disk
+        live_ttl: Freshness window in seconds during trading hours
+        refresh: Skip reads (but still store fresh responses)
+    """
+
+    MISSING = object()
+    PRUNE_EVERY = 32
+
+    def __init__(self, directory: Optional[Path] = None,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 live_ttl: float = DEFAULT_LIVE_TTL,
+                 refresh: bool = False):
+        self.directory = Path(directory) if directory else user_cache_dir() / 'responses'
+        self.max_entries = max_entries
+        self.live_ttl = live_ttl
+        self.refresh = refresh
+        self._writes = 0
+
+    @staticmethod
+    def key(method: str, args: Sequence[Any] = ()) -> str:
+        """Return a stable file-safe key for an API call"""
+        raw = json.dumps([method, list(args)], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, method: str, args: Sequence[Any]) -> Path:
+        return self.directory / f"{self.key(method, args)}.json"
+
+    def get(self, method: str, args: Sequence[Any] = (), default: Any = MISSING) -> Any:
+        """Return a fresh cached response, or default if there is none"""
+        if self.refresh:
+            return default
+        path = self._path(method, args)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return default
+
+        if entry.get('expires', 0) <= time.time():
+            return default
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry.get('data')
+
+    def size(self, method: str, args: Sequence[Any] = ()) -> Optional[int]:
+        """Bytes of the stored entry, or None if there is none"""
+        try:
+            return self._path(method, args).stat().st_size
+        except OSError:
+            return None
+
+    def get_stale(self, method: str, args: Sequence[Any] = ()) -> Optional[Tuple[Any, Optional[float]]]:
+        """Return a cached response even if it has expired (and even with refresh)
+
+        Used as a fallback while NEPSE is unreachable.
+
+        Returns:
+            (response, time it was stored or None if unknown), or None
+            if nothing is cached
+        """
+        try:
+            with open(self._path(method, args), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if 'data' not in entry:
+            return None
+        return entry['data'], entry.get('stored')
+
+    def set(self, method: str, args: Sequence[Any], data: Any, ttl: Optional[float] = None):
+        """Store a response, expiring it according to market hours by default"""
+        if ttl is None:
+            ttl = market_ttl(live_ttl=self.live_ttl)
+        entry = {
+            'method': method,
+            'args': list(args),
+            'stored': time.time(),
+            'expires': time.time() + ttl,
+            'data': data
+        }
+        path = self._path(method, args)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, default=str)
+            os.replace(tmp, path)
+        except OSError:
+            return  # Caching is best effort
+
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+        self._writes += 1
+
+    def prune(self):
+        """Evict least recently used entries beyond max_entries"""
+        try:
+            entries = [(entry.stat().st_mtime, entry.path)
+                       for entry in os.scandir(self.directory) if entry.name.endswith('.json')]
+        except OSError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove every cached entry"""
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.json'):
+                    os.remove(entry.path)
+        except OSError:
+            pass
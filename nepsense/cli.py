@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
 import argparse
+import sys
 from pathlib import Path
-from .nepse_client import NepseClient
-from .formatters import TableFormatter
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from .cache import DEFAULT_LIVE_TTL, ResponseCache
+from .resilience import DEFAULT_CALL_TIMEOUT, DEFAULT_RETRIES
+from .utils import DEFAULT_MAX_WORKERS
+
+if TYPE_CHECKING:
+    from .companies import CompanyIndex
+    from .portfolio import Portfolio
+    from .watch import View
 
 """
 Command Line Interface for NEPSE market data
@@ -22,24 +30,97 @@ class NepseCLI:
     
     Attributes:
         client: NepseClient instance for API access
-        formatter: TableFormatter instance for output formatting
+        formatter: TableFormatter instance for output formatting (None with an output format)
+        writer: Record writer for machine-readable output (None for tables)
+        tracer: Tracer shared with the client (see nepsense.tracing)
+        profile: MemorySink collecting spans for --profile (None otherwise)
     """
     
-    def __init__(self, trace=False):
-        self.client = NepseClient(trace=trace)
-        self.formatter = TableFormatter()
+    def __init__(self, trace=False, max_workers=DEFAULT_MAX_WORKERS, timeout=None,
+                 use_cache=True, refresh=False, output=None, refresh_interval=None, transport=None,
+                 trace_file=None, profile=False, deadline=None, call_timeout=DEFAULT_CALL_TIMEOUT,
+                 retries=DEFAULT_RETRIES):
+        # Imported here so that argument parsing (e.g. --help) stays light
+        from .nepse_client import NepseClient
+        from .tracing import JsonLinesSink, MemorySink, StderrSink, Tracer
+        
+        self.profile = MemorySink() if profile else None
+        self._company_index = None
+        self._symbols_checked = False
+        self.refresh = refresh
+        sinks = [StderrSink()] if trace else []
+        if trace_file:
+            sinks.append(JsonLinesSink(trace_file))
+        if self.profile:
+            sinks.append(self.profile)
+        self.tracer = Tracer(sinks)
+        
+        cache = None
+        if use_cache:
+            # The disk cache must not keep serve's responses longer than its refresh interval
+            live_ttl = DEFAULT_LIVE_TTL if refresh_interval is None else refresh_interval
+            cache = ResponseCache(live_ttl=live_ttl, refresh=refresh)
+        self.client = NepseClient(trace=trace, max_workers=max_workers, timeout=timeout, cache=cache,
+                                  refresh_interval=refresh_interval, transport=transport,
+                                  tracer=self.tracer, deadline=deadline, call_timeout=call_timeout,
+                                  retries=retries)
+        if output:
+            from .export import record_writer
+            self.writer = record_writer(output)
+            self.formatter = None
+            self.client.show_progress = False
+        else:
+            from .formatters import TableFormatter
+            self.writer = None
+            self.formatter = TableFormatter()
         
     def run(self):
         """Parse arguments and execute commands"""
         args = self._parse_arguments()
-        self._execute_commands(args)
+        try:
+            self._execute_commands(args)
+            if self.writer:
+                self.writer.finish()
+            self._refresh_companies()
+        finally:
+            self.close()
+
+    def serve(self, host: str, port: int):
+        """Serve the client's data over HTTP until interrupted (priceof serve)"""
+        from .server import NepseServer
+        try:
+            NepseServer(self.client, host=host, port=port).run()
+        finally:
+            self.close()
+
+    def record(self, symbols: List[str], interval: float, depth: bool = False,
+               root: Optional[Path] = None, until_close: bool = False):
+        """Record intraday ticks until interrupted (priceof record)"""
+        from .ticks import TickRecorder
+        if symbols:
+            symbols = self._check_symbols(symbols, 'record')
+            if not symbols:
+                return
+        try:
+            TickRecorder(self.client, symbols, root=root, interval=interval,
+                         depth=depth).run(until_close=until_close)
+        finally:
+            self.close()
+
+    def close(self):
+        """Print the --profile breakdown and close the trace sinks"""
+        if self.profile:
+            self.profile.report()
+        self.tracer.close()
 
     @staticmethod
     def _parse_arguments() -> argparse.Namespace:
         """Setup and parse CLI arguments"""
         parser = argparse.ArgumentParser(
             description="NEPSE market data CLI tool",
-            prog="priceof"
+            prog="priceof",
+            epilog="Run 'priceof serve --help' to serve market data over HTTP, or "
+                   "'priceof record --help' to record intraday ticks."
         )
         
         # Company symbols as positional arguments (default behavior)
@@ -59,30 +140,149 @@ class NepseCLI:
                           help="Get market depth")
         parser.add_argument("-d", "--get_detail", metavar="symbol", nargs="+",
                           help="Get company details for one or more symbols")
+        parser.add_argument("--find", metavar="QUERY",
+                          help="Look up listed companies by symbol or name (prefix and fuzzy match, "
+                               "no network needed)")
         
         # Top lists
         parser.add_argument("--gainers", action="store_true", 
                           help="Get top gainers")
         parser.add_argument("--losers", action="store_true", 
                           help="Get top losers")
+        parser.add_argument("--turnover", action="store_true",
+                          help="Get scripts with maximum turnover")
+        parser.add_argument("--volume", action="store_true",
+                          help="Get scripts with maximum volume")
+        parser.add_argument("--transactions", action="store_true",
+                          help="Get scripts with maximum transactions")
         
         # Data export
         parser.add_argument("-f", "--floorsheet", metavar="path", type=Path, nargs="?",
                           const=Path.cwd(),  # Default to current directory if -f used without path
-                          help="Download floorsheet using nepse-cli (optional output path)")
+                          help="Download today's floorsheet (optional output path, resumes if interrupted)")
+        parser.add_argument("--floorsheet-format", choices=["csv", "columnar"], default="csv",
+                          help="Save the downloaded floorsheet as CSV or in the columnar format")
+        parser.add_argument("--convert-floorsheet", metavar="CSV", type=Path, nargs="+",
+                          help="Convert floorsheet CSV files to the columnar format")
+        
+        # Fetch options
+        fetch_group = parser.add_argument_group('Fetch Options')
+        fetch_group.add_argument("--workers", metavar="N", type=int, default=DEFAULT_MAX_WORKERS,
+                          help=f"Maximum concurrent requests for multiple symbols (default: {DEFAULT_MAX_WORKERS})")
+        fetch_group.add_argument("--timeout", metavar="SECONDS", type=float,
+                          help="Give up on a symbol after this many seconds")
+        fetch_group.add_argument("--deadline", metavar="SECONDS", type=float,
+                          help="Show the symbols fetched so far after this many seconds and "
+                               "report the rest as errors")
+        NepseCLI._add_retry_arguments(fetch_group)
+        
+        # Watch mode
+        parser.add_argument("-w", "--watch", metavar="SECONDS", type=float,
+                          help="Keep refreshing the requested prices/index/sector/top views in place")
+        
+        # Output options
+        output_group = parser.add_argument_group('Output Options')
+        output_group.add_argument("--format", dest="output", choices=["json", "jsonl", "csv", "arrow"],
+                          help="Write rows to stdout in a machine-readable format instead of tables "
+                               "(prices are streamed per symbol; arrow needs pyarrow)")
+        
+        # Cache options
+        cache_group = parser.add_argument_group('Cache Options')
+        cache_group.add_argument("--no-cache", action="store_true",
+                          help="Neither read nor store cached API responses")
+        cache_group.add_argument("--refresh", action="store_true",
+                          help="Ignore cached API responses but store the fresh ones, and refresh the "
+                               "company list before rejecting an unknown symbol")
+        
+        # Floorsheet analytics
+        analytics_group = parser.add_argument_group('Floorsheet Analytics')
+        analytics_group.add_argument("--broker-flow", metavar="FLOORSHEET", type=Path, nargs="+",
+                          help="Net buy/sell per broker from floorsheet CSVs or columnar directories")
+        analytics_group.add_argument("--broker", metavar="ID", type=int,
+                          help="With --broker-flow, show this broker's per-symbol positions")
+        analytics_group.add_argument("--top", metavar="N", type=int, default=5,
+                          help="Number of top symbols used for broker concentration (default: 5)")
+        analytics_group.add_argument("--query", action="store_true",
+                          help="Query stored columnar floorsheets (see --archive and the filters below)")
+        analytics_group.add_argument("--archive", metavar="path", type=Path, default=Path.cwd(),
+                          help="Directory of columnar floorsheets (default: current directory)")
+        analytics_group.add_argument("--symbol", metavar="SYMBOL",
+                          help="With --query, only trades in this symbol")
+        analytics_group.add_argument("--buyer", metavar="ID", type=int,
+                          help="With --query, only trades bought by this broker")
+        analytics_group.add_argument("--seller", metavar="ID", type=int,
+                          help="With --query, only trades sold by this broker")
+        analytics_group.add_argument("--from", dest="date_from", metavar="YYYY-MM-DD",
+                          type=NepseCLI._date_argument,
+                          help="With --query or --history, first trading date (inclusive)")
+        analytics_group.add_argument("--to", dest="date_to", metavar="YYYY-MM-DD",
+                          type=NepseCLI._date_argument,
+                          help="With --query or --history, last trading date (inclusive)")
+        analytics_group.add_argument("--min-amount", metavar="AMOUNT", type=float,
+                          help="With --query, only trades with a larger amount")
+        analytics_group.add_argument("--limit", metavar="N", type=int, default=100,
+                          help="With --query, --screen or --depth-scan, number of rows to show "
+                               "(default: 100)")
+        
+        # Portfolio valuation
+        portfolio_group = parser.add_argument_group('Portfolio')
+        portfolio_group.add_argument("--portfolio", metavar="CSV", type=Path,
+                          help="Value the holdings in CSV (symbol, quantity and optional cost columns): "
+                               "market value, day change, unrealized P&L and sector weights "
+                               "(works with --watch)")
+        
+        # Market screener
+        screen_group = parser.add_argument_group('Market Screener')
+        screen_group.add_argument("--screen", metavar="EXPR",
+                          help="Screen every traded symbol with an expression over ltp, change, "
+                               "pct_change, open, high, low, prev_close, volume, turnover, trades, "
+                               "symbol, name and sector, plus avg_volume, rel_volume and indicators "
+                               "(sma20, rsi14, ...) from stored history, "
+                               "e.g. 'pct_change > 5 and volume > 3 * avg_volume'")
+        screen_group.add_argument("--sort", metavar="EXPR", default="pct_change",
+                          help="With --screen, sort by this column or expression (default: pct_change)")
+        screen_group.add_argument("--ascending", action="store_true",
+                          help="With --screen or --depth-scan, sort in ascending order (default: descending)")
+        
+        # Order book analytics
+        depth_group = parser.add_argument_group('Market Depth Scan')
+        depth_group.add_argument("--depth-scan", metavar="SYMBOL", nargs="+",
+                          help="Fetch the order books of many symbols concurrently and rank them by "
+                               "best bid/ask, spread, cumulative depth and buy/sell imbalance")
+        depth_group.add_argument("--levels", metavar="N", type=int, default=5,
+                          help="With --depth-scan, price levels summed into depth and imbalance (default: 5)")
+        depth_group.add_argument("--rank-by", metavar="METRIC", default="imbalance",
+                          help="With --depth-scan, metric to rank by: bid, bid_qty, ask, ask_qty, spread, "
+                               "spread_pct, weighted_mid, bid_depth, ask_depth or imbalance "
+                               "(default: imbalance)")
+        
+        # Price history
+        history_group = parser.add_argument_group('Price History')
+        history_group.add_argument("--history", metavar="SYMBOL",
+                          help="Show the stored daily OHLCV history of a symbol (see --from/--to)")
+        history_group.add_argument("--indicators", nargs="*", metavar="SYMBOL",
+                          help="Show the latest SMA/EMA/RSI/MACD/Bollinger/VWAP values computed "
+                               "from stored history (all stored symbols if none given)")
+        history_group.add_argument("--save-history", action="store_true",
+                          help="Append the fetched prices to the history store as the current session")
+        history_group.add_argument("--history-dir", metavar="path", type=Path,
+                          help="History store directory (default: ~/.local/share/nepsense/history)")
+        
+        # Recorded intraday ticks
+        ticks_group = parser.add_argument_group('Intraday Ticks')
+        ticks_group.add_argument("--ticks", metavar="SYMBOL",
+                          help="Show a symbol's intraday series recorded with 'priceof record'")
+        ticks_group.add_argument("--session", metavar="YYYY-MM-DD", type=NepseCLI._date_argument,
+                          help="With --ticks, the session to show (default: the latest recorded)")
+        ticks_group.add_argument("--ticks-dir", metavar="path", type=Path,
+                          help="Tick log directory (default: ~/.local/share/nepsense/ticks)")
         
         # Debug options
         debug_group = parser.add_argument_group('Debug Options')
-        debug_group.add_argument("--trace", action="store_true",
-                          help="Show API calls and responses")
+        NepseCLI._add_trace_arguments(debug_group)
+        NepseCLI._add_fixture_arguments(debug_group)
         
         # Note unsupported features
-        parser.add_argument("--turnover", action="store_true", 
-                          help="[Unsupported] Get scripts with maximum turnover")
-        parser.add_argument("--volume", action="store_true",
-                          help="[Unsupported] Get scripts with maximum volume")
-        parser.add_argument("--transactions", action="store_true",
-                          help="[Unsupported] Get scripts with maximum transactions")
         parser.add_argument("--supply", action="store_true",
                           help="[Unsupported] Get scripts with maximum supply")
         parser.add_argument("--demand", action="store_true",
@@ -94,74 +294,548 @@ class NepseCLI:
         
         return parser.parse_args()
 
+    @staticmethod
+    def _date_argument(value: str) -> str:
+        """Validate a YYYY-MM-DD option value"""
+        from datetime import date
+        try:
+            return date.fromisoformat(value).isoformat()
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"expected a YYYY-MM-DD date, got {value!r}")
+
+    @staticmethod
+    def _parse_serve_arguments(argv: List[str]) -> argparse.Namespace:
+        """Setup and parse `priceof serve` arguments"""
+        parser = argparse.ArgumentParser(
+            description="Serve NEPSE market data as JSON over HTTP, sharing one cached client "
+                        "between all callers",
+            prog="priceof serve"
+        )
+        parser.add_argument("--host", default="127.0.0.1",
+                          help="Address to listen on (default: 127.0.0.1)")
+        parser.add_argument("--port", type=int, default=8765,
+                          help="Port to listen on (default: 8765)")
+        parser.add_argument("--refresh", metavar="SECONDS", type=float, default=15,
+                          help="Refetch upstream data older than this while the market is trading (default: 15)")
+        parser.add_argument("--workers", metavar="N", type=int, default=DEFAULT_MAX_WORKERS,
+                          help=f"Maximum concurrent upstream requests (default: {DEFAULT_MAX_WORKERS})")
+        parser.add_argument("--timeout", metavar="SECONDS", type=float,
+                          help="Give up on a symbol after this many seconds")
+        NepseCLI._add_retry_arguments(parser)
+        parser.add_argument("--no-cache", action="store_true",
+                          help="Do not read or write the on-disk response cache")
+        NepseCLI._add_trace_arguments(parser)
+        NepseCLI._add_fixture_arguments(parser)
+        return parser.parse_args(argv)
+
+    @staticmethod
+    def _parse_record_arguments(argv: List[str]) -> argparse.Namespace:
+        """Setup and parse `priceof record` arguments"""
+        parser = argparse.ArgumentParser(
+            description="Poll the live market at a fixed cadence and append what changed to a "
+                        "compact tick log per session (read it back with 'priceof --ticks SYMBOL')",
+            prog="priceof record"
+        )
+        parser.add_argument('symbols', nargs='*', metavar='SYMBOL',
+                          help="Symbols to record (default: every traded symbol)")
+        parser.add_argument("--interval", metavar="SECONDS", type=float, default=5,
+                          help="Seconds between polls (default: 5)")
+        parser.add_argument("--depth", action="store_true",
+                          help="Also record best bid/ask and their quantities "
+                               "(one extra request per symbol and poll)")
+        parser.add_argument("--until-close", action="store_true",
+                          help="Stop once the trading session is over")
+        parser.add_argument("--ticks-dir", metavar="path", type=Path,
+                          help="Tick log directory (default: ~/.local/share/nepsense/ticks)")
+        parser.add_argument("--workers", metavar="N", type=int, default=DEFAULT_MAX_WORKERS,
+                          help=f"Maximum concurrent requests with --depth (default: {DEFAULT_MAX_WORKERS})")
+        parser.add_argument("--timeout", metavar="SECONDS", type=float,
+                          help="With --depth, give up on a symbol after this many seconds")
+        NepseCLI._add_retry_arguments(parser)
+        NepseCLI._add_trace_arguments(parser)
+        NepseCLI._add_fixture_arguments(parser)
+        return parser.parse_args(argv)
+
+    @staticmethod
+    def _add_retry_arguments(group):
+        """Add the upstream timeout and retry options"""
+        group.add_argument("--call-timeout", metavar="SECONDS", type=float, default=DEFAULT_CALL_TIMEOUT,
+                          help=f"Abandon an upstream request after this many seconds (default: {DEFAULT_CALL_TIMEOUT})")
+        group.add_argument("--retries", metavar="N", type=int, default=DEFAULT_RETRIES,
+                          help=f"Retry timed out or failed upstream requests up to N times "
+                               f"with backoff (default: {DEFAULT_RETRIES})")
+
+    @staticmethod
+    def _add_trace_arguments(group):
+        """Add the tracing and profiling options"""
+        group.add_argument("--trace", action="store_true",
+                          help="Print one line per API request, cache hit, client call and render "
+                               "with its latency and payload size")
+        group.add_argument("--trace-file", metavar="PATH", type=Path,
+                          help="Append the same spans to PATH as JSON Lines")
+        group.add_argument("--profile", action="store_true",
+                          help="Print a per-phase latency breakdown (upstream, cache, transform, render) at exit")
+
+    @staticmethod
+    def _add_fixture_arguments(group):
+        """Add the options selecting a recording or replaying transport"""
+        group.add_argument("--record-fixtures", metavar="DIR", type=Path,
+                          help="Save every raw upstream response under DIR (implies --no-cache)")
+        group.add_argument("--replay-fixtures", metavar="DIR", type=Path,
+                          help="Answer upstream calls from responses saved with --record-fixtures "
+                               "instead of the network (implies --no-cache)")
+        group.add_argument("--replay-latency", metavar="MS", type=float, default=0,
+                          help="With --replay-fixtures, delay each call by MS milliseconds")
+        group.add_argument("--replay-jitter", metavar="MS", type=float, default=0,
+                          help="With --replay-fixtures, vary the delay by up to +/- MS milliseconds")
+
+    @staticmethod
+    def _transport(args: argparse.Namespace):
+        """Build the transport requested by the fixture options (None for the live API)"""
+        if args.replay_fixtures:
+            from .transport import ReplayTransport
+            return ReplayTransport(args.replay_fixtures, latency=args.replay_latency / 1000,
+                                   jitter=args.replay_jitter / 1000)
+        if args.record_fixtures:
+            from .transport import LiveTransport, RecordingTransport
+            return RecordingTransport(LiveTransport(), args.record_fixtures)
+        return None
+
     def _execute_commands(self, args: argparse.Namespace):
         """Execute commands based on parsed arguments"""
         
         # Handle unsupported features
-        unsupported = ['turnover', 'volume', 'transactions', 'supply', 'demand']
+        unsupported = ['supply', 'demand']
         for feature in unsupported:
             if getattr(args, feature, False):
                 print(f"Warning: The --{feature} feature is not supported by the current API")
                 return
         
-        # Company price data (default behavior)
+        # Company lookup in the local index
+        if args.find:
+            data = self._companies().find(args.find)
+            self._output('companies', data, lambda: self.formatter.print_companies(data, args.find))
+        
+        # Unknown symbols are rejected before any request is made
         if args.symbols:
-            data = self.client.get_stock_prices(args.symbols)
-            self.formatter.print_stock_prices(data)
+            args.symbols = self._check_symbols(args.symbols, 'prices')
+        if args.get_detail:
+            args.get_detail = self._check_symbols(args.get_detail, 'company_details')
+        if args.market_depth:
+            args.market_depth = next(iter(self._check_symbols([args.market_depth], 'market_depth')), None)
+        if args.depth_scan:
+            args.depth_scan = self._check_symbols(args.depth_scan, 'depth_scan')
+        
+        # Live dashboard
+        if args.watch and self.writer:
+            print("Warning: --watch cannot be combined with --format", file=sys.stderr)
+            return
+        if args.watch:
+            from .watch import Watcher
+            Watcher(self.client, self._watch_views(args), args.watch).run()
             return
         
+        # Company price data (default behavior)
+        if args.symbols:
+            if self.writer:
+                # Stream each symbol's row as soon as it arrives
+                from .tracing import timed_rows
+                errors, data = [], []
+                with self.tracer.span('prices', 'render') as span:
+                    rows = timed_rows(span, self.client.iter_stock_prices(args.symbols))
+                    self.writer.write('prices', self._without_errors(rows, errors, data))
+                self._report_errors('prices', errors)
+            else:
+                data = self.client.get_stock_prices(args.symbols)
+                self._output('prices', data, lambda: self.formatter.print_stock_prices(data))
+            if args.save_history:
+                self._save_history(args.history_dir, data)
+        
+        # Stored price history
+        if args.history:
+            from .history import HistoryStore
+            symbol = args.history.upper()
+            try:
+                data = HistoryStore(args.history_dir).rows(symbol, args.date_from, args.date_to)
+            except ValueError as e:
+                sys.exit(f"Error: {e}")
+            self._output('history', data, lambda: self.formatter.print_history(data, symbol))
+
+        # Technical indicators over stored history
+        if args.indicators is not None:
+            from .history import HistoryStore
+            from .indicators import load_engine
+            wanted = [symbol.upper() for symbol in args.indicators]
+            with self.tracer.span('indicators', 'transform'):
+                data = load_engine(HistoryStore(args.history_dir)).rows(wanted)
+            missing = sorted(set(wanted) - {row['Symbol'] for row in data})
+            if missing:
+                print(f"Warning: no history stored for {', '.join(missing)}", file=sys.stderr)
+            self._output('indicators', data, lambda: self.formatter.print_indicators(data))
+        
+        # Recorded intraday ticks
+        if args.ticks:
+            from .ticks import TickLog, log_path, tick_dir
+            symbol = args.ticks.upper()
+            root = args.ticks_dir or tick_dir()
+            path = log_path(args.session, root) if args.session else \
+                max(root.glob('*.ticks'), default=None) if root.is_dir() else None
+            if path is None or not path.exists():
+                sys.exit(f"Error: no ticks recorded{' for ' + args.session if args.session else ''} in {root}")
+            try:
+                data = TickLog(path).rows(symbol)
+            except ValueError as e:
+                sys.exit(f"Error: {e}")
+            self._output('ticks', data, lambda: self.formatter.print_ticks(data, symbol, path.stem))
+        
         # Market summary
         if args.market_summary:
             data = self.client.get_market_summary()
-            self.formatter.print_table(data)
-            return
+            self._output('market_summary', data, lambda: self.formatter.print_table(data))
         
         # Company details
         if args.get_detail:
             data = self.client.get_company_details(args.get_detail)
-            self.formatter.print_company_details(data)
-            return
+            self._output('company_details', data, lambda: self.formatter.print_company_details(data))
         
         # Market indices
         if args.nepse:
             data = self.client.get_nepse_index()
-            self.formatter.print_table(data)
+            self._output('nepse_index', data, lambda: self.formatter.print_table(data))
             
         if args.sub_indices:
             data = self.client.get_sub_indices()
-            self.formatter.print_table(data)
+            self._output('sub_indices', data, lambda: self.formatter.print_table(data))
             
         # Market depth
         if args.market_depth:
             data = self.client.get_market_depth(args.market_depth)
-            self.formatter.print_market_depth(data)
+            if self.writer:
+                from .export import market_depth_rows
+                data = market_depth_rows(data)
+            self._output('market_depth', data, lambda: self.formatter.print_market_depth(data))
+        
+        # Order book analytics over many symbols
+        if args.depth_scan:
+            from .depth import LABELS, DepthBook
+            if args.rank_by not in LABELS:
+                sys.exit(f"Error: unknown --rank-by metric {args.rank_by!r}; available: {', '.join(LABELS)}")
+            errors, depths = [], {}
+            for row in self._without_errors(self.client.get_market_depth(args.depth_scan), errors):
+                depths[row['Symbol']] = row
+            self._report_errors('depth_scan', errors)
+            with self.tracer.span('depth_scan', 'transform', rows=len(depths)):
+                book = DepthBook.from_depths(depths, max(args.levels, 1))
+                data = book.rank(args.rank_by, args.ascending, limit=args.limit)
+            self._output('depth_scan', data,
+                         lambda: self.formatter.print_depth_scan(data, book.levels, args.rank_by))
             
         # Top lists
         if args.gainers:
             data = self.client.get_top_gainers()
-            self.formatter.print_top_list(data, "Gainers")
+            self._output('gainers', data, lambda: self.formatter.print_top_list(data, "Gainers"))
             
         if args.losers:
             data = self.client.get_top_losers()
-            self.formatter.print_top_list(data, "Losers")
+            self._output('losers', data, lambda: self.formatter.print_top_list(data, "Losers"))
+        
+        for flag, title, fetch in self._market_top_lists(args):
+            data = fetch()
+            self._output(flag, data, lambda: self.formatter.print_top_list(data, title))
             
+        # Portfolio valuation
+        if args.portfolio:
+            valuation = self._value_portfolio(self._portfolio(args.portfolio))
+            self._output('portfolio_positions', valuation['positions'],
+                         lambda: self.formatter.print_portfolio(valuation))
+            if self.writer:
+                self._output('portfolio_sectors', valuation['sectors'], None)
+                self._output('portfolio_total', valuation['total'], None)
+        
+        # Market screener
+        if args.screen is not None:
+            from .screener import HISTORY_FIELDS, ScreenError, expression_names
+            try:
+                names = expression_names(args.screen) | expression_names(args.sort)
+            except ScreenError as e:
+                sys.exit(f"Error: {e}")
+            index = self._companies()
+            if index.stale:
+                index.refresh(self.client)
+            table = self.client.market_table(list(index.companies.values()))
+            if names & set(HISTORY_FIELDS):
+                from .history import HistoryStore
+                from .indicators import load_engine
+                with self.tracer.span('history_metrics', 'transform'):
+                    table.join_history(load_engine(HistoryStore(args.history_dir)))
+            try:
+                with self.tracer.span('screen', 'transform', rows=len(table)):
+                    data = table.screen(args.screen, args.sort, args.ascending, args.limit)
+            except ScreenError as e:
+                sys.exit(f"Error: {e}")
+            self._output('screen', data, lambda: self.formatter.print_screen(data, args.screen))
+        
         # Floorsheet export
         if args.floorsheet is not None:
-            self.client.get_floorsheet(args.floorsheet)
+            path = self.client.get_floorsheet(args.floorsheet, fmt=args.floorsheet_format)
+            print(f"Floorsheet saved to {path}")
+            return
+        
+        # Broker flow analytics
+        if args.broker_flow:
+            from .analytics import BrokerFlow
+            flow = BrokerFlow.from_paths(args.broker_flow)
+            if args.broker is not None:
+                data = flow.positions(broker=args.broker)
+                self._output('broker_positions', data, lambda: self.formatter.print_broker_flow(
+                    data, title=f"Broker {args.broker} Positions"))
+            else:
+                data = flow.broker_summary(top=args.top)
+                self._output('broker_flow', data, lambda: self.formatter.print_broker_flow(data))
+            return
+        
+        # Floorsheet archive query
+        if args.query:
+            data = self.client.query_floorsheet(
+                args.archive,
+                symbol=args.symbol.upper() if args.symbol else None,
+                buyer=args.buyer,
+                seller=args.seller,
+                start=args.date_from,
+                end=args.date_to,
+                min_amount=args.min_amount
+            )
+            self._output('trades', data[:args.limit] if args.limit else data,
+                         lambda: self.formatter.print_floorsheet(data, limit=args.limit))
+            return
+        
+        if args.convert_floorsheet:
+            from .floorsheet import convert_csv
+            for csv_path in args.convert_floorsheet:
+                print(f"Converted {csv_path} -> {convert_csv(csv_path)}")
             return
         
         # Sector summary
         if args.sectors:
             data = self.client.get_sector_summary()
-            # Print debug info before table
-            self.client._print_debug()
-            self.formatter.print_sector_summary(data)
+            self._output('sectors', data, lambda: self.formatter.print_sector_summary(data))
+
+    def _output(self, dataset: str, data, show):
+        """Write data in the requested --format, or show it as a table
+        
+        Error rows left by a multi-symbol fetch (see nepse_client.error_row)
+        are taken out and reported separately.
+        
+        Args:
+            dataset: Name of the rows in machine-readable output
+            data: A row or list of rows
+            show: Callable printing the table
+        """
+        errors = []
+        if isinstance(data, list) and any(isinstance(row, dict) and 'error' in row for row in data):
+            data[:] = self._without_errors(data, errors)
+        self._report_errors(dataset, errors)
+        with self.tracer.span(dataset, 'render', rows=len(data) if isinstance(data, list) else 1):
+            if self.writer is None:
+                show()
+            elif data:
+                self.writer.write(dataset, data if isinstance(data, list) else [data])
+
+    @staticmethod
+    def _without_errors(rows, errors: List[dict], kept: Optional[List[dict]] = None):
+        """Yield rows, moving error rows into errors (and copying the others into kept)"""
+        for row in rows:
+            if isinstance(row, dict) and 'error' in row:
+                errors.append(row)
+            else:
+                if kept is not None:
+                    kept.append(row)
+                yield row
+
+    @staticmethod
+    def _save_history(directory: Optional[Path], rows: List[dict]):
+        """Append fetched price rows to the history store as the current session"""
+        from .cache import session_date
+        from .history import HistoryStore
+        day = session_date()
+        from .indicators import record_session
+        store = HistoryStore(directory)
+        stored = store.append(day, rows or [])
+        if stored:
+            record_session(store, str(day), rows)
+        print(f"Saved {stored} symbol{'s' if stored != 1 else ''} to history for {day}", file=sys.stderr)
+
+    def _report_errors(self, dataset: str, errors: List[dict]):
+        """Warn about symbols that could not be fetched
+        
+        Machine-readable output gets them as an "errors" dataset, each row
+        naming the dataset it belongs to under "source".
+        """
+        if not errors:
             return
+        if self.writer:
+            self.writer.write('errors', [{'source': dataset, **row} for row in errors])
+        else:
+            for row in errors:
+                print(f"Warning: {row['Symbol']}: {row['error']}", file=sys.stderr)
+
+    def _refresh_companies(self):
+        """Refresh a stale company index once symbols have been checked against it
+        
+        Runs after the command's output, so at most once a REFRESH_INTERVAL
+        (or a RETRY_INTERVAL after a failed attempt) a run ends with one
+        getCompanyList request.
+        """
+        if self._symbols_checked and self._company_index.stale:
+            self._company_index.refresh(self.client)
+
+    def _companies(self) -> 'CompanyIndex':
+        """Local company index, loaded on first use"""
+        if self._company_index is None:
+            from .companies import load_index
+            self._company_index = load_index()
+        return self._company_index
+
+    def _check_symbols(self, symbols: List[str], dataset: str) -> List[str]:
+        """Keep the listed symbols (upper-cased) and report the others as errors
+        
+        Only the local index is consulted; it is brought up to date after
+        the command (see _refresh_companies), or with --refresh from NEPSE
+        before rejecting anything, for companies listed since it was fetched.
+        """
+        from .companies import not_listed
+        index = self._companies()
+        listed, unknown = index.check(symbols)
+        if unknown and self.refresh and index.refresh(self.client):
+            listed, unknown = index.check(symbols)
+        self._symbols_checked = True
+        self._report_errors(dataset, [{'Symbol': symbol, 'error': not_listed(close)}
+                                      for symbol, close in unknown.items()])
+        return listed
+
+    def _portfolio(self, path: Path) -> 'Portfolio':
+        """Read a holdings CSV, exiting with a message if it is unusable
+        
+        Holdings in symbols that are not listed are reported and left out.
+        """
+        from .portfolio import Portfolio
+        try:
+            portfolio = Portfolio.from_csv(path)
+        except (OSError, ValueError) as e:
+            sys.exit(f"Error: {e}")
+        portfolio.symbols = self._check_symbols(portfolio.symbols, 'portfolio_positions')
+        return portfolio
+
+    def _value_portfolio(self, portfolio: 'Portfolio') -> Dict[str, Any]:
+        """Price all holdings in one concurrent batch and value them"""
+        prices = self.client.get_stock_prices(portfolio.symbols) if portfolio.symbols else []
+        errors = [row for row in prices if 'error' in row]
+        self._report_errors('portfolio_positions', errors)
+        with self.tracer.span('portfolio', 'transform', rows=len(prices)):
+            sectors = {row['Symbol']: self.client.get_company_metadata(row['Symbol']).get('Sector', '')
+                       for row in prices if 'error' not in row}
+            return portfolio.value(prices, sectors)
+
+    def _market_top_lists(self, args: argparse.Namespace) -> List[tuple]:
+        """(dataset, title, fetch) of the turnover/volume/transactions lists requested"""
+        lists = (('turnover', "Top Turnover", self.client.get_top_turnover),
+                 ('volume', "Top Volume", self.client.get_top_volume),
+                 ('transactions', "Top Transactions", self.client.get_top_transactions))
+        return [entry for entry in lists if getattr(args, entry[0])]
+
+    def _watch_views(self, args: argparse.Namespace) -> List['View']:
+        """Build the watch mode views requested on the command line"""
+        from .watch import (View, PRICE_COLUMNS, INDEX_COLUMNS, SECTOR_COLUMNS,
+                            SUMMARY_COLUMNS, TOP_COLUMNS, PORTFOLIO_COLUMNS)
+        
+        views = []
+        if args.portfolio:
+            portfolio = self._portfolio(args.portfolio)
+
+            def positions():
+                valuation = self._value_portfolio(portfolio)
+                return valuation['positions'] + [{'Symbol': 'Total', **valuation['total']}]
+            views.append(View("Portfolio", positions, PORTFOLIO_COLUMNS, key='Symbol',
+                              change_field='Day Change', flash_field='LTP'))
+        if args.symbols:
+            views.append(View("Prices", lambda: [row for row in self.client.get_stock_prices(args.symbols)
+                                                 if 'error' not in row],
+                              PRICE_COLUMNS, key='Symbol', change_field='change', flash_field='LTP'))
+        if args.nepse:
+            views.append(View("NEPSE Index", self.client.get_nepse_index, INDEX_COLUMNS,
+                              key='index', change_field='change', flash_field='currentValue'))
+        if args.market_summary:
+            views.append(View("Market Summary", self.client.get_market_summary, SUMMARY_COLUMNS,
+                              flash_field='Total Turnover'))
+        if args.sub_indices:
+            views.append(View("Sub-Indices", self.client.get_sub_indices, SECTOR_COLUMNS,
+                              key='Sector', change_field='Change', flash_field='Value'))
+        if args.sectors:
+            views.append(View("Sector Summary", self.client.get_sector_summary, SECTOR_COLUMNS,
+                              key='Sector', change_field='Change', flash_field='Value'))
+        if args.gainers:
+            views.append(View("Gainers", self.client.get_top_gainers, TOP_COLUMNS,
+                              change_field='Change', flash_field='LTP'))
+        if args.losers:
+            views.append(View("Losers", self.client.get_top_losers, TOP_COLUMNS,
+                              change_field='Change', flash_field='LTP'))
+        for _, title, fetch in self._market_top_lists(args):
+            views.append(View(title, fetch, TOP_COLUMNS, change_field='Change', flash_field='LTP'))
+        if not views:
+            views.append(View("NEPSE Index", self.client.get_nepse_index, INDEX_COLUMNS,
+                              key='index', change_field='change', flash_field='currentValue'))
+        return views
 
 def main():
-    args = NepseCLI._parse_arguments()
-    cli = NepseCLI(trace=args.trace)
-    cli.run()
+    from .resilience import UpstreamUnavailable
+    from .transport import FixtureNotFound
+    
+    if sys.argv[1:2] == ['serve']:
+        args = NepseCLI._parse_serve_arguments(sys.argv[2:])
+    elif sys.argv[1:2] == ['record']:
+        args = NepseCLI._parse_record_arguments(sys.argv[2:])
+    else:
+        args = NepseCLI._parse_arguments()
+    command = sys.argv[1:2]
+    fixtures = args.record_fixtures or args.replay_fixtures
+    
+    try:
+        if command == ['serve']:
+            cli = NepseCLI(trace=args.trace, max_workers=args.workers, timeout=args.timeout,
+                           use_cache=not (args.no_cache or fixtures), refresh_interval=args.refresh,
+                           transport=NepseCLI._transport(args), trace_file=args.trace_file,
+                           profile=args.profile, call_timeout=args.call_timeout, retries=args.retries)
+        elif command == ['record']:
+            # Fixture responses must not reach the cache that later live runs read
+            cli = NepseCLI(trace=args.trace, max_workers=args.workers, timeout=args.timeout,
+                           use_cache=not fixtures, transport=NepseCLI._transport(args), trace_file=args.trace_file,
+                           profile=args.profile, call_timeout=args.call_timeout, retries=args.retries)
+        else:
+            cli = NepseCLI(trace=args.trace, max_workers=args.workers, timeout=args.timeout,
+                           use_cache=not (args.no_cache or fixtures), refresh=args.refresh,
+                           output=args.output, transport=NepseCLI._transport(args),
+                           trace_file=args.trace_file, profile=args.profile, deadline=args.deadline,
+                           call_timeout=args.call_timeout, retries=args.retries)
+    except ImportError as e:
+        # Only the main command has --format; serve and record have no output option
+        if getattr(args, 'output', None):
+            sys.exit(f"Error: --format {args.output} requires {e.name} (pip install {e.name})")
+        sys.exit(f"Error: {e}")
+    except FileNotFoundError as e:
+        sys.exit(f"Error: {e}")
+    
+    try:
+        if command == ['serve']:
+            cli.serve(args.host, args.port)
+        elif command == ['record']:
+            cli.record(args.symbols, args.interval, depth=args.depth, root=args.ticks_dir,
+                       until_close=args.until_close)
+        else:
+            cli.run()
+    except ImportError as e:
+        sys.exit(f"Error: {e}")
+    except (FixtureNotFound, UpstreamUnavailable) as e:
+        sys.exit(f"Error: {e}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""
+Local index of listed companies for symbol validation and lookup
+
+The index maps every NEPSE symbol to its static company fields (company
+id, name, sector, instrument type and listing status). It starts from
+the company list bundled with the package and is replaced by a copy of
+the live getCompanyList response, refreshed at most every
+REFRESH_INTERVAL (and retried at most every RETRY_INTERVAL after a
+failed attempt), so symbols are checked in O(1) without a request and
+mistyped ones are rejected (with suggestions) before any network call.
+
+Classes:
+    CompanyIndex: Symbol -> company fields, with prefix and fuzzy search
+
+Functions:
+    load_index: Saved index if there is one, else the bundled list
+    not_listed: Error message for a symbol missing from the index
+"""
+
+import bisect
+import csv
+import difflib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .cache import user_cache_dir
+
+BUNDLED_LIST = Path(__file__).with_name('company_list.csv')
+REFRESH_INTERVAL = 7 * 24 * 3600
+RETRY_INTERVAL = 24 * 3600
+STATUS = {'A': 'Active', 'S': 'Suspended', 'D': 'Delisted'}
+
+# Field -> column of the bundled CSV
+CSV_FIELDS = {
+    'Symbol': 'symbol',
+    'Company Id': 'company_id',
+    'Name': 'security_name',
+    'Sector': 'sector_name',
+    'Instrument': 'instrument_type',
+    'Status': 'status',
+}
+
+def default_index_path() -> Path:
+    return user_cache_dir() / 'companies.json'
+
+class CompanyIndex:
+    """Listed companies keyed by symbol
+
+    Attributes:
+        companies: Symbol -> dict of the CSV_FIELDS
+        updated: Time (seconds since the epoch) the list was fetched,
+            or the bundled list was written
+        attempted: Time of the last refresh attempt, successful or not
+        bundled: Whether the companies are the bundled list
+        path: File the index is saved to by refresh()
+    """
+
+    def __init__(self, companies: Iterable[Dict[str, Any]], updated: Optional[float] = None,
+                 path: Optional[Path] = None, attempted: Optional[float] = None,
+                 bundled: bool = False):
+        self.companies = {}
+        for company in companies:
+            symbol = str(company.get('Symbol') or '').strip().upper()
+            if symbol:
+                self.companies[symbol] = {**company, 'Symbol': symbol}
+        self.updated = updated
+        self.attempted = attempted
+        self.bundled = bundled
+        self.path = path or default_index_path()
+        self._symbols = sorted(self.companies)
+        # (lowercased word of a company name, symbol) for prefix search on names
+        self._words = sorted({(word, symbol) for symbol, company in self.companies.items()
+                              for word in str(company.get('Name') or '').lower().split()})
+
+    @classmethod
+    def from_csv(cls, csv_path: Path = BUNDLED_LIST, **kwargs) -> 'CompanyIndex':
+        """Index of a company list CSV (by default the bundled one)
+
+        The list counts as fetched when the file was last modified.
+        """
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            rows = [{field: row.get(column, '') for field, column in CSV_FIELDS.items()}
+                    for row in csv.DictReader(f)]
+        kwargs.setdefault('updated', os.path.getmtime(csv_path))
+        kwargs.setdefault('bundled', csv_path == BUNDLED_LIST)
+        return cls(rows, **kwargs)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self.companies
+
+    def __len__(self) -> int:
+        return len(self.companies)
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Fields of a symbol, or None if it is not listed"""
+        return self.companies.get(symbol.upper())
+
+    @property
+    def stale(self) -> bool:
+        """Whether the index is older than REFRESH_INTERVAL and due another attempt"""
+        now = time.time()
+        return ((self.updated is None or now - self.updated > REFRESH_INTERVAL)
+                and (self.attempted is None or now - self.attempted > RETRY_INTERVAL))
+
+    @staticmethod
+    def _prefixed(items: Sequence[Any], prefix: str, key=lambda item: item) -> Iterable[Any]:
+        """Items of a sorted sequence whose key starts with prefix"""
+        position = bisect.bisect_left(items, prefix, key=key)
+        while position < len(items) and key(items[position]).startswith(prefix):
+            yield items[position]
+            position += 1
+
+    def find(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Companies matching a symbol or name, best matches first
+
+        Exact symbol, then symbol prefix, then prefix of a word in the
+        name, then name substring; close (fuzzy) matches only when none
+        of those match.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        upper, lower = query.upper(), query.lower()
+        found: Dict[str, None] = {}
+        if upper in self.companies:
+            found[upper] = None
+        found.update((symbol, None) for symbol in sorted(self._prefixed(self._symbols, upper), key=len))
+        first = lower.split()[0]
+        words = [symbol for _, symbol in self._prefixed(self._words, first, key=lambda item: item[0])]
+        found.update((symbol, None) for symbol in words
+                     if lower in str(self.companies[symbol].get('Name') or '').lower())
+        if len(found) < limit:
+            found.update((symbol, None) for symbol, company in self.companies.items()
+                         if lower in str(company.get('Name') or '').lower())
+        if not found:
+            found.update((symbol, None) for symbol in difflib.get_close_matches(
+                upper, self._symbols, n=limit, cutoff=0.6))
+            names = {str(company.get('Name') or '').lower(): symbol
+                     for symbol, company in self.companies.items()}
+            found.update((names[name], None) for name in difflib.get_close_matches(
+                lower, list(names), n=limit, cutoff=0.6))
+        return [self.row(symbol) for symbol in list(found)[:limit]]
+
+    def suggest(self, symbol: str, limit: int = 3) -> List[str]:
+        """Listed symbols close to a mistyped one"""
+        return [row['Symbol'] for row in self.find(symbol, limit)]
+
+    def row(self, symbol: str) -> Dict[str, Any]:
+        """Display row of a listed symbol"""
+        company = self.companies[symbol]
+        return {
+            'Symbol': symbol,
+            'Name': company.get('Name', ''),
+            'Sector': company.get('Sector', ''),
+            'Instrument': company.get('Instrument', ''),
+            'Status': STATUS.get(company.get('Status'), company.get('Status', '')),
+        }
+
+    def check(self, symbols: Iterable[str]) -> Tuple[List[str], Dict[str, List[str]]]:
+        """Split symbols into listed ones (upper-cased) and unknown ones
+
+        Returns:
+            (listed symbols, unknown symbol -> suggested symbols)
+        """
+        listed, unknown = [], {}
+        for symbol in symbols:
+            if symbol.upper() in self.companies:
+                listed.append(symbol.upper())
+            else:
+                unknown[symbol] = self.suggest(symbol)
+        return listed, unknown
+
+    def refresh(self, client) -> bool:
+        """Replace the index with the live company list and save it
+
+        Args:
+            client: NepseClient used for getCompanyList
+
+        Returns:
+            Whether the list could be fetched (the index is unchanged if not,
+            apart from the attempt being saved so it is not retried for
+            RETRY_INTERVAL)
+        """
+        self.attempted = time.time()
+        try:
+            companies = client.get_company_list()
+        except Exception:
+            companies = None
+        if companies:
+            # Built aside and swapped in, so lookups on other threads never see a partial index
+            fresh = CompanyIndex(companies, self.attempted, self.path, self.attempted)
+            self.__dict__.update(fresh.__dict__)
+        self._save()
+        return bool(companies)
+
+    def _save(self):
+        """Write the index to path (only the attempt times for the bundled list)"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'updated': self.updated, 'attempted': self.attempted,
+                           'companies': None if self.bundled else list(self.companies.values())}, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # Keep using the list for this run
+
+def not_listed(suggestions: Sequence[str]) -> str:
+    """Error reported for an unknown symbol, with the suggested ones"""
+    return "not a listed symbol" + (f" (did you mean {', '.join(suggestions)}?)" if suggestions else "")
+
+def load_index(path: Optional[Path] = None) -> CompanyIndex:
+    """The saved index (see CompanyIndex.refresh), or the bundled list
+
+    The bundled list is used instead of a saved one that is older than it
+    (after an upgrade), keeping the time of the last refresh attempt.
+    """
+    path = path or default_index_path()
+    try:
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)
+        attempted = saved.get('attempted')
+        if saved.get('companies') and (saved.get('updated') or 0) > os.path.getmtime(BUNDLED_LIST):
+            return CompanyIndex(saved['companies'], saved['updated'], path, attempted)
+    except (OSError, ValueError, AttributeError, TypeError):
+        attempted = None
+    return CompanyIndex.from_csv(BUNDLED_LIST, path=path, attempted=attempted)
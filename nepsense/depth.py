@@ -0,0 +1,164 @@
+"""
+Order book analytics over the market depth of many symbols
+
+The buy and sell levels of every book are flattened into one array per
+field and scattered into (symbols, levels) matrices, best price first,
+so best bid/ask, spreads, cumulative depth and imbalance for the whole
+scan are a handful of array operations; the only per-symbol Python work
+left is reading the JSON payloads.
+
+Classes:
+    DepthBook: Top levels of many order books as NumPy matrices
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_LEVELS = 5
+
+# Keys of one level in a market depth list (see NepseClient.get_market_depth)
+PRICE_KEY = 'orderBookOrderPrice'
+QUANTITY_KEY = 'orderQuantity'
+
+# Sortable metrics and their row labels, in display order
+LABELS = {
+    'bid': 'Best Bid',
+    'bid_qty': 'Bid Qty',
+    'ask': 'Best Ask',
+    'ask_qty': 'Ask Qty',
+    'spread': 'Spread',
+    'spread_pct': 'Spread %',
+    'weighted_mid': 'Weighted Mid',
+    'bid_depth': 'Bid Depth',
+    'ask_depth': 'Ask Depth',
+    'imbalance': 'Imbalance',
+}
+
+def _side(books: Sequence[Dict[str, Any]], key: str, levels: int,
+          descending: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """Price and quantity matrices of one side, best level first (NaN/0 padded)"""
+    owner, prices, quantities = [], [], []
+    for i, book in enumerate(books):
+        for level in book.get(key) or ():
+            owner.append(i)
+            prices.append(level.get(PRICE_KEY))
+            quantities.append(level.get(QUANTITY_KEY))
+    owner = np.asarray(owner, dtype=np.intp)
+    price = np.asarray(prices, dtype=float).reshape(-1)
+    quantity = np.nan_to_num(np.asarray(quantities, dtype=float).reshape(-1))
+
+    # Order levels by book, then best price first; rank = position within the book
+    order = np.lexsort((-price if descending else price, owner))
+    owner, price, quantity = owner[order], price[order], quantity[order]
+    starts = np.searchsorted(owner, np.arange(len(books)))
+    rank = np.arange(len(owner)) - starts[owner] if len(owner) else owner
+    keep = rank < levels
+
+    price_matrix = np.full((len(books), levels), np.nan)
+    quantity_matrix = np.zeros((len(books), levels))
+    price_matrix[owner[keep], rank[keep]] = price[keep]
+    quantity_matrix[owner[keep], rank[keep]] = quantity[keep]
+    return price_matrix, quantity_matrix
+
+class DepthBook:
+    """The top levels of many order books
+
+    Attributes:
+        symbols: Symbols in row order
+        levels: Number of price levels kept per side
+        bid_price, bid_qty: (symbols, levels) buy side, highest price first
+        ask_price, ask_qty: (symbols, levels) sell side, lowest price first
+    """
+
+    def __init__(self, symbols: Sequence[str], bid_price: np.ndarray, bid_qty: np.ndarray,
+                 ask_price: np.ndarray, ask_qty: np.ndarray):
+        self.symbols = list(symbols)
+        self.levels = bid_price.shape[1]
+        self.bid_price, self.bid_qty = bid_price, bid_qty
+        self.ask_price, self.ask_qty = ask_price, ask_qty
+
+    @classmethod
+    def from_depths(cls, depths: Mapping[str, Dict[str, Any]],
+                    levels: int = DEFAULT_LEVELS) -> 'DepthBook':
+        """Build from NepseClient.get_market_depth results keyed by symbol"""
+        symbols = list(depths)
+        books = [depths[symbol] for symbol in symbols]
+        return cls(symbols, *_side(books, 'buyMarketDepthList', levels, descending=True),
+                   *_side(books, 'sellMarketDepthList', levels, descending=False))
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def cumulative(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Cumulative bid and ask quantity at each level, (symbols, levels) each"""
+        return np.cumsum(self.bid_qty, axis=1), np.cumsum(self.ask_qty, axis=1)
+
+    def metrics(self, levels: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Per-symbol metrics, one array each (see LABELS)
+
+        Args:
+            levels: Price levels summed into the depth and imbalance
+                (all kept levels if omitted)
+
+        A side with no orders has NaN prices, so its spread and mids are
+        NaN; imbalance is (bid depth - ask depth) / (bid depth + ask depth),
+        from -1 (sellers only) to +1 (buyers only).
+        """
+        n = min(levels or self.levels, self.levels)
+        bid, ask = self.bid_price[:, 0], self.ask_price[:, 0]
+        bid_qty, ask_qty = self.bid_qty[:, 0], self.ask_qty[:, 0]
+        bid_depth, ask_depth = (cumulative[:, n - 1] for cumulative in self.cumulative())
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = ask - bid
+            mid = (bid + ask) / 2
+            return {
+                'bid': bid,
+                'bid_qty': bid_qty,
+                'ask': ask,
+                'ask_qty': ask_qty,
+                'spread': spread,
+                'spread_pct': spread / mid * 100,
+                'mid': mid,
+                # Each side's price weighted by the opposite side's size, so it
+                # leans towards the side that is more likely to trade through
+                'weighted_mid': (bid * ask_qty + ask * bid_qty) / (bid_qty + ask_qty),
+                'bid_depth': bid_depth,
+                'ask_depth': ask_depth,
+                'imbalance': (bid_depth - ask_depth) / (bid_depth + ask_depth),
+            }
+
+    def rank(self, sort: str = 'imbalance', ascending: bool = False, levels: Optional[int] = None,
+             limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rows for each symbol ordered by one metric
+
+        Args:
+            sort: Metric to order by (a key of LABELS)
+            ascending: Lowest first instead of highest first (NaN always last)
+            levels: Price levels summed into the depth and imbalance
+            limit: Maximum number of rows returned
+
+        Returns:
+            Rows with Symbol and the LABELS columns (None where undefined)
+
+        Raises:
+            ValueError: Unknown sort metric
+        """
+        if sort not in LABELS:
+            raise ValueError(f"Unknown depth metric {sort!r}; available: {', '.join(LABELS)}")
+        metrics = self.metrics(levels)
+        keys = metrics[sort] if ascending else -metrics[sort]
+        order = np.argsort(np.where(np.isnan(keys), np.inf, keys), kind='stable')[:limit]
+        columns = [(label, metrics[name]) for name, label in LABELS.items()]
+        return [{'Symbol': self.symbols[i],
+                 **{label: _value(values[i], label in _COUNTS) for label, values in columns}}
+                for i in order]
+
+_COUNTS = {'Bid Qty', 'Ask Qty', 'Bid Depth', 'Ask Depth'}
+
+def _value(value: float, count: bool = False) -> Any:
+    """Plain Python value for a row (NaN becomes None)"""
+    value = float(value)
+    if np.isnan(value):
+        return None
+    return int(value) if count else value
@@ -0,0 +1,206 @@
+"""
+Machine-readable output for NEPSE market data
+
+This module implements ``priceof --format``: instead of colored tables,
+rows are written to stdout as JSON, JSON Lines, CSV or an Arrow IPC
+stream. Every row is written (and flushed) as soon as it is handed to
+the writer, so consumers can start processing a multi-symbol price
+lookup before the slowest symbol has returned.
+
+Each command's rows form a named dataset (e.g. "prices", "gainers").
+
+Classes:
+    JsonWriter: One JSON object mapping dataset name to its rows
+    JsonLinesWriter: One JSON object per row, tagged with its dataset
+    CsvWriter: One CSV block (header + rows) per dataset
+    ArrowWriter: One Arrow IPC stream per dataset
+
+Functions:
+    flatten: Flatten nested dicts into dotted keys
+    market_depth_rows: One row per order book level
+    record_writer: Writer for an output format
+"""
+
+import csv
+import json
+import sys
+from typing import Any, Dict, Iterable, List, Optional, TextIO
+from .utils import lazy_import
+
+pa = lazy_import('pyarrow')
+
+FORMATS = ('json', 'jsonl', 'csv', 'arrow')
+
+def flatten(record: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """Flatten nested dicts into dotted keys (lists are kept as JSON text)"""
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (list, tuple)):
+            flat[name] = json.dumps(value, default=str)
+        else:
+            flat[name] = value
+    return flat
+
+def market_depth_rows(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten a market depth response into rows tagged with their side"""
+    if not data:
+        return []
+    return ([{'side': 'buy', **level} for level in data.get('buyMarketDepthList', [])] +
+            [{'side': 'sell', **level} for level in data.get('sellMarketDepthList', [])])
+
+class JsonWriter:
+    """Write all datasets as one JSON object, row by row
+
+    Output looks like {"prices": [{...}, {...}], "gainers": [...]} and
+    is only valid JSON once finish() has been called. Datasets in
+    DEFERRED can be written before and after other datasets (errors are
+    reported both while validating input and after fetching), so their
+    rows are kept and written as one array by finish().
+    """
+
+    DEFERRED = ('errors',)
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream or sys.stdout
+        self.dataset = None
+        self.rows = 0
+        self._deferred: Dict[str, List[Dict[str, Any]]] = {}
+
+    def write(self, dataset: str, rows: Iterable[Dict[str, Any]]):
+        """Append rows to a dataset, flushing after each one"""
+        if dataset in self.DEFERRED:
+            self._deferred.setdefault(dataset, []).extend(rows)
+            return
+        self._write(dataset, rows)
+
+    def _write(self, dataset: str, rows: Iterable[Dict[str, Any]]):
+        if dataset != self.dataset:
+            opener = '{' if self.dataset is None else '\n], '
+            self.stream.write(f"{opener}{json.dumps(dataset)}: [")
+            self.dataset, self.rows = dataset, 0
+        for row in rows:
+            self.stream.write((",\n" if self.rows else "\n") + json.dumps(row, default=str))
+            self.stream.flush()
+            self.rows += 1
+
+    def finish(self):
+        for dataset, rows in self._deferred.items():
+            self._write(dataset, rows)
+        self._deferred.clear()
+        self.stream.write("{}\n" if self.dataset is None else "\n]}\n")
+        self.stream.flush()
+
+class JsonLinesWriter:
+    """Write one JSON object per row, with a "dataset" field first"""
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream or sys.stdout
+
+    def write(self, dataset: str, rows: Iterable[Dict[str, Any]]):
+        """Write rows, flushing after each one"""
+        for row in rows:
+            self.stream.write(json.dumps({'dataset': dataset, **row}, default=str) + "\n")
+            self.stream.flush()
+
+    def finish(self):
+        self.stream.flush()
+
+class CsvWriter:
+    """Write each dataset as a CSV block
+
+    The header is taken from the dataset's first row; nested values are
+    flattened. Blocks of different datasets are separated by a blank line.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream or sys.stdout
+        self.dataset = None
+        self._writer = None
+
+    def write(self, dataset: str, rows: Iterable[Dict[str, Any]]):
+        """Append rows to a dataset, flushing after each one"""
+        for row in rows:
+            row = flatten(row)
+            if dataset != self.dataset or self._writer is None:
+                if self.dataset is not None:
+                    self.stream.write("\n")
+                self._writer = csv.DictWriter(self.stream, fieldnames=list(row),
+                                              extrasaction='ignore', lineterminator="\n")
+                self._writer.writeheader()
+                self.dataset = dataset
+            self._writer.writerow(row)
+            self.stream.flush()
+
+    def finish(self):
+        self.stream.flush()
+
+class ArrowWriter:
+    """Write each dataset as an Arrow IPC stream
+
+    The schema is inferred from the dataset's first batch. Datasets are
+    written as consecutive IPC streams, so a reader calls
+    pyarrow.ipc.open_stream() once per dataset on the same input. Lists
+    are written as one record batch; rows from an iterator are written
+    one batch per row as they arrive, with integer fields widened to
+    float64 since only the first row is seen when the schema is fixed.
+    """
+
+    def __init__(self, stream=None):
+        pa.RecordBatch  # Fail before anything is fetched if pyarrow is missing
+        self.stream = stream or sys.stdout.buffer
+        self.dataset = None
+        self._writer = None
+        self._schema = None
+
+    def write(self, dataset: str, rows: Iterable[Dict[str, Any]]):
+        """Append rows to a dataset"""
+        batches = [rows] if isinstance(rows, list) else ([row] for row in rows)
+        for batch in batches:
+            # Empty strings stand for missing numbers in several API responses
+            batch = [{key: None if value == '' else value for key, value in row.items()} for row in batch]
+            if not batch:
+                continue
+            if dataset != self.dataset or self._writer is None:
+                self._close()
+                record_batch = pa.RecordBatch.from_pylist(batch)
+                self._schema = record_batch.schema
+                if not isinstance(rows, list):
+                    # Later rows may carry floats where the first one had ints
+                    self._schema = pa.schema([field.with_type(pa.float64()) if pa.types.is_integer(field.type)
+                                              else field for field in self._schema])
+                    record_batch = record_batch.cast(self._schema)
+                self._writer = pa.ipc.new_stream(self.stream, self._schema)
+                self.dataset = dataset
+            else:
+                record_batch = pa.RecordBatch.from_pylist(batch, schema=self._schema)
+            self._writer.write_batch(record_batch)
+            self.stream.flush()
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def finish(self):
+        self._close()
+        self.stream.flush()
+
+def record_writer(fmt: str, stream=None):
+    """Return a writer for "json", "jsonl", "csv" or "arrow"
+
+    Raises:
+        ValueError: Unknown format
+        ImportError: "arrow" requested without pyarrow installed
+    """
+    if fmt == 'json':
+        return JsonWriter(stream)
+    if fmt == 'jsonl':
+        return JsonLinesWriter(stream)
+    if fmt == 'csv':
+        return CsvWriter(stream)
+    if fmt == 'arrow':
+        return ArrowWriter(stream)
+    raise ValueError(f"Unknown output format: {fmt}")
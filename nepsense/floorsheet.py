@@ -0,0 +1,533 @@
+"""
+Columnar storage for NEPSE floorsheets
+
+A day's floorsheet (~40k trades) is stored as a directory of NumPy
+column files plus a small JSON header. Columns are memory-mapped on
+load, so opening a day takes milliseconds and only the pages that an
+analysis touches are read from disk.
+
+Layout of a ``<name>.fsc`` directory:
+    meta.json     row count, trading date and the symbol categories
+    symbol.npy    int16 codes into the symbol categories
+    buyer.npy     int16 buyer broker IDs (-1 when unknown)
+    seller.npy    int16 seller broker IDs (-1 when unknown)
+    quantity.npy  int32 traded quantity
+    rate.npy      float64 trade rate
+    amount.npy    float64 trade amount
+    by_<key>.npy, by_<key>_offsets.npy
+                  row index grouped by symbol, buyer and seller: rows of
+                  key k are by_<key>[offsets[k]:offsets[k + 1]]
+
+Classes:
+    FloorsheetTable: Column arrays of one day's floorsheet
+    CsvFloorsheetWriter: Resumable page-wise CSV writer
+    ColumnarFloorsheetWriter: Resumable page-wise columnar writer
+    FloorsheetArchive: Lazily opened collection of stored days
+
+Functions:
+    normalize_floorsheet: Convert raw API records to floorsheet rows
+    table_from_frame: Encode a floorsheet DataFrame as column arrays
+    save_columnar: Persist floorsheet rows in the columnar format
+    load_columnar: Open a columnar floorsheet (memory-mapped by default)
+    read_floorsheet: Open a floorsheet CSV or columnar directory
+    convert_csv: Convert a floorsheet CSV to the columnar format
+    build_index: Add the symbol/broker row index to a columnar floorsheet
+    floorsheet_writer: Page-wise writer for a given output format
+"""
+
+import csv
+import json
+import os
+import re
+import shutil
+from datetime import date as Date
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+SUFFIX = '.fsc'
+
+# Column name -> (file stem, dtype)
+COLUMNS = {
+    'Symbol': ('symbol', np.int16),
+    'Buyer': ('buyer', np.int16),
+    'Seller': ('seller', np.int16),
+    'Quantity': ('quantity', np.int32),
+    'Rate': ('rate', np.float64),
+    'Amount': ('amount', np.float64),
+}
+
+# Floorsheet column -> field name in NEPSE API records
+RAW_FIELDS = {
+    'Symbol': 'stockSymbol',
+    'Buyer': 'buyerMemberId',
+    'Seller': 'sellerMemberId',
+    'Quantity': 'contractQuantity',
+    'Rate': 'contractRate',
+    'Amount': 'contractAmount',
+}
+
+# Index name -> column whose values are the index keys
+INDEX_KEYS = {
+    'symbol': 'Symbol',
+    'buyer': 'Buyer',
+    'seller': 'Seller',
+}
+
+_DATE_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})')
+
+def normalize_floorsheet(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Map raw NEPSE floorsheet records to Symbol/Buyer/Seller/... rows
+
+    Records that already use the floorsheet column names are kept as is.
+    """
+    rows = []
+    for record in records:
+        if 'Symbol' in record:
+            rows.append(record)
+            continue
+        rows.append({column: record.get(field) for column, field in RAW_FIELDS.items()})
+    return rows
+
+def date_from_name(path: Union[str, Path]) -> Optional[str]:
+    """Extract the YYYY-MM-DD trading date from a floorsheet file name"""
+    match = _DATE_PATTERN.search(Path(path).name)
+    return match.group(1) if match else None
+
+class FloorsheetTable:
+    """Column arrays of a single day's floorsheet
+
+    Attributes:
+        columns: Mapping of column name to NumPy array (Symbol holds codes)
+        symbols: Symbol categories indexed by the Symbol codes
+        date: Trading date as YYYY-MM-DD, if known
+        path: Directory the table was loaded from, if any
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], symbols: List[str],
+                 date: Optional[str] = None, path: Optional[Path] = None):
+        self.columns = columns
+        self.symbols = symbols
+        self.date = date
+        self.path = path
+        self._index = {}
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def symbol_code(self, symbol: str) -> int:
+        """Return the code for symbol, or -1 if it did not trade that day"""
+        try:
+            return self.symbols.index(symbol)
+        except ValueError:
+            return -1
+
+    def _load_index(self, name: str):
+        if name not in self._index:
+            if self.path and (self.path / f"by_{name}_offsets.npy").exists():
+                rows = np.load(self.path / f"by_{name}.npy", mmap_mode='r')
+                offsets = np.load(self.path / f"by_{name}_offsets.npy", mmap_mode='r')
+            else:
+                rows, offsets = _postings(self, name)
+            self._index[name] = (rows, offsets)
+        return self._index[name]
+
+    def postings(self, name: str, key: int) -> np.ndarray:
+        """Ascending row numbers whose symbol/buyer/seller code equals key"""
+        rows, offsets = self._load_index(name)
+        if key < 0 or key >= len(offsets) - 1:
+            return np.zeros(0, dtype=np.int32)
+        return np.asarray(rows[offsets[key]:offsets[key + 1]])
+
+    def select(self, symbol: Optional[str] = None, buyer: Optional[int] = None,
+               seller: Optional[int] = None, min_amount: Optional[float] = None) -> np.ndarray:
+        """Row numbers matching all given filters
+
+        Symbol and broker filters are answered from the row index, so only
+        the matching rows' amounts are read for the min_amount filter.
+        """
+        candidates = []
+        if symbol is not None:
+            code = self.symbol_code(symbol)
+            if code < 0:
+                return np.zeros(0, dtype=np.int32)
+            candidates.append(self.postings('symbol', code))
+        if buyer is not None:
+            candidates.append(self.postings('buyer', buyer))
+        if seller is not None:
+            candidates.append(self.postings('seller', seller))
+
+        if candidates:
+            candidates.sort(key=len)
+            rows = candidates[0]
+            for other in candidates[1:]:
+                rows = np.intersect1d(rows, other, assume_unique=True)
+        else:
+            rows = np.arange(len(self), dtype=np.int32)
+
+        if min_amount is not None and len(rows):
+            rows = rows[np.asarray(self['Amount'][rows]) > min_amount]
+        return rows
+
+    def take(self, rows: np.ndarray) -> pd.DataFrame:
+        """Gather the given rows into a DataFrame with a Date column"""
+        data = {'Date': [self.date] * len(rows)}
+        for column, values in self.columns.items():
+            if column == 'Symbol':
+                data[column] = np.array(self.symbols, dtype=object)[np.asarray(values[rows], dtype=np.int64)]
+            else:
+                data[column] = np.asarray(values[rows])
+        return pd.DataFrame(data)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Materialize the table as a DataFrame with a categorical Symbol"""
+        data = {}
+        for column, values in self.columns.items():
+            if column == 'Symbol':
+                data[column] = pd.Categorical.from_codes(np.asarray(values), categories=self.symbols)
+            else:
+                data[column] = np.asarray(values)
+        return pd.DataFrame(data)
+
+def _postings(table: FloorsheetTable, name: str):
+    """Group row numbers by the index key, returning (rows, offsets)"""
+    keys = np.asarray(table[INDEX_KEYS[name]], dtype=np.int64)
+    size = len(table.symbols) if name == 'symbol' else int(keys.max(initial=-1)) + 1
+    valid = np.nonzero(keys >= 0)[0]
+    order = np.argsort(keys[valid], kind='stable')
+    rows = valid[order].astype(np.int32)
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys[valid], minlength=size), out=offsets[1:])
+    return rows, offsets
+
+def _write_index(directory: Path, table: FloorsheetTable):
+    for name in INDEX_KEYS:
+        rows, offsets = _postings(table, name)
+        np.save(directory / f"by_{name}.npy", rows)
+        np.save(directory / f"by_{name}_offsets.npy", offsets)
+
+def build_index(path: Union[str, Path]):
+    """(Re)build the row index of a columnar floorsheet written without one"""
+    path = Path(path)
+    _write_index(path, load_columnar(path, columns=INDEX_KEYS.values()))
+
+def _to_frame(data: Union[pd.DataFrame, List[Dict[str, Any]]]) -> pd.DataFrame:
+    if isinstance(data, pd.DataFrame):
+        return data
+    return pd.DataFrame(normalize_floorsheet(data), columns=list(COLUMNS))
+
+def table_from_frame(df: pd.DataFrame, date: Optional[str] = None) -> FloorsheetTable:
+    """Encode a floorsheet DataFrame into in-memory column arrays"""
+    symbols = pd.Categorical(df['Symbol'].astype(str))
+    arrays = {'Symbol': symbols.codes.astype(np.int16)}
+    for column in ('Buyer', 'Seller'):
+        arrays[column] = pd.to_numeric(df[column], errors='coerce').fillna(-1).to_numpy(np.int16)
+    arrays['Quantity'] = pd.to_numeric(df['Quantity'], errors='coerce').fillna(0).to_numpy(np.int32)
+    for column in ('Rate', 'Amount'):
+        arrays[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).to_numpy(np.float64)
+    return FloorsheetTable(arrays, [str(symbol) for symbol in symbols.categories], date=date)
+
+def save_columnar(data: Union[pd.DataFrame, List[Dict[str, Any]]], path: Union[str, Path],
+                  date: Optional[str] = None) -> Path:
+    """Write floorsheet rows to a columnar directory
+
+    Args:
+        data: DataFrame or list of row dicts with the floorsheet columns
+        path: Target directory (a .fsc suffix is added if missing)
+        date: Trading date as YYYY-MM-DD (defaults to the one in the name)
+
+    Returns:
+        Path of the written directory
+    """
+    path = Path(path)
+    if path.suffix != SUFFIX:
+        path = path.with_name(path.name + SUFFIX)
+    table = table_from_frame(_to_frame(data), date=date or date_from_name(path))
+    return _write_table(table, path)
+
+def _write_table(table: FloorsheetTable, path: Path) -> Path:
+    meta = {
+        'version': FORMAT_VERSION,
+        'rows': len(table),
+        'date': table.date,
+        'symbols': table.symbols,
+    }
+
+    # Write into a temporary directory first so readers never see half a day
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+    for column, (stem, dtype) in COLUMNS.items():
+        np.save(tmp / f"{stem}.npy", table[column].astype(dtype, copy=False))
+    _write_index(tmp, table)
+    with open(tmp / 'meta.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+    if path.exists():
+        shutil.rmtree(path)
+    os.replace(tmp, path)
+    return path
+
+def load_columnar(path: Union[str, Path], columns: Optional[Iterable[str]] = None,
+                  mmap: bool = True) -> FloorsheetTable:
+    """Open a columnar floorsheet
+
+    Args:
+        path: Directory written by save_columnar
+        columns: Subset of columns to open (defaults to all)
+        mmap: Memory-map the column files instead of reading them
+
+    Returns:
+        FloorsheetTable backed by the column files
+    """
+    path = Path(path)
+    with open(path / 'meta.json', encoding='utf-8') as f:
+        meta = json.load(f)
+
+    arrays = {}
+    for column in (columns or COLUMNS):
+        stem, _ = COLUMNS[column]
+        arrays[column] = np.load(path / f"{stem}.npy", mmap_mode='r' if mmap else None)
+    return FloorsheetTable(arrays, meta['symbols'], date=meta.get('date'), path=path)
+
+def convert_csv(csv_path: Union[str, Path], output_dir: Optional[Union[str, Path]] = None) -> Path:
+    """Convert a floorsheet CSV (as saved by TableFormatter) to the columnar format
+
+    Args:
+        csv_path: Source CSV file
+        output_dir: Directory for the result (defaults to the CSV's directory)
+
+    Returns:
+        Path of the written .fsc directory
+    """
+    csv_path = Path(csv_path)
+    df = pd.read_csv(csv_path, usecols=lambda column: column in COLUMNS, low_memory=False)
+    target = Path(output_dir) if output_dir else csv_path.parent
+    return save_columnar(df, target / (csv_path.stem + SUFFIX), date=date_from_name(csv_path))
+
+def read_floorsheet(path: Union[str, Path]) -> FloorsheetTable:
+    """Open a floorsheet from either a CSV file or a columnar directory"""
+    path = Path(path)
+    if path.is_dir():
+        return load_columnar(path)
+    df = pd.read_csv(path, usecols=lambda column: column in COLUMNS, low_memory=False)
+    return table_from_frame(df, date=date_from_name(path))
+
+class CsvFloorsheetWriter:
+    """Append floorsheet rows to a CSV file page by page
+
+    checkpoint() records how much has been written; restore() truncates
+    anything written after that point so an interrupted download can be
+    resumed without duplicating rows.
+
+    Attributes:
+        path: Output CSV file
+        rows: Number of rows written so far
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path).with_suffix('.csv')
+        self.rows = 0
+
+    def reset(self):
+        """Start a new, empty file"""
+        self.path.unlink(missing_ok=True)
+        self.rows = 0
+
+    def write(self, rows: List[Dict[str, Any]]):
+        """Append a page of floorsheet rows"""
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(COLUMNS), extrasaction='ignore')
+            if new_file:
+                writer.writeheader()
+            writer.writerows(rows)
+        self.rows += len(rows)
+
+    def checkpoint(self) -> Dict[str, Any]:
+        return {'rows': self.rows, 'size': self.path.stat().st_size if self.path.exists() else 0}
+
+    def restore(self, state: Dict[str, Any]) -> bool:
+        """Return to a checkpoint; False if the file no longer holds what it recorded"""
+        size = self.path.stat().st_size if self.path.exists() else 0
+        if size < state['size']:
+            return False
+        self.rows = state['rows']
+        if self.path.exists():
+            with open(self.path, 'r+b') as f:
+                f.truncate(state['size'])
+        return True
+
+    def finish(self) -> Path:
+        return self.path
+
+class ColumnarFloorsheetWriter:
+    """Append floorsheet rows to raw column files, then build a .fsc directory
+
+    Rows are appended to one binary file per column inside a hidden
+    staging directory, so memory use is bounded by a single page. finish()
+    converts the staged columns into the columnar format with its index.
+
+    Attributes:
+        path: Target .fsc directory
+        rows: Number of rows written so far
+    """
+
+    def __init__(self, path: Union[str, Path], date: Optional[str] = None):
+        path = Path(path)
+        self.path = path if path.suffix == SUFFIX else path.with_name(path.name + SUFFIX)
+        self.staging = self.path.with_name(f".{self.path.name}.partial")
+        self.date = date or date_from_name(self.path)
+        self.rows = 0
+        self.symbols: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def reset(self):
+        """Discard any staged data"""
+        if self.staging.exists():
+            shutil.rmtree(self.staging)
+        self.staging.mkdir(parents=True)
+        self.rows = 0
+        self.symbols = []
+        self._codes = {}
+
+    def write(self, rows: List[Dict[str, Any]]):
+        """Append a page of floorsheet rows"""
+        if not self.staging.exists():
+            self.reset()
+        for symbol in (str(row.get('Symbol')) for row in rows):
+            if symbol not in self._codes:
+                self._codes[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+
+        page = {
+            'Symbol': [self._codes[str(row.get('Symbol'))] for row in rows],
+            'Buyer': [_broker_id(row.get('Buyer')) for row in rows],
+            'Seller': [_broker_id(row.get('Seller')) for row in rows],
+            'Quantity': [row.get('Quantity') or 0 for row in rows],
+            'Rate': [row.get('Rate') or 0 for row in rows],
+            'Amount': [row.get('Amount') or 0 for row in rows],
+        }
+        for column, (stem, dtype) in COLUMNS.items():
+            with open(self.staging / f"{stem}.bin", 'ab') as f:
+                f.write(np.asarray(page[column], dtype=dtype).tobytes())
+        self.rows += len(rows)
+
+    def checkpoint(self) -> Dict[str, Any]:
+        return {'rows': self.rows, 'symbols': list(self.symbols)}
+
+    def restore(self, state: Dict[str, Any]) -> bool:
+        """Return to a checkpoint; False if a staged column is missing or short of its rows"""
+        sizes = {stem: state['rows'] * np.dtype(dtype).itemsize for stem, dtype in COLUMNS.values()}
+        for stem, size in sizes.items():
+            part = self.staging / f"{stem}.bin"
+            if not part.exists() or part.stat().st_size < size:
+                return False
+        self.rows = state['rows']
+        self.symbols = list(state['symbols'])
+        self._codes = {symbol: code for code, symbol in enumerate(self.symbols)}
+        for stem, size in sizes.items():
+            with open(self.staging / f"{stem}.bin", 'r+b') as f:
+                f.truncate(size)
+        return True
+
+    def finish(self) -> Path:
+        """Write the staged columns as a .fsc directory and drop the staging area"""
+        if not self.staging.exists():
+            self.reset()
+        arrays = {column: np.fromfile(self.staging / f"{stem}.bin", dtype=dtype)
+                  for column, (stem, dtype) in COLUMNS.items()}
+        path = _write_table(FloorsheetTable(arrays, self.symbols, date=self.date), self.path)
+        shutil.rmtree(self.staging)
+        return path
+
+def _broker_id(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+def floorsheet_writer(path: Union[str, Path], fmt: str = 'csv', date: Optional[str] = None):
+    """Return a page-wise writer for the "csv" or "columnar" format"""
+    if fmt == 'columnar':
+        return ColumnarFloorsheetWriter(path, date=date)
+    return CsvFloorsheetWriter(path)
+
+class FloorsheetArchive:
+    """Collection of columnar floorsheets stored in one directory
+
+    Days are opened only when requested and are memory-mapped, so
+    iterating over months of data never holds them all in memory.
+
+    Attributes:
+        root: Directory containing the .fsc day directories
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+
+    def days(self) -> Dict[str, Path]:
+        """Map of trading date (YYYY-MM-DD) to its directory, in date order"""
+        found = {}
+        if self.root.is_dir():
+            for entry in self.root.iterdir():
+                if entry.suffix == SUFFIX and entry.is_dir():
+                    day = date_from_name(entry)
+                    if day:
+                        found[day] = entry
+        return dict(sorted(found.items()))
+
+    def open(self, day: Union[str, Date], columns: Optional[Iterable[str]] = None) -> FloorsheetTable:
+        """Open a single day"""
+        key = day.isoformat() if isinstance(day, Date) else day
+        return load_columnar(self.days()[key], columns=columns)
+
+    def iter_days(self, start: Optional[Union[str, Date]] = None, end: Optional[Union[str, Date]] = None,
+                  columns: Optional[Iterable[str]] = None) -> Iterator[FloorsheetTable]:
+        """Yield each stored day between start and end (inclusive)"""
+        start = start.isoformat() if isinstance(start, Date) else start
+        end = end.isoformat() if isinstance(end, Date) else end
+        for day, path in self.days().items():
+            if (start and day < start) or (end and day > end):
+                continue
+            yield load_columnar(path, columns=columns)
+
+    def query(self, symbol: Optional[str] = None, buyer: Optional[int] = None,
+              seller: Optional[int] = None, start: Optional[Union[str, Date]] = None,
+              end: Optional[Union[str, Date]] = None, min_amount: Optional[float] = None) -> pd.DataFrame:
+        """Trades matching the filters across the stored days, largest amount first
+
+        Args:
+            symbol: Traded symbol
+            buyer: Buyer broker ID
+            seller: Seller broker ID
+            start: First trading date (inclusive)
+            end: Last trading date (inclusive)
+            min_amount: Only trades with a larger amount
+
+        Returns:
+            DataFrame with Date, Symbol, Buyer, Seller, Quantity, Rate and Amount
+        """
+        frames = []
+        for table in self.iter_days(start, end):
+            rows = table.select(symbol=symbol, buyer=buyer, seller=seller, min_amount=min_amount)
+            if len(rows):
+                frames.append(table.take(rows))
+
+        if not frames:
+            return pd.DataFrame(columns=['Date'] + list(COLUMNS))
+        result = pd.concat(frames, ignore_index=True)
+        return result.sort_values('Amount', ascending=False, kind='stable', ignore_index=True)
+
+    def reindex(self):
+        """Build the row index for stored days that lack one"""
+        for path in self.days().values():
+            if not (path / "by_symbol_offsets.npy").exists():
+                build_index(path)
@@ -1,9 +1,12 @@
-from tabulate import tabulate
 from colorama import Fore, Style
-import pandas as pd
-from typing import Dict, List, Any, Union
+from typing import Dict, List, Any, Sequence, Union
 from datetime import datetime
 import calendar
+import re
+from .utils import lazy_import
+
+pd = lazy_import('pandas')
+tabulate = lazy_import('tabulate')
 
 """
 Formatting utilities for NEPSE market data
@@ -12,42 +15,615 @@ This module handles formatting and display of market data in tables
 and other human-readable formats. Supports colored output for price
 changes and customizable table layouts.
 
+Tables are rendered straight from lists of dicts by default; the
+original DataFrame + tabulate path is kept as ``renderer="pandas"`` and
+produces identical output.
+
 Classes:
     TableFormatter: Main formatter class for market data
 """
 
+# Same pattern tabulate uses to ignore color codes when measuring cells
+ANSI_RE = re.compile(r"\x1b\[[\x30-\x3f]*[\x20-\x2f]*[\x40-\x7e]")
+
+_ABSENT = object()  # Key missing from a row (pandas fills these with NaN)
+_NAN = float('nan')
+_wcswidth = None
+
+def _visible_width(text: str) -> int:
+    """Printed width of a cell, ignoring color codes"""
+    global _wcswidth
+    if '\x1b' in text:
+        text = ANSI_RE.sub('', text)
+    if text.isascii():
+        return len(text)
+    if _wcswidth is None:
+        try:
+            from wcwidth import wcswidth  # tabulate measures wide chars with it when installed
+        except ImportError:
+            wcswidth = len
+        _wcswidth = wcswidth
+    return _wcswidth(text)
+
+def _columns(rows: Sequence[Dict[str, Any]]) -> List[str]:
+    """Ordered union of the rows' keys (the DataFrame column order)"""
+    columns = {}
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+    return list(columns)
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _values(rows: Sequence[Dict[str, Any]], column: str) -> List[Any]:
+    """A column's values as a DataFrame would hold them
+
+    Missing keys become NaN, a numeric column holding any float or
+    missing value is promoted to float, and None is kept (printed blank)
+    in columns without numbers.
+    """
+    values = [row.get(column, _ABSENT) for row in rows]
+    numeric = False
+    for value in values:
+        if _is_number(value):
+            numeric = True
+        elif value is not None and value is not _ABSENT:
+            return [_NAN if value is _ABSENT else value for value in values]
+    if not numeric:
+        # Only None and missing values: an all-None column stays None
+        return [_NAN] * len(values) if _ABSENT in values else values
+    if all(type(value) is int for value in values):
+        return values
+    return [_NAN if value is None or value is _ABSENT else float(value) for value in values]
+
+def _numbers(rows: Sequence[Dict[str, Any]], column: str) -> List[float]:
+    """A column coerced to numbers like pd.to_numeric(errors='coerce')"""
+    numbers = []
+    for row in rows:
+        value = row.get(column)
+        if _is_number(value):
+            numbers.append(value)
+            continue
+        try:
+            numbers.append(float(value))
+        except (TypeError, ValueError):
+            numbers.append(_NAN)
+    return numbers
+
+def _cells(rows: Sequence[Dict[str, Any]], columns: Sequence[str],
+           formatted: Dict[str, List[str]] = None) -> List[List[str]]:
+    """Cell strings per column: formatted columns as given, others as pandas prints them"""
+    formatted = formatted or {}
+    raw = {col: _values(rows, col) for col in columns if col not in formatted}
+    # A frame of only numeric columns is printed from a single float matrix
+    if not formatted and all(_is_number(value) for values in raw.values() for value in values) \
+            and any(not isinstance(value, int) for values in raw.values() for value in values):
+        raw = {col: [float(value) for value in values] for col, values in raw.items()}
+    return [formatted[col] if col in formatted
+            else ['' if value is None else str(value) for value in raw[col]] for col in columns]
+
+def _fixed(numbers: Sequence[float], spec: str) -> List[str]:
+    """Format numbers, leaving missing ones blank"""
+    return ['' if value != value else format(value, spec) for value in numbers]
+
 class TableFormatter:
     """Handles formatting and display of market data
-    
+
     Formats various types of market data into readable tables with:
     - Colored price changes (green for positive, red for negative)
     - Aligned columns
     - Customizable headers
     - Different layouts for different data types
-    
+
     Methods:
         print_table: Generic table printer
         print_stock_prices: Format stock price data
         print_company_details: Format detailed company info
         print_market_depth: Format market depth data
+        print_depth_scan: Format order book analytics over many symbols
         print_top_list: Format top gainers/losers lists
+        print_broker_flow: Format broker buy/sell flows
+        print_floorsheet: Format floorsheet trades
+        print_history: Format a symbol's stored OHLCV history
+        print_indicators: Format the latest technical indicators
+        print_ticks: Format a symbol's recorded intraday series
+        print_screen: Format market screener results
+        print_portfolio: Format a portfolio valuation
+        print_companies: Format company lookup results
     """
-    
-    def __init__(self):
+
+    def __init__(self, renderer: str = "fast"):
+        """Initialize the formatter
+
+        Args:
+            renderer: "fast" formats lists of dicts directly, "pandas" uses
+                the DataFrame + tabulate path for the index, price, top list
+                and sector tables (same output, much slower)
+        """
         self.style = {
             'up': Fore.GREEN,
             'down': Fore.RED,
             'neutral': Fore.CYAN,
             'reset': Style.RESET_ALL
         }
+        self.renderer = renderer
+
+    def _render(self, headers: Sequence[str], columns: Sequence[Sequence[str]],
+                title: str = None) -> str:
+        """Render formatted columns as a "pretty" table
+
+        Args:
+            headers: Header per column (padded with blanks on the left, or
+                truncated, to the number of columns like tabulate does)
+            columns: Cell strings, one list per column
+            title: Optional title to display above table
+        """
+        headers = list(headers)
+        if len(headers) < len(columns):
+            headers = [''] * (len(columns) - len(headers)) + headers
+        headers = headers[:len(columns)]
+        columns = [[cell.strip() for cell in column] for column in columns]
+
+        widths = [max(_visible_width(header), max(map(_visible_width, column), default=0))
+                  for header, column in zip(headers, columns)]
+
+        def line(cells):
+            return "| " + " | ".join(
+                cell + " " * (width - _visible_width(cell)) for cell, width in zip(cells, widths)
+            ) + " |"
+
+        border = "+" + "+".join("-" * (width + 2) for width in widths) + "+"
+        lines = [border, line(headers), border]
+        lines.extend(line(cells) for cells in zip(*columns))
+        lines.append(border)
+
+        if title:
+            print(f"\n{self.style['neutral']}{title}{self.style['reset']}")
+        return "\n".join(lines)
+
+    def _colored(self, numbers: Sequence[float], changes: Sequence[float],
+                 spec: str = ".2f", suffix: str = "", plus: bool = True) -> List[str]:
+        """Format numbers, colored by the sign of the matching change
+
+        Args:
+            numbers: Values to format
+            changes: Values deciding the color (NaN stays uncolored)
+            spec: Format spec for the numbers
+            suffix: Text appended to each number (e.g. "%")
+            plus: Prefix rising values with "+"
+        """
+        up = self.style['up'] + ('+' if plus else '')
+        down, reset = self.style['down'], self.style['reset']
+        return [
+            f"{up}{format(value, spec)}{suffix}{reset}" if change > 0
+            else f"{down}{format(value, spec)}{suffix}{reset}" if change < 0
+            else f"{format(value, spec)}{suffix}"
+            for value, change in zip(numbers, changes)
+        ]
+
+    def print_table(self, data: Dict[str, Any], headers: str = "keys"):
+        """Print formatted table with selected columns"""
+        if self.renderer == "pandas":
+            return self._print_table_pandas(data, headers)
+
+        rows = data if isinstance(data, list) else [data]
+        columns = _columns(rows)
+        cells = {}
+
+        # Color and format changes
+        if 'Change' in columns:
+            changes = _numbers(rows, 'Change')
+            if 'Value' in columns:
+                cells['Value'] = self._colored(_numbers(rows, 'Value'), changes, plus=False)
+            cells['Change'] = self._colored(changes, changes)
+            if '%Change' in columns:
+                cells['%Change'] = self._colored(_numbers(rows, '%Change'), changes)
+            for col in ['High', 'Low', 'Prev Close']:
+                if col in columns:
+                    cells[col] = [format(value, ".2f") for value in _values(rows, col)]
+
+        # Format large numbers for market summary
+        for col in ['Total Turnover', 'Total Traded Shares', 'Total Transactions',
+                    'Total Scripts Traded', 'Market Capitalization']:
+            if col in columns:
+                cells[col] = [f"{float(value):,.2f}" for value in _values(rows, col)]
+
+        print(self._render(
+            columns if headers == "keys" else headers,
+            _cells(rows, columns, cells)
+        ))
+
+    def print_stock_prices(self, data: List[Dict[str, Any]]):
+        """Format and display stock prices"""
+        if not data:
+            print("No price data available")
+            return
+        if self.renderer == "pandas":
+            return self._print_stock_prices_pandas(data)
+
+        columns = _columns(data)
+        changes = _numbers(data, 'change') if 'change' in columns else [0] * len(data)
+
+        # Format numbers, coloring changes by the sign of `change`
+        specs = {'Volume': ",.0f", 'Turnover': ",.2f", 'LTP': ".2f", 'High': ".2f",
+                 'Low': ".2f", 'Open': ".2f", 'Prev Close': ".2f"}
+        cells = {col: _fixed(_numbers(data, col), spec) for col, spec in specs.items() if col in columns}
+        if 'change' in columns:
+            cells['change'] = self._colored(changes, changes)
+        if '%change' in columns:
+            cells['%change'] = self._colored(_numbers(data, '%change'), changes, suffix="%")
+
+        print(self._render(
+            ['Symbol', 'LTP', 'change', '%change', 'Open', 'High', 'Low', 'Volume',
+             'Turnover', 'Prev Close'],
+            _cells(data, columns, cells)
+        ))
+
+    def print_market_depth(self, data: Dict[str, Any]):
+        """Format and display market depth data"""
+        for key, color, title, total, label in (
+                ('buyMarketDepthList', 'up', "Buy Orders", 'totalBuyQty', "Buy"),
+                ('sellMarketDepthList', 'down', "Sell Orders", 'totalSellQty', "Sell")):
+            orders = data.get(key, [])
+            columns = _columns(orders)
+            if not orders or not columns:
+                continue
+            print(self._render(
+                [f"{self.style[color]}{col}{self.style['reset']}" for col in columns],
+                _cells(orders, columns),
+                title=title
+            ))
+            print(f"\nTotal {label} Quantity: {data.get(total, 0):,}")
+
+    def print_top_list(self, data: List[Dict[str, Any]], list_type: str):
+        """Format and display top lists (gainers, losers, etc)"""
+        if not data:
+            print(f"No {list_type} data available")
+            return
+        if self.renderer == "pandas":
+            return self._print_top_list_pandas(data, list_type)
+
+        columns = _columns(data)
+        changes = _numbers(data, 'Change') if 'Change' in columns else [0] * len(data)
+
+        # Format numbers
+        specs = {'Volume': ",.0f", 'Turnover': ",.2f", 'LTP': ".2f", 'High': ".2f",
+                 'Low': ".2f", 'Open': ".2f", 'Trades': ",.0f"}
+        cells = {col: _fixed(_numbers(data, col), spec) for col, spec in specs.items() if col in columns}
+
+        # Color code gainers/losers by the list's type, other lists row by row
+        reset = self.style['reset']
+        colors = [self.style['up'] if list_type == "Gainers" or list_type != "Losers" and change > 0
+                  else self.style['down'] if list_type == "Losers" or change < 0 else ''
+                  for change in changes]
+        if 'Symbol' in columns:
+            cells['Symbol'] = [f"{color}{value}{reset if color else ''}"
+                               for value, color in zip(_values(data, 'Symbol'), colors)]
+        for col, suffix in (('Change', ''), ('%Change', '%')):
+            if col in columns:
+                cells[col] = [f"{color}{'+' if change > 0 else ''}{value:.2f}{suffix}{reset if color else ''}"
+                              for value, change, color in zip(_numbers(data, col), changes, colors)]
+
+        print(self._render(
+            ['Symbol', 'LTP', 'Change', '%Change', 'Open', 'High', 'Low', 'Volume', 'Turnover', 'Trades'],
+            _cells(data, columns, cells),
+            title=list_type
+        ))
+
+    def save_floorsheet(self, data: List[Dict[str, Any]], path, fmt: str = "csv"):
+        """Save floorsheet data to CSV or the columnar format
+
+        Args:
+            data: Floorsheet rows
+            path: Output directory
+            fmt: "csv" or "columnar" (memory-mappable, see nepsense.floorsheet)
+        """
+        if not data:
+            print("No floorsheet data available")
+            return
+
+        date = datetime.now()
+        weekday = calendar.day_name[date.weekday()]
+        name = f"floorsheet_{date.date()}_{weekday}"
+
+        if fmt == "columnar":
+            from .floorsheet import save_columnar
+            target = save_columnar(data, path / name, date=str(date.date()))
+            print(f"Floorsheet saved to {target}")
+            return
+
+        df = pd.DataFrame(data)
+        filename = f"{name}.csv"
+        df.to_csv(path / filename, index=False)
+        print(f"Floorsheet saved to {path / filename}")
+
+    def print_company_details(self, data: Union[Dict[str, Any], List[Dict[str, Any]]]):
+        """Format and display detailed company information"""
+        if not data:
+            print("No company details available")
+            return
+
+        # Convert single company to list
+        companies = data if isinstance(data, list) else [data]
+
+        # Extract info for each company
+        company_info = []
+        for company in companies:
+            security = company.get('security', {})
+            company_data = security.get('companyId', {})
+            sector = company_data.get('sectorMaster', {})
 
-    def _format_table(self, df: pd.DataFrame, 
+            # Get trading info
+            trade = company.get('securityDailyTradeDto', {})
+            ltp = trade.get('lastTradedPrice', 0)
+            prev_close = trade.get('previousClose', 0)
+            change = ltp - prev_close if ltp and prev_close else 0
+            pct_change = (change / prev_close * 100) if prev_close else 0
+
+            # Color formatting
+            color = self.style['up'] if change > 0 else self.style['down'] if change < 0 else ''
+            reset = self.style['reset'] if color else ''
+
+            company_info.append({
+                'Symbol': security.get('symbol', ''),
+                'Name': company_data.get('companyName', ''),
+                'Sector': sector.get('sectorDescription', ''),
+                'LTP': f"{color}{ltp:,.2f}{reset}",
+                'Change': f"{color}{change:+.2f}{reset}",
+                '%Change': f"{color}{pct_change:+.2f}%{reset}",
+                'Market Cap': f"{company.get('marketCapitalization', 0):,.0f}",
+                'Listed Shares': f"{company.get('stockListedShares', 0):,.0f}",
+                'Public %': f"{company.get('publicPercentage', 0):,.2f}%",
+                'Promoter %': f"{company.get('promoterPercentage', 0):,.2f}%"
+            })
+
+        columns = _columns(company_info)
+        print(self._render(
+            columns,
+            _cells(company_info, columns),
+            title="Company Information"
+        ))
+
+    def print_sector_summary(self, data: List[Dict[str, Any]]):
+        """Format and display sector-wise market summary"""
+        if not data:
+            print("No sector data available")
+            return
+        if self.renderer == "pandas":
+            return self._print_sector_summary_pandas(data)
+
+        columns = _columns(data)
+        changes = _numbers(data, 'Change') if 'Change' in columns else [0] * len(data)
+
+        # Format numbers, coloring changes by the sign of `Change`
+        cells = {}
+        if 'Value' in columns:
+            cells['Value'] = _fixed(_numbers(data, 'Value'), ",.2f")
+        if 'Change' in columns:
+            cells['Change'] = self._colored(changes, changes)
+        if '%Change' in columns:
+            cells['%Change'] = self._colored(_numbers(data, '%Change'), changes, suffix="%")
+
+        print(self._render(
+            ['Sector', 'Value', 'Change', '%Change'],
+            _cells(data, columns, cells),
+            title="Sector Summary"
+        ))
+
+    def print_broker_flow(self, data: List[Dict[str, Any]], title: str = "Broker Flow"):
+        """Format and display broker buy/sell flows"""
+        if not data:
+            print("No floorsheet data available")
+            return
+
+        columns = _columns(data)
+        cells = {}
+
+        # Format numbers
+        for col in columns:
+            if col.endswith('Amount') or col == 'Turnover':
+                cells[col] = [f"{value:,.2f}" for value in _values(data, col)]
+            elif col.endswith('Qty'):
+                cells[col] = [f"{value:,.0f}" for value in _values(data, col)]
+            elif col.endswith('%'):
+                cells[col] = [f"{value:.2f}%" for value in _values(data, col)]
+
+        # Color code net flows
+        if 'Net Amount' in columns:
+            up, down, reset = self.style['up'], self.style['down'], self.style['reset']
+            cells['Net Amount'] = [
+                f"{up}+{cell}{reset}" if net > 0 else f"{down}{cell}{reset}" if net < 0 else cell
+                for cell, net in zip(cells['Net Amount'], _values(data, 'Net Amount'))
+            ]
+
+        print(self._render(
+            columns,
+            _cells(data, columns, cells),
+            title=title
+        ))
+
+    def print_floorsheet(self, data: List[Dict[str, Any]], limit: int = None):
+        """Format and display floorsheet trades
+
+        Args:
+            data: Trade rows
+            limit: Only show the first `limit` rows (totals cover all rows)
+        """
+        if not data:
+            print("No matching trades")
+            return
+
+        rows = data[:limit] if limit else data
+        columns = _columns(rows)
+
+        # Format numbers
+        specs = {'Quantity': ",.0f", 'Rate': ",.2f", 'Amount': ",.2f"}
+        print(self._render(
+            columns,
+            _cells(rows, columns, {col: [format(value, spec) for value in _values(rows, col)]
+                                   for col, spec in specs.items() if col in columns}),
+            title="Floorsheet"
+        ))
+
+        total = sum(row.get('Amount', 0) for row in data)
+        shown = f" (showing {len(rows)})" if len(rows) < len(data) else ""
+        print(f"\nTrades: {len(data):,}{shown}  Total Amount: {total:,.2f}")
+
+    def print_history(self, data: List[Dict[str, Any]], symbol: str):
+        """Format and display a symbol's daily OHLCV history"""
+        if not data:
+            print(f"No history stored for {symbol}")
+            return
+
+        columns = _columns(data)
+        changes = _numbers(data, 'Change')
+        specs = {'Open': ",.2f", 'High': ",.2f", 'Low': ",.2f", 'Close': ",.2f",
+                 'Volume': ",.0f", 'Turnover': ",.2f"}
+        cells = {col: _fixed(_numbers(data, col), spec) for col, spec in specs.items() if col in columns}
+        cells['Change'] = self._colored(changes, changes)
+        cells['%Change'] = self._colored(_numbers(data, '%Change'), changes, suffix="%")
+
+        print(self._render(
+            columns,
+            _cells(data, columns, cells),
+            title=f"{symbol} History"
+        ))
+
+    def print_companies(self, data: List[Dict[str, Any]], query: str):
+        """Format and display company lookup results"""
+        if not data:
+            print(f"No listed company matches {query!r}")
+            return
+
+        columns = _columns(data)
+        print(self._render(
+            columns,
+            _cells(data, columns),
+            title=f"Companies matching {query!r}"
+        ))
+
+    def print_portfolio(self, valuation: Dict[str, Any]):
+        """Format and display a portfolio valuation (see Portfolio.value)"""
+        positions = valuation.get('positions') or []
+        if not positions:
+            print("No priced holdings to value")
+            return
+
+        for rows, title in ((positions, "Portfolio"), (valuation['sectors'], "Sector Weights")):
+            columns = _columns(rows)
+            changes = _numbers(rows, 'Day Change')
+            pnl = _numbers(rows, 'Unrealized P&L')
+            cells = {col: _fixed(_numbers(rows, col), ",.0f" if col in ('Quantity', 'Positions') else ",.2f")
+                     for col in columns if col not in ('Symbol', 'Sector')}
+            cells['Day Change'] = self._colored(changes, changes, spec=",.2f")
+            if 'Day %Change' in columns:
+                cells['Day %Change'] = self._colored(_numbers(rows, 'Day %Change'), changes, suffix="%")
+            for col in ('Unrealized P&L', 'P&L %'):
+                if col in columns:
+                    cells[col] = [cell if value == value else '' for cell, value in zip(
+                        self._colored(_numbers(rows, col), pnl, *(".2f", "%") if col == 'P&L %' else (",.2f",)),
+                        pnl)]
+            print(self._render(columns, _cells(rows, columns, cells), title=title))
+
+        total = valuation['total']
+        parts = [f"Market value {total['Market Value']:,.2f}",
+                 f"day change {total['Day Change']:+,.2f}"
+                 + (f" ({total['Day %Change']:+.2f}%)" if total['Day %Change'] is not None else "")]
+        if total['Unrealized P&L'] is not None:
+            parts.append(f"unrealized P&L {total['Unrealized P&L']:+,.2f}"
+                         + (f" ({total['P&L %']:+.2f}%)" if total['P&L %'] is not None else ""))
+        print(f"\n{total['Positions']} positions: {', '.join(parts)}")
+
+    def print_screen(self, data: List[Dict[str, Any]], expr: str = ''):
+        """Format and display the symbols matching a screen"""
+        if not data:
+            print(f"No symbols match {expr!r}" if expr else "No market data available")
+            return
+
+        columns = _columns(data)
+        changes = _numbers(data, 'Change')
+        cells = {col: _fixed(_numbers(data, col), ",.0f" if col == 'Volume' else ",.2f")
+                 for col in columns if col not in ('Symbol', 'Sector', 'Change', '%Change')}
+        cells['Change'] = self._colored(changes, changes)
+        cells['%Change'] = self._colored(_numbers(data, '%Change'), changes, suffix="%")
+
+        print(self._render(
+            columns,
+            _cells(data, columns, cells),
+            title=f"Screen: {expr} ({len(data)} symbol{'s' if len(data) != 1 else ''})" if expr else None
+        ))
+
+    def print_indicators(self, data: List[Dict[str, Any]]):
+        """Format and display the latest technical indicators per symbol"""
+        if not data:
+            print("No history stored to compute indicators from")
+            return
+
+        columns = _columns(data)
+        cells = {col: _fixed(_numbers(data, col), ".1f" if col.startswith('RSI') else ",.2f")
+                 for col in columns if col not in ('Symbol', 'Date', 'MACD Hist')}
+        if 'MACD Hist' in columns:
+            hist = _numbers(data, 'MACD Hist')
+            cells['MACD Hist'] = [cell if value == value else ''
+                                  for cell, value in zip(self._colored(hist, hist), hist)]
+
+        print(self._render(
+            columns,
+            _cells(data, columns, cells),
+            title=f"Indicators as of {data[0]['Date']}"
+        ))
+
+    def print_depth_scan(self, data: List[Dict[str, Any]], levels: int, rank_by: str = 'imbalance'):
+        """Format and display order book metrics ranked across symbols"""
+        if not data:
+            print("No market depth available")
+            return
+
+        columns = _columns(data)
+        imbalance = _numbers(data, 'Imbalance')
+        cells = {col: _fixed(_numbers(data, col), ",.0f" if col.endswith(('Qty', 'Depth')) else ",.2f")
+                 for col in columns if col not in ('Symbol', 'Imbalance')}
+        cells['Imbalance'] = [cell if value == value else '' for cell, value in
+                              zip(self._colored(imbalance, imbalance, spec=".3f"), imbalance)]
+
+        print(self._render(
+            columns,
+            _cells(data, columns, cells),
+            title=f"Market Depth by {rank_by} (depth over {levels} level{'s' if levels != 1 else ''})"
+        ))
+
+    def print_ticks(self, data: List[Dict[str, Any]], symbol: str, session: str):
+        """Format and display a symbol's recorded intraday series"""
+        if not data:
+            print(f"No ticks recorded for {symbol} on {session}")
+            return
+
+        columns = _columns(data)
+        prices = _numbers(data, 'LTP') if 'LTP' in columns else [_NAN] * len(data)
+        moves = [_NAN] + [now - before for before, now in zip(prices, prices[1:])]
+        cells = {col: _fixed(_numbers(data, col), ",.0f" if col in ('Volume', 'Trades', 'Bid Qty', 'Ask Qty')
+                             else ",.2f")
+                 for col in columns if col != 'Time'}
+        if 'LTP' in columns:
+            # Color each price by its move since the previous change
+            cells['LTP'] = [cell if value == value else '' for cell, value in
+                            zip(self._colored(prices, moves, spec=",.2f", plus=False), prices)]
+
+        print(self._render(
+            columns,
+            _cells(data, columns, cells),
+            title=f"{symbol} ticks on {session} ({len(data)} change{'s' if len(data) != 1 else ''})"
+        ))
+
+    # DataFrame + tabulate renderer (renderer="pandas")
+
+    def _format_table(self, df: 'pd.DataFrame',
                      headers: Union[str, Dict[str, str]] = "keys",
                      transpose: bool = False,
                      title: str = None,
                      **kwargs) -> str:
         """Helper method to standardize table formatting
-        
+
         Args:
             df: DataFrame to format
             headers: Column headers (string or dict mapping)
@@ -62,20 +638,20 @@ class TableFormatter:
             'numalign': "right",
             'stralign': "left"
         }
-        
+
         # Override defaults with provided kwargs
         opts = {**default_opts, **kwargs}
-        
+
         # Handle transposition
         data = df.T if transpose else df
-        
+
         # Print title if provided
         if title:
             print(f"\n{self.style['neutral']}{title}{self.style['reset']}")
-            
-        return tabulate(data, headers=headers, **opts)
 
-    def print_table(self, data: Dict[str, Any], headers: str = "keys"):
+        return tabulate.tabulate(data, headers=headers, **opts)
+
+    def _print_table_pandas(self, data: Dict[str, Any], headers: str = "keys"):
         """Print formatted table with selected columns"""
         if isinstance(data, list):
             df = pd.DataFrame(data)
@@ -103,7 +679,7 @@ class TableFormatter:
 
         print(self._format_table(df, headers=headers))
 
-    def _format_numeric_columns(self, df: pd.DataFrame, changes: pd.Series = None):
+    def _format_numeric_columns(self, df: 'pd.DataFrame', changes: 'pd.Series' = None):
         """Helper method to format numeric columns with colors"""
         if changes is None:
             changes = pd.Series([0] * len(df))  # Default to no change if not provided
@@ -135,7 +711,7 @@ class TableFormatter:
             if col in df.columns:
                 df[col] = df[col].apply(lambda x: f"{x:.2f}")
 
-    def print_stock_prices(self, data: List[Dict[str, Any]]):
+    def _print_stock_prices_pandas(self, data: List[Dict[str, Any]]):
         """Format and display stock prices"""
         if not data:
             print("No price data available")
@@ -193,24 +769,7 @@ class TableFormatter:
             }
         ))
 
-    def print_market_depth(self, data: Dict[str, Any]):
-        """Format and display market depth data"""
-        buy_df = pd.DataFrame(data.get('buyMarketDepthList', []))
-        sell_df = pd.DataFrame(data.get('sellMarketDepthList', []))
-        
-        if not buy_df.empty:
-            buy_df.columns = [f"{self.style['up']}{col}{self.style['reset']}" 
-                            for col in buy_df.columns]
-            print(self._format_table(buy_df, title="Buy Orders"))
-            print(f"\nTotal Buy Quantity: {data.get('totalBuyQty', 0):,}")
-        
-        if not sell_df.empty:
-            sell_df.columns = [f"{self.style['down']}{col}{self.style['reset']}" 
-                             for col in sell_df.columns]
-            print(self._format_table(sell_df, title="Sell Orders"))
-            print(f"\nTotal Sell Quantity: {data.get('totalSellQty', 0):,}")
-
-    def print_top_list(self, data: List[Dict[str, Any]], list_type: str):
+    def _print_top_list_pandas(self, data: List[Dict[str, Any]], list_type: str):
         """Format and display top lists (gainers, losers, etc)"""
         if not data:
             print(f"No {list_type} data available")
@@ -219,7 +778,7 @@ class TableFormatter:
         df = pd.DataFrame(data)
         
         # Convert numeric columns first
-        numeric_cols = ['LTP', 'Change', '%Change', 'Open', 'High', 'Low', 'Volume', 'Turnover']
+        numeric_cols = ['LTP', 'Change', '%Change', 'Open', 'High', 'Low', 'Volume', 'Turnover', 'Trades']
         for col in numeric_cols:
             if col in df.columns:
                 df[col] = pd.to_numeric(df[col], errors='coerce')
@@ -232,22 +791,30 @@ class TableFormatter:
             df['Volume'] = df['Volume'].apply(lambda x: f"{x:,.0f}" if pd.notnull(x) else '')
         if 'Turnover' in df.columns:
             df['Turnover'] = df['Turnover'].apply(lambda x: f"{x:,.2f}" if pd.notnull(x) else '')
+        if 'Trades' in df.columns:
+            df['Trades'] = df['Trades'].apply(lambda x: f"{x:,.0f}" if pd.notnull(x) else '')
         for col in ['LTP', 'High', 'Low', 'Open']:
             if col in df.columns:
                 df[col] = df[col].apply(lambda x: f"{x:.2f}" if pd.notnull(x) else '')
         
-        # Color code changes
-        color = self.style['up'] if list_type == "Gainers" else self.style['down']
-        df['Symbol'] = df['Symbol'].apply(lambda x: f"{color}{x}{self.style['reset']}")
+        # Color code gainers/losers by the list's type, other lists row by row
+        colors = changes.apply(
+            lambda c: self.style['up'] if list_type == "Gainers" or list_type != "Losers" and c > 0
+            else self.style['down'] if list_type == "Losers" or c < 0 else ''
+        )
+        resets = colors.apply(lambda color: self.style['reset'] if color else '')
+        df['Symbol'] = [f"{color}{x}{reset}" for x, color, reset in zip(df['Symbol'], colors, resets)]
         
         if 'Change' in df.columns:
             df['Change'] = df.apply(
-                lambda x, c=changes: f"{color}{'+' if c[x.name] > 0 else ''}{x['Change']:.2f}{self.style['reset']}", 
+                lambda x, c=changes: (f"{colors[x.name]}{'+' if c[x.name] > 0 else ''}"
+                                      f"{x['Change']:.2f}{resets[x.name]}"),
                 axis=1
             )
         if '%Change' in df.columns:
             df['%Change'] = df.apply(
-                lambda x, c=changes: f"{color}{'+' if c[x.name] > 0 else ''}{x['%Change']:.2f}%{self.style['reset']}", 
+                lambda x, c=changes: (f"{colors[x.name]}{'+' if c[x.name] > 0 else ''}"
+                                      f"{x['%Change']:.2f}%{resets[x.name]}"),
                 axis=1
             )
         
@@ -262,83 +829,13 @@ class TableFormatter:
                 'High': 'High',
                 'Low': 'Low',
                 'Volume': 'Volume',
-                'Turnover': 'Turnover'
+                'Turnover': 'Turnover',
+                'Trades': 'Trades'
             },
             title=list_type
         ))
 
-    def save_floorsheet(self, data: List[Dict[str, Any]], path):
-        """Save floorsheet data to CSV"""
-        if not data:
-            print("No floorsheet data available")
-            return
-            
-        df = pd.DataFrame(data)
-        date = datetime.now()
-        weekday = calendar.day_name[date.weekday()]
-        filename = f"floorsheet_{date.date()}_{weekday}.csv"
-        
-        df.to_csv(path / filename, index=False)
-        print(f"Floorsheet saved to {path / filename}")
-
-    def print_company_details(self, data: Union[Dict[str, Any], List[Dict[str, Any]]]):
-        """Format and display detailed company information"""
-        if not data:
-            print("No company details available")
-            return
-        
-        # Convert single company to list
-        companies = data if isinstance(data, list) else [data]
-        
-        # Extract info for each company
-        company_info = []
-        for company in companies:
-            security = company.get('security', {})
-            company_data = security.get('companyId', {})
-            sector = company_data.get('sectorMaster', {})
-            
-            # Get trading info
-            trade = company.get('securityDailyTradeDto', {})
-            ltp = trade.get('lastTradedPrice', 0)
-            prev_close = trade.get('previousClose', 0)
-            change = ltp - prev_close if ltp and prev_close else 0
-            pct_change = (change / prev_close * 100) if prev_close else 0
-            
-            # Color formatting
-            color = self.style['up'] if change > 0 else self.style['down'] if change < 0 else ''
-            reset = self.style['reset'] if color else ''
-            
-            company_info.append({
-                'Symbol': security.get('symbol', ''),
-                'Name': company_data.get('companyName', ''),
-                'Sector': sector.get('sectorDescription', ''),
-                'LTP': f"{color}{ltp:,.2f}{reset}",
-                'Change': f"{color}{change:+.2f}{reset}",
-                '%Change': f"{color}{pct_change:+.2f}%{reset}",
-                'Market Cap': f"{company.get('marketCapitalization', 0):,.0f}",
-                'Listed Shares': f"{company.get('stockListedShares', 0):,.0f}",
-                'Public %': f"{company.get('publicPercentage', 0):,.2f}%",
-                'Promoter %': f"{company.get('promoterPercentage', 0):,.2f}%"
-            })
-        
-        print(self._format_table(
-            pd.DataFrame(company_info),
-            headers={
-                'Symbol': 'Symbol',
-                'Name': 'Name',
-                'Sector': 'Sector',
-                'LTP': 'LTP',
-                'Change': 'Change',
-                '%Change': '%Change',
-                'Market Cap': 'Market Cap',
-                'Listed Shares': 'Listed Shares',
-                'Public %': 'Public %',
-                'Promoter %': 'Promoter %'
-            },
-            title="Company Information"
-        ))
-
-    def print_sector_summary(self, data: List[Dict[str, Any]]):
+    def _print_sector_summary_pandas(self, data: List[Dict[str, Any]]):
         """Format and display sector-wise market summary"""
         if not data:
             print("No sector data available")
@@ -384,4 +881,4 @@ class TableFormatter:
                 '%Change': '%Change'
             },
             title="Sector Summary"
-        )) 
\ No newline at end of file
+        ))
@@ -0,0 +1,266 @@
+"""
+Local OHLCV history for NEPSE symbols
+
+NEPSE only serves the current session, so every run that fetches prices
+can append them to a local store (``priceof SYMBOL --save-history``).
+Each symbol has its own file of fixed-size records kept in date order,
+so any date range of a symbol, even years of it, comes from one
+sequential read followed by a binary search on the dates.
+
+Layout of a history directory:
+    meta.json        format version and record fields
+    <SYMBOL>.ohlcv   packed RECORD entries in ascending date order
+
+Classes:
+    HistoryStore: Per-symbol OHLCV files with append, range reads and
+        aligned multi-symbol panels
+
+Functions:
+    user_data_dir: Platform specific data directory for nepsense
+"""
+
+import json
+import os
+import re
+import sys
+from datetime import date as Date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+FORMAT_VERSION = 1
+SUFFIX = '.ohlcv'
+
+# One session of one symbol; date is days since 1970-01-01
+RECORD = np.dtype([
+    ('date', '<i4'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('prev_close', '<f8'),
+    ('volume', '<i8'),
+    ('turnover', '<f8'),
+])
+
+# Record field -> key in NepseClient.get_stock_prices rows
+PRICE_FIELDS = {
+    'open': 'Open',
+    'high': 'High',
+    'low': 'Low',
+    'close': 'LTP',
+    'prev_close': 'Prev Close',
+    'volume': 'Volume',
+    'turnover': 'Turnover',
+}
+
+_SYMBOL_PATTERN = re.compile(r'[A-Z0-9][A-Z0-9._-]*')
+
+def user_data_dir() -> Path:
+    """Return the directory nepsense uses for data worth keeping"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or Path.home() / 'AppData' / 'Local'
+    elif sys.platform == 'darwin':
+        base = Path.home() / 'Library' / 'Application Support'
+    else:
+        base = os.environ.get('XDG_DATA_HOME') or Path.home() / '.local' / 'share'
+    return Path(base) / 'nepsense'
+
+def _day(value: Union[str, Date]) -> int:
+    """Days since the epoch for a date or YYYY-MM-DD string"""
+    if isinstance(value, str):
+        value = Date.fromisoformat(value)
+    return (value - Date(1970, 1, 1)).days
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+class HistoryStore:
+    """Daily OHLCV records, one append-only file per symbol
+
+    Appending a session that is already stored replaces it (so intraday
+    runs are superseded by the last run of the day); appending an older
+    session than the last one stored rewrites the file in date order.
+
+    Attributes:
+        root: Directory holding the .ohlcv files
+    """
+
+    def __init__(self, root: Optional[Union[str, Path]] = None):
+        self.root = Path(root) if root else user_data_dir() / 'history'
+        meta = self.root / 'meta.json'
+        if meta.exists():
+            with open(meta, encoding='utf-8') as f:
+                version = json.load(f).get('version')
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported history format {version} in {self.root}")
+
+    def _path(self, symbol: str) -> Path:
+        symbol = symbol.upper()
+        if not _SYMBOL_PATTERN.fullmatch(symbol):
+            raise ValueError(f"Invalid symbol: {symbol!r}")
+        return self.root / f"{symbol}{SUFFIX}"
+
+    def symbols(self) -> List[str]:
+        """Symbols with stored history"""
+        if not self.root.is_dir():
+            return []
+        return sorted(path.stem for path in self.root.glob(f"*{SUFFIX}"))
+
+    def append(self, day: Union[str, Date], rows: Iterable[Dict[str, Any]]) -> int:
+        """Store one session's price rows
+
+        Args:
+            day: Trading date of the rows (see cache.session_date)
+            rows: Rows as returned by NepseClient.get_stock_prices;
+                error rows and symbols without a price are skipped
+
+        Returns:
+            Number of symbols stored
+        """
+        stored = 0
+        for row in rows:
+            if 'error' in row or not _number(row.get('LTP')):
+                continue
+            record = np.zeros(1, dtype=RECORD)
+            record['date'] = _day(day)
+            for field, key in PRICE_FIELDS.items():
+                record[field] = _number(row.get(key))
+            self._write(row['Symbol'], record)
+            stored += 1
+        return stored
+
+    def _write(self, symbol: str, record: np.ndarray):
+        path = self._path(symbol)
+        if not path.exists():
+            self.root.mkdir(parents=True, exist_ok=True)
+            meta = self.root / 'meta.json'
+            if not meta.exists():
+                with open(meta, 'w', encoding='utf-8') as f:
+                    json.dump({'version': FORMAT_VERSION, 'fields': RECORD.names}, f)
+            with open(path, 'wb') as f:
+                f.write(record.tobytes())
+            return
+
+        size = path.stat().st_size
+        size -= size % RECORD.itemsize  # Drop a torn last write
+        with open(path, 'r+b') as f:
+            if size:
+                f.seek(size - RECORD.itemsize)
+                last = np.frombuffer(f.read(RECORD.itemsize), dtype=RECORD)[0]
+                if record['date'][0] == last['date']:
+                    size -= RECORD.itemsize  # Replace the stored session
+                elif record['date'][0] < last['date']:
+                    size = None
+            if size is not None:
+                f.seek(size)
+                f.write(record.tobytes())
+                f.truncate()
+                return
+        self._rewrite(path, record)
+
+    def _rewrite(self, path: Path, record: np.ndarray):
+        """Insert (or replace) an older session, keeping the file in date order"""
+        data = np.fromfile(path, dtype=RECORD, count=path.stat().st_size // RECORD.itemsize)
+        data = data[data['date'] != record['date'][0]]
+        position = np.searchsorted(data['date'], record['date'][0])
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        np.concatenate([data[:position], record, data[position:]]).tofile(tmp)
+        os.replace(tmp, path)
+
+    def read(self, symbol: str, start: Optional[Union[str, Date]] = None,
+             end: Optional[Union[str, Date]] = None) -> np.ndarray:
+        """Records of a symbol between start and end (inclusive)
+
+        Returns:
+            Structured array with RECORD fields (empty if nothing is stored)
+        """
+        path = self._path(symbol)
+        if not path.exists():
+            return np.zeros(0, dtype=RECORD)
+        count = path.stat().st_size // RECORD.itemsize
+        data = np.fromfile(path, dtype=RECORD, count=count)
+        lo = np.searchsorted(data['date'], _day(start), 'left') if start else 0
+        hi = np.searchsorted(data['date'], _day(end), 'right') if end else len(data)
+        return data[lo:hi]
+
+    def last_date(self, symbol: str) -> Optional[str]:
+        """Date of the latest session stored for a symbol"""
+        path = self._path(symbol)
+        size = path.stat().st_size if path.exists() else 0
+        size -= size % RECORD.itemsize
+        if not size:
+            return None
+        with open(path, 'rb') as f:
+            f.seek(size - RECORD.itemsize)
+            day = np.frombuffer(f.read(RECORD.itemsize), dtype=RECORD)['date']
+        return str(day.astype('datetime64[D]')[0])
+
+    def panel(self, symbols: Optional[List[str]] = None, start: Optional[Union[str, Date]] = None,
+              end: Optional[Union[str, Date]] = None) -> Dict[str, np.ndarray]:
+        """Align several symbols on one calendar as (symbols, days) arrays
+
+        Days are the union of the stored dates. Before a symbol's first
+        session its values are NaN; on a later day it has no record for,
+        prices carry the last close forward with zero volume and turnover.
+
+        Args:
+            symbols: Symbols to load (default: every stored symbol)
+
+        Returns:
+            Dict with 'symbols', 'dates' (YYYY-MM-DD strings) and one
+            float array per RECORD price field
+        """
+        symbols = [s.upper() for s in symbols] if symbols is not None else self.symbols()
+        records = [self.read(symbol, start, end) for symbol in symbols]
+        days = np.unique(np.concatenate([r['date'] for r in records])) if records else np.zeros(0, 'i4')
+        fields = [name for name in RECORD.names if name != 'date']
+        panel = {name: np.full((len(symbols), len(days)), np.nan) for name in fields}
+        for i, data in enumerate(records):
+            if not len(data):
+                continue
+            columns = np.searchsorted(days, data['date'])
+            # Index of the latest record at or before each day (-1 before the first)
+            latest = np.searchsorted(data['date'], days, 'right') - 1
+            listed = latest >= 0
+            traded = np.zeros(len(days), dtype=bool)
+            traded[columns] = True
+            for name in fields:
+                row = panel[name][i]
+                if name in ('volume', 'turnover'):
+                    row[listed] = 0.0
+                    row[columns] = data[name]
+                elif name == 'prev_close':
+                    row[listed] = data['close'][latest[listed]]
+                    row[columns] = data[name]
+                else:
+                    # open/high/low/close of a day without trades equal the last close
+                    row[listed & ~traded] = data['close'][latest[listed & ~traded]]
+                    row[columns] = data[name]
+        panel['symbols'] = np.array(symbols)
+        panel['dates'] = days.astype('datetime64[D]').astype(str)
+        return panel
+
+    def rows(self, symbol: str, start: Optional[Union[str, Date]] = None,
+             end: Optional[Union[str, Date]] = None) -> List[Dict[str, Any]]:
+        """Records of a symbol as Date/Open/High/Low/Close/... rows for display"""
+        data = self.read(symbol, start, end)
+        dates = data['date'].astype('datetime64[D]').astype(str)
+        change = data['close'] - data['prev_close']
+        percent = np.divide(change * 100, data['prev_close'],
+                            out=np.zeros(len(data)), where=data['prev_close'] != 0)
+        return [{
+            'Date': str(dates[i]),
+            'Open': float(data['open'][i]),
+            'High': float(data['high'][i]),
+            'Low': float(data['low'][i]),
+            'Close': float(data['close'][i]),
+            'Change': float(change[i]),
+            '%Change': float(percent[i]),
+            'Volume': int(data['volume'][i]),
+            'Turnover': float(data['turnover'][i]),
+        } for i in range(len(data))]
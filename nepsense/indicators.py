@@ -0,0 +1,384 @@
+"""
+Technical indicators for a whole universe of symbols at once
+
+Price series are 2-D arrays of shape (symbols, days) as returned by
+HistoryStore.panel(), so every indicator is computed for all symbols in
+one pass of NumPy operations instead of a pandas loop per symbol. A
+symbol's series may start with NaN (not listed yet); such windows yield
+NaN until enough sessions exist. 1-D input is treated as one symbol.
+
+IndicatorEngine keeps just enough state (the last window of prices and
+the last EMA/RSI averages) to add one new session for every symbol in
+O(symbols) time, and can be saved next to the history store so nightly
+runs never recompute years of history.
+
+Classes:
+    IndicatorEngine: Universe-wide indicators with incremental update
+
+Functions:
+    sma: Simple moving average
+    ema: Exponential moving average
+    rsi: Relative strength index (Wilder smoothing)
+    macd: MACD line, signal line and histogram
+    bollinger: Bollinger bands
+    vwap: Rolling volume-weighted average price
+    load_engine: Engine over a history store, refitted only when stale
+    record_session: Incrementally add a stored session to the saved state
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .history import HistoryStore, _number
+
+STATE_FILE = 'indicators.npz'
+
+def _as_2d(values: np.ndarray) -> Tuple[np.ndarray, bool]:
+    values = np.asarray(values, dtype=np.float64)
+    return (values[np.newaxis], True) if values.ndim == 1 else (values, False)
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum over the trailing window; NaN unless all window values are present"""
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=1)
+    counts = np.cumsum(valid, axis=1)
+    sums[:, window:] = sums[:, window:] - sums[:, :-window]
+    counts[:, window:] = counts[:, window:] - counts[:, :-window]
+    sums[counts < window] = np.nan
+    return sums
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average over the trailing window sessions"""
+    values, flat = _as_2d(values)
+    result = _rolling_sum(values, window) / window
+    return result[0] if flat else result
+
+def _ema_step(previous: np.ndarray, values: np.ndarray, alpha: float) -> np.ndarray:
+    """Next EMA value, seeded with the first value of each series"""
+    return np.where(np.isnan(previous), values, previous + alpha * (values - previous))
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """Exponential moving average with alpha = 2 / (span + 1)
+
+    Seeded with each symbol's first value (like pandas ewm(adjust=False)).
+    """
+    values, flat = _as_2d(values)
+    alpha = 2.0 / (span + 1)
+    result = np.empty_like(values)
+    current = np.full(values.shape[0], np.nan)
+    for day in range(values.shape[1]):
+        current = _ema_step(current, values[:, day], alpha)
+        result[:, day] = current
+    return result[0] if flat else result
+
+def _wilder_step(state: Dict[str, np.ndarray], close: np.ndarray, period: int) -> np.ndarray:
+    """Advance RSI state by one session and return the RSI values
+
+    Averages are plain means of the changes until `period` changes have
+    been seen, then smoothed with Wilder's alpha = 1 / period.
+    """
+    change = close - state['last']
+    seen = ~np.isnan(change)
+    gain, loss = np.where(change > 0, change, 0.0), np.where(change < 0, -change, 0.0)
+    count = state['count']
+    weight = np.where(count < period, count, period - 1).astype(np.float64)
+    for key, value in (('gain', gain), ('loss', loss)):
+        averaged = (state[key] * weight + value) / (weight + 1)
+        state[key] = np.where(seen, averaged, state[key])
+    state['count'] = count + seen
+    state['last'] = np.where(np.isnan(close), state['last'], close)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = 100 - 100 / (1 + state['gain'] / state['loss'])
+    result = np.where(state['loss'] == 0, np.where(state['gain'] > 0, 100.0, 50.0), result)
+    return np.where(state['count'] >= period, result, np.nan)
+
+def _wilder_state(symbols: int) -> Dict[str, np.ndarray]:
+    return {'last': np.full(symbols, np.nan), 'gain': np.zeros(symbols), 'loss': np.zeros(symbols),
+            'count': np.zeros(symbols, dtype=np.int64)}
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Relative strength index with Wilder smoothing"""
+    close, flat = _as_2d(close)
+    state = _wilder_state(close.shape[0])
+    result = np.empty_like(close)
+    for day in range(close.shape[1]):
+        result[:, day] = _wilder_step(state, close[:, day], period)
+    return result[0] if flat else result
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26,
+         signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line (fast EMA - slow EMA), its signal EMA and the histogram"""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+def bollinger(close: np.ndarray, window: int = 20,
+              width: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Middle (SMA), upper and lower Bollinger bands
+
+    Bands are width population standard deviations from the middle.
+    """
+    close, flat = _as_2d(close)
+    middle = _rolling_sum(close, window) / window
+    deviation = np.full_like(close, np.nan)
+    if close.shape[1] >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(close, window, axis=1)
+        deviation[:, window - 1:] = windows.std(axis=-1)
+    bands = (middle, middle + width * deviation, middle - width * deviation)
+    return tuple(band[0] for band in bands) if flat else bands
+
+def vwap(turnover: np.ndarray, volume: np.ndarray, window: int = 20) -> np.ndarray:
+    """Volume-weighted average price over the trailing window sessions"""
+    turnover, flat = _as_2d(turnover)
+    volume, _ = _as_2d(volume)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = _rolling_sum(turnover, window) / _rolling_sum(volume, window)
+    result[~np.isfinite(result)] = np.nan
+    return result[0] if flat else result
+
+_LABELS = {'macd': 'MACD', 'macd_signal': 'MACD Signal', 'macd_hist': 'MACD Hist',
+           'bb_middle': 'BB Middle', 'bb_upper': 'BB Upper', 'bb_lower': 'BB Lower'}
+
+def _label(name: str) -> str:
+    """Display label of an indicator key (sma_20 -> SMA20)"""
+    return _LABELS.get(name) or name.replace('_', '').upper()
+
+class IndicatorEngine:
+    """SMA, EMA, RSI, MACD, Bollinger and VWAP for a fixed list of symbols
+
+    fit() computes full series from a (symbols, days) panel; update()
+    then appends one session for every symbol at O(symbols) cost. Both
+    produce the same values. A symbol missing from a session (NaN close)
+    keeps its last close with zero volume, as in HistoryStore.panel().
+
+    Attributes:
+        symbols: Row labels of the arrays passed in
+        last_date: Date of the latest session applied (if given)
+        latest: Indicator name -> 1-D array of the latest values
+    """
+
+    def __init__(self, symbols: Sequence[str], sma_windows: Sequence[int] = (20, 50),
+                 ema_spans: Sequence[int] = (20,), rsi_period: int = 14,
+                 macd_params: Tuple[int, int, int] = (12, 26, 9),
+                 bollinger_params: Tuple[int, float] = (20, 2.0), vwap_window: int = 20):
+        self.symbols = list(symbols)
+        self.sma_windows = tuple(sma_windows)
+        self.ema_spans = tuple(ema_spans)
+        self.rsi_period = rsi_period
+        self.macd_params = tuple(macd_params)
+        self.bollinger_params = tuple(bollinger_params)
+        self.vwap_window = vwap_window
+        self.last_date: Optional[str] = None
+        self.latest: Dict[str, np.ndarray] = {}
+        self._state: Dict[str, np.ndarray] = {}
+
+    @property
+    def _price_window(self) -> int:
+        return max(self.sma_windows + (self.bollinger_params[0],))
+
+    def fit(self, close: np.ndarray, volume: np.ndarray, turnover: np.ndarray,
+            last_date: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """Compute every indicator over a (symbols, days) panel
+
+        Returns:
+            Indicator name -> (symbols, days) array
+        """
+        close, volume, turnover = (np.asarray(a, dtype=np.float64) for a in (close, volume, turnover))
+        fast, slow, signal = self.macd_params
+        window, width = self.bollinger_params
+        series = {f'sma_{n}': sma(close, n) for n in self.sma_windows}
+        spans = {span: ema(close, span) for span in set(self.ema_spans + (fast, slow))}
+        series.update({f'ema_{span}': spans[span] for span in self.ema_spans})
+        line = spans[fast] - spans[slow]
+        signal_line = ema(line, signal)
+        series.update({'macd': line, 'macd_signal': signal_line, 'macd_hist': line - signal_line})
+        series.update(zip(('bb_middle', 'bb_upper', 'bb_lower'), bollinger(close, window, width)))
+        series[f'vwap_{self.vwap_window}'] = vwap(turnover, volume, self.vwap_window)
+
+        wilder = _wilder_state(len(close))
+        values = np.empty_like(close)
+        for day in range(close.shape[1]):
+            values[:, day] = _wilder_step(wilder, close[:, day], self.rsi_period)
+        series[f'rsi_{self.rsi_period}'] = values
+
+        self._state = {
+            'closes': self._tail(close, self._price_window),
+            'volumes': self._tail(volume, self.vwap_window),
+            'turnovers': self._tail(turnover, self.vwap_window),
+            'signal': signal_line[:, -1] if close.shape[1] else np.full(len(close), np.nan),
+            **{f'ema_{span}': values[:, -1] if close.shape[1] else np.full(len(close), np.nan)
+               for span, values in spans.items()},
+            **{f'rsi_{key}': value for key, value in wilder.items()},
+        }
+        self.latest = {name: values[:, -1] if close.shape[1] else np.full(len(close), np.nan)
+                       for name, values in series.items()}
+        self.last_date = last_date
+        return series
+
+    @staticmethod
+    def _tail(values: np.ndarray, window: int) -> np.ndarray:
+        """Last window columns, left-padded with NaN for short series"""
+        tail = np.full((len(values), window), np.nan)
+        taken = values[:, -window:] if values.shape[1] else values
+        tail[:, window - taken.shape[1]:] = taken
+        return tail
+
+    def update(self, close: np.ndarray, volume: np.ndarray, turnover: np.ndarray,
+               date: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """Append one session (1-D arrays aligned with symbols)
+
+        Returns:
+            Indicator name -> 1-D array of the new session's values
+        """
+        if not self._state:
+            raise RuntimeError("fit() or load() the engine before update()")
+        state = self._state
+        close, volume, turnover = (np.asarray(a, dtype=np.float64) for a in (close, volume, turnover))
+        missing = np.isnan(close)
+        close = np.where(missing, state['closes'][:, -1], close)
+        volume = np.where(missing, 0.0, np.nan_to_num(volume))
+        turnover = np.where(missing, 0.0, np.nan_to_num(turnover))
+        volume[np.isnan(close)] = np.nan  # Not listed yet
+        turnover[np.isnan(close)] = np.nan
+
+        for key, value in (('closes', close), ('volumes', volume), ('turnovers', turnover)):
+            buffer = state[key]
+            buffer[:, :-1] = buffer[:, 1:]
+            buffer[:, -1] = value
+
+        closes = state['closes']
+        latest = {f'sma_{n}': closes[:, -n:].mean(axis=1) for n in self.sma_windows}
+        for span in set(self.ema_spans + self.macd_params[:2]):
+            state[f'ema_{span}'] = _ema_step(state[f'ema_{span}'], close, 2.0 / (span + 1))
+        latest.update({f'ema_{span}': state[f'ema_{span}'] for span in self.ema_spans})
+        fast, slow, signal = self.macd_params
+        line = state[f'ema_{fast}'] - state[f'ema_{slow}']
+        state['signal'] = _ema_step(state['signal'], line, 2.0 / (signal + 1))
+        latest.update({'macd': line, 'macd_signal': state['signal'], 'macd_hist': line - state['signal']})
+
+        window, width = self.bollinger_params
+        middle = closes[:, -window:].mean(axis=1)
+        deviation = closes[:, -window:].std(axis=1)
+        latest.update({'bb_middle': middle, 'bb_upper': middle + width * deviation,
+                       'bb_lower': middle - width * deviation})
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weighted = state['turnovers'].sum(axis=1) / state['volumes'].sum(axis=1)
+        latest[f'vwap_{self.vwap_window}'] = np.where(np.isfinite(weighted), weighted, np.nan)
+
+        wilder = {key: state[f'rsi_{key}'] for key in ('last', 'gain', 'loss', 'count')}
+        latest[f'rsi_{self.rsi_period}'] = _wilder_step(wilder, close, self.rsi_period)
+        state.update({f'rsi_{key}': value for key, value in wilder.items()})
+
+        self.latest = {name: latest[name] for name in self.latest} if self.latest else latest
+        self.last_date = date
+        return self.latest
+
+    def average_volume(self) -> np.ndarray:
+        """Mean daily volume over the last vwap_window sessions (NaN if none)"""
+        volumes = self._state['volumes'] if self._state else np.full((len(self.symbols), 1), np.nan)
+        sessions = (~np.isnan(volumes)).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(sessions > 0, np.nansum(volumes, axis=1) / sessions, np.nan)
+
+    def rows(self, symbols: Optional[Sequence[str]] = None) -> List[Dict[str, object]]:
+        """Latest values as one row per symbol (all symbols by default)
+
+        Keys are display labels (SMA20, RSI14, MACD Signal, ...); values
+        not available yet are None. Unknown symbols are skipped.
+        """
+        index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        columns = {'Close': self._state['closes'][:, -1]} if self._state else {}
+        columns.update((_label(name), values) for name, values in self.latest.items())
+        rows = []
+        for symbol in (symbols or self.symbols):
+            if symbol not in index:
+                continue
+            i = index[symbol]
+            row = {'Symbol': symbol, 'Date': self.last_date}
+            row.update((label, None if np.isnan(values[i]) else float(values[i]))
+                       for label, values in columns.items())
+            rows.append(row)
+        return rows
+
+    def _params(self) -> Dict[str, object]:
+        return {'sma_windows': self.sma_windows, 'ema_spans': self.ema_spans,
+                'rsi_period': self.rsi_period, 'macd_params': self.macd_params,
+                'bollinger_params': self.bollinger_params, 'vwap_window': self.vwap_window}
+
+    def save(self, path: Union[str, Path]):
+        """Write the parameters and update state to an .npz file"""
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.tmp.npz")
+        np.savez(tmp, symbols=np.array(self.symbols), last_date=np.array(self.last_date or ''),
+                 params=np.array(json.dumps(self._params())),
+                 **{f'state_{key}': value for key, value in self._state.items()},
+                 **{f'latest_{key}': value for key, value in self.latest.items()})
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'IndicatorEngine':
+        """Read an engine written by save()"""
+        with np.load(path) as data:
+            engine = cls([str(s) for s in data['symbols']], **json.loads(str(data['params'])))
+            engine.last_date = str(data['last_date']) or None
+            engine._state = {key[6:]: data[key].copy() for key in data.files if key.startswith('state_')}
+            engine.latest = {key[7:]: data[key].copy() for key in data.files if key.startswith('latest_')}
+        return engine
+
+def load_engine(store: HistoryStore, refit: bool = False) -> IndicatorEngine:
+    """Indicator engine for every symbol in a history store
+
+    The saved state (STATE_FILE in the store directory) is used when it
+    covers the same symbols up to the latest stored session; otherwise the
+    engine is fitted on the full history and saved for the next run.
+    """
+    path = store.root / STATE_FILE
+    symbols = store.symbols()
+    if path.exists() and not refit:
+        try:
+            engine = IndicatorEngine.load(path)
+        except (OSError, ValueError, KeyError):
+            engine = None
+        if engine and engine.symbols == symbols and engine.last_date == max(
+                filter(None, map(store.last_date, symbols)), default=None):
+            return engine
+    panel = store.panel(symbols)
+    engine = IndicatorEngine(symbols)
+    engine.fit(panel['close'], panel['volume'], panel['turnover'],
+               str(panel['dates'][-1]) if len(panel['dates']) else None)
+    if symbols:
+        engine.save(path)
+    return engine
+
+def record_session(store: HistoryStore, day: str, rows: Sequence[Dict[str, object]]) -> bool:
+    """Advance the saved engine state by a session just appended to the store
+
+    Costs O(symbols). When the session cannot simply be appended (same or
+    earlier date than the state, or new symbols), the saved state is
+    dropped so the next load_engine() refits from the store.
+
+    Returns:
+        Whether the saved state was updated
+    """
+    path = store.root / STATE_FILE
+    if not path.exists():
+        return False
+    try:
+        engine = IndicatorEngine.load(path)
+    except (OSError, ValueError, KeyError):
+        engine = None
+    prices = {str(row['Symbol']).upper(): row for row in rows
+              if 'error' not in row and _number(row.get('LTP'))}
+    if engine is None or (engine.last_date and day <= engine.last_date) \
+            or not prices.keys() <= set(engine.symbols):
+        path.unlink()
+        return False
+    columns = {field: np.array([_number(prices[s].get(key)) if s in prices else np.nan
+                                for s in engine.symbols])
+               for field, key in (('close', 'LTP'), ('volume', 'Volume'), ('turnover', 'Turnover'))}
+    engine.update(columns['close'], columns['volume'], columns['turnover'], day)
+    engine.save(path)
+    return True
@@ -1,19 +1,37 @@
-from nepse import Nepse as NepseBase
-from typing import List, Dict, Any, Union
+from typing import TYPE_CHECKING, List, Dict, Any, Iterator, Optional, Tuple, Union
+import os
 import sys
+import threading
 from datetime import datetime
 import json
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 from pathlib import Path
-from subprocess import run
-from tqdm import tqdm
 import time
-from .utils import with_progress
+from .cache import ResponseCache, market_ttl
+from .resilience import (CircuitBreaker, RetryPolicy, UpstreamUnavailable, call_with_timeout,
+                         is_transient, DEFAULT_CALL_TIMEOUT, DEFAULT_RETRIES)
+from .snapshot import MarketSnapshot
+from .tracing import StderrSink, Tracer, payload_size
+from .transport import FLOORSHEET_PAGE, LiveTransport
+from .utils import with_progress, iter_fetch, SingleFlight, DEFAULT_MAX_WORKERS
+
+if TYPE_CHECKING:
+    from nepse import Nepse as NepseBase
+    from .screener import MarketTable
+
+# Cache key and lifetime of the static fields taken from getCompanyDetails
+COMPANY_METADATA = 'companyMetadata'
+METADATA_TTL = 7 * 24 * 3600
+
+# Rows in each top list (gainers, losers, turnover, ...)
+TOP_COUNT = 20
 
 def trace_api(func):
-    """Decorator to trace API calls and responses
+    """Decorator to trace client methods
     
-    Logs API method calls and their responses when tracing is enabled.
+    Opens a "transform" span named after the method when tracing is
+    enabled; upstream requests made inside it get their own spans.
     
     Args:
         func: The API method to trace
@@ -23,27 +41,33 @@ def trace_api(func):
     """
     @wraps(func)
     def wrapper(self, *args, **kwargs):
-        # Get method name from the original function
-        method = func.__name__
-        
-        # Log API call if trace enabled
-        if self.trace:
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            print(f"{timestamp} API Call: {method}({', '.join(map(str, args))})", 
-                  file=sys.stderr)
+        if not self.tracer.enabled:
+            return func(self, *args, **kwargs)
         
-        # Execute the API call
-        result = func(self, *args, **kwargs)
-        
-        # Print debug info if trace enabled
-        if self.trace:
-            print("\nFull API Response:", file=sys.stderr)
-            formatted_json = json.dumps(result, indent=2)
-            print(formatted_json, file=sys.stderr)
-            
-        return result
+        with self.tracer.span(func.__name__, 'transform', args=list(args)) as span:
+            result = func(self, *args, **kwargs)
+            if isinstance(result, list):
+                span.set(rows=len(result))
+            return result
     return wrapper
 
+def error_row(symbol: str, error: Exception) -> Dict[str, Any]:
+    """Marker returned in place of a symbol's row when fetching it failed"""
+    return {'Symbol': symbol, 'error': str(error) or type(error).__name__}
+
+def company_metadata(details: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of a getCompanyDetails payload that do not move intraday"""
+    security = details.get('security') or {}
+    company = security.get('companyId') or {}
+    return {
+        'Symbol': security.get('symbol', ''),
+        'Name': company.get('companyName', ''),
+        'Sector': (company.get('sectorMaster') or {}).get('sectorDescription', ''),
+        'Listed Shares': details.get('stockListedShares'),
+        'Public %': details.get('publicPercentage'),
+        'Promoter %': details.get('promoterPercentage'),
+    }
+
 def with_loading(desc="Fetching data"):
     """Decorator to show loading animation during API calls
     
@@ -58,6 +82,7 @@ def with_loading(desc="Fetching data"):
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
+            from tqdm import tqdm
             with tqdm(total=100, desc=desc, bar_format='{desc}: {bar}| {percentage:3.0f}%') as pbar:
                 # Start the loading animation
                 pbar.update(10)
@@ -79,57 +104,203 @@ class NepseClient:
     - Market indices
     - Company details
     - Market depth
-    - Top gainers/losers
+    - Top gainers/losers, turnover, volume and transactions
     
     Attributes:
-        client: Underlying NEPSE API client
-        trace: Whether to enable API call tracing
+        transport: Carries upstream calls (live API, recording or replay)
+        client: Underlying NEPSE API client of a live transport
+        trace: Whether to print a line per traced span to stderr
+        tracer: Tracer receiving upstream, cache and transform spans
+        max_workers: Maximum concurrent requests for multi-symbol fetches
+        timeout: Per-symbol timeout in seconds for multi-symbol fetches
+        deadline: Time budget in seconds for a whole multi-symbol fetch
+        call_timeout: Timeout in seconds for each upstream request attempt
+        retry: RetryPolicy for transient upstream failures
+        breaker: CircuitBreaker shared by all upstream requests
+        cache: Optional persistent ResponseCache shared across runs
+        show_progress: Whether multi-symbol fetches show a progress bar
+        upstream_calls: Number of requests actually sent to the NEPSE API
+        stale_responses: Number of expired cached responses served while
+            NEPSE was unavailable
     """
     
-    def __init__(self, trace=False):
-        self.client = NepseBase()
-        self.client.setTLSVerification(False)  # Required until NEPSE fixes SSL
+    def __init__(self, trace=False, max_workers=DEFAULT_MAX_WORKERS, timeout=None,
+                 cache: Optional[ResponseCache] = None, refresh_interval: Optional[float] = None,
+                 transport=None, tracer: Optional[Tracer] = None, deadline: Optional[float] = None,
+                 call_timeout: Optional[float] = DEFAULT_CALL_TIMEOUT, retries: int = DEFAULT_RETRIES):
+        """Initialize the client
+        
+        Args:
+            tracer: Tracer with the sinks to report to (see nepsense.tracing);
+                with trace=True and no tracer, spans are printed to stderr
+            deadline: Return multi-symbol fetches after this many seconds,
+                with error rows for the symbols still outstanding
+            call_timeout: Abandon an upstream request attempt after this
+                many seconds (None waits indefinitely)
+            retries: Extra attempts for transient upstream failures
+            transport: Object with call(method, *args) (see nepsense.transport);
+                defaults to the live NEPSE API
+            refresh_interval: For long-lived clients, refetch responses older
+                than this many seconds while the market is trading (and keep
+                them until the next session once it has closed). By default
+                responses are fetched once and kept until reset().
+        """
         self.trace = trace
+        self.tracer = tracer or Tracer([StderrSink()] if trace else [])
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.deadline = deadline
+        self.call_timeout = call_timeout
+        self.retry = RetryPolicy(retries=retries)
+        self.breaker = CircuitBreaker()
+        self.cache = cache
+        self.show_progress = True
+        self.transport = transport or LiveTransport()
+        self.upstream_calls = 0
+        self.stale_responses = 0
+        self._stats_lock = threading.Lock()
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        ttl = (lambda: market_ttl(live_ttl=refresh_interval)) if refresh_interval else None
+        self._requests = SingleFlight(ttl=ttl)
+
+    @property
+    def client(self) -> 'NepseBase':
+        """Underlying NEPSE API client, created lazily so cache hits skip it"""
+        return self.transport.client
         
-    def _trace(self, method: str, *args):
-        """Log API calls if trace mode is enabled"""
-        timestamp = datetime.now().strftime('%H:%M:%S')
-        print(f"{timestamp} API Call: {method}({', '.join(map(str, args))})", 
-              file=sys.stderr)
-    
-    def _debug(self, message: str = None, data: Any = None):
-        """Print debug information if trace mode is enabled
+    def _call(self, method: str, *args) -> Any:
+        """Call an upstream API method, coalescing identical requests
         
-        Args:
-            message: Optional message to print
-            data: Optional data to inspect
+        Each (method, args) pair is fetched once per run (or per refresh
+        interval); concurrent callers for the same pair share the in-flight
+        request. When a persistent
+        cache is configured, fresh entries are served from disk instead.
+        """
+        return self._requests.do((method,) + args, lambda: self._fetch(method, *args))
+
+    def _fetch(self, method: str, *args) -> Any:
+        """Fetch a response from the persistent cache or the upstream API
+        
+        If NEPSE is unavailable, an expired cached response is served
+        instead (with a warning) when there is one.
         """
-        if not self.trace:
-            return
+        tracer = self.tracer
+        if self.cache is not None:
+            with tracer.span(method, 'cache', args=list(args)) as span:
+                cached = self.cache.get(method, args)
+                if cached is not ResponseCache.MISSING:
+                    if tracer.enabled:
+                        size = self.cache.size(method, args)
+                        span.set(cache='hit', bytes=payload_size(cached) if size is None else size)
+                    return cached
+                span.set(cache='miss')
+
+        try:
+            result = self._upstream(method, *args)
+        except UpstreamUnavailable as e:
+            stale = self.cache.get_stale(method, args) if self.cache is not None else None
+            if stale is None:
+                raise
+            result, stored = stale
+            with self._stats_lock:
+                self.stale_responses += 1
+            with tracer.span(method, 'cache', args=list(args), cache='stale'):
+                age = f" from {datetime.fromtimestamp(stored):%Y-%m-%d %H:%M}" if stored else ""
+                print(f"Warning: {e}; using cached {method}({', '.join(map(str, args))}){age}",
+                      file=sys.stderr)
+            return result
+
+        if self.cache is not None and result:
+            self.cache.set(method, args, result)
+        return result
+
+    def _response_size(self, method: str, args: Tuple[Any, ...], result: Any) -> int:
+        """Bytes of a response as stored by the transport, else serialized as JSON"""
+        size = getattr(self.transport, 'size', None)
+        stored = size(method, *args) if size is not None else None
+        return payload_size(result) if stored is None else stored
+
+    def _upstream(self, method: str, *args) -> Any:
+        """Send one request through the transport
         
-        if message:
-            print(f"\n{message}", file=sys.stderr)
+        Each attempt is abandoned after call_timeout; transient failures
+        are retried with jittered exponential backoff, and while the
+        circuit breaker is open no request is sent at all.
         
-        if data:
-            print("\nFull API Response:", file=sys.stderr)
-            if isinstance(data, list):
-                formatted_json = json.dumps(data, indent=2)
-                print(formatted_json, file=sys.stderr)
+        Raises:
+            UpstreamUnavailable: NEPSE could not be reached (CircuitOpen
+                if the breaker refused the call)
+        """
+        tracer = self.tracer
+        delays = self.retry.delays()
+        attempt = 1
+        while True:
+            self.breaker.before_call()
+            with self._stats_lock:
+                self.upstream_calls += 1
+            try:
+                with tracer.span(method, 'upstream', args=list(args), attempt=attempt) as span:
+                    result = call_with_timeout(self.transport.call, self.call_timeout, method, *args)
+                    if tracer.enabled:
+                        with span.pause():  # Sizing the response is not part of the request
+                            span.set(bytes=self._response_size(method, args, result))
+            except Exception as e:
+                if not is_transient(e):
+                    self.breaker.record_success()  # NEPSE answered; the request itself failed
+                    raise
+                self.breaker.record_failure()
+                delay = next(delays, None)
+                if delay is None:
+                    raise UpstreamUnavailable(f"{method} failed after {attempt} attempt"
+                                              f"{'s' if attempt > 1 else ''}: {e}") from e
+                time.sleep(delay)
+                attempt += 1
             else:
-                formatted_json = json.dumps(data, indent=2)
-                print(formatted_json, file=sys.stderr)
-
-    def _print_debug(self):
-        """Print stored debug output"""
-        if self.trace and hasattr(self, 'debug_output'):
-            print(*self.debug_output, sep='\n', file=sys.stderr)
-            delattr(self, 'debug_output')
-    
+                self.breaker.record_success()
+                return result
+
+    def reset(self):
+        """Forget responses fetched so far so the next call refetches"""
+        self._requests.clear()
+
+    def market_snapshot(self) -> MarketSnapshot:
+        """Index and sub-index data shared by all market-wide views
+        
+        Both payloads are fetched in parallel once per run, so rendering the
+        index, sub-indices, sectors and market summary costs two upstream calls.
+        """
+        def fetch():
+            # Both requests run on their own threads; this span is the time spent waiting for them
+            with self.tracer.span('market_snapshot', 'wait'):
+                return MarketSnapshot.fetch(self._call)
+        return self._requests.do(('market_snapshot',), fetch)
+
+    def market_table(self, companies: Optional[List[Dict[str, Any]]] = None) -> 'MarketTable':
+        """Every traded symbol with its sector as one columnar table
+
+        Args:
+            companies: Rows with Symbol and Sector (e.g. from the local
+                CompanyIndex); otherwise the company list is fetched in
+                parallel with the live market
+        """
+        from .screener import MarketTable
+        if companies is not None:
+            market = self.get_live_market()
+            with self.tracer.span('market_table', 'transform', rows=len(market)):
+                return MarketTable.from_rows(market, companies)
+        with self.tracer.span('market_table', 'wait'):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                companies = executor.submit(self.get_company_list)
+                market = self.get_live_market()
+                companies = companies.result()
+        with self.tracer.span('market_table', 'transform', rows=len(market)):
+            return MarketTable.from_rows(market, companies)
+
+    @with_progress("Fetching stock prices", on_error=error_row)
     @trace_api
-    @with_progress("Fetching stock prices")
     def get_stock_prices(self, symbol: Union[str, List[str]]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
         """Get current price for a stock symbol"""
-        details = self.client.getCompanyDetails(symbol)
+        details = self._call('getCompanyDetails', symbol)
         if details and 'securityDailyTradeDto' in details:
             trade = details['securityDailyTradeDto']
             ltp = trade.get('lastTradedPrice', 0)
@@ -150,50 +321,47 @@ class NepseClient:
             }
         return None
 
+    def iter_stock_prices(self, symbols: List[str]) -> Iterator[Dict[str, Any]]:
+        """Yield price rows as soon as each symbol's request completes
+        
+        Uses the same concurrency, timeout and deadline settings as
+        get_stock_prices but yields in completion order, so callers can
+        process early results while slower symbols are still in flight.
+        Symbols that fail are yielded as error rows (see error_row).
+        """
+        for _, row in iter_fetch(self.get_stock_prices, symbols,
+                                 max_workers=self.max_workers, timeout=self.timeout,
+                                 desc="Fetching stock prices", show_progress=self.show_progress,
+                                 deadline=self.deadline, on_error=error_row):
+            if row:
+                yield row
+
     @trace_api
     def get_nepse_index(self) -> Dict[str, Any]:
         """Get current NEPSE index"""
-        data = self.client.getNepseIndex()
-        if isinstance(data, list) and data:
-            current = data[0].get('currentValue', 0)
-            prev = data[0].get('previousClose', 0)
-            # Calculate changes
-            change = current - prev if current and prev else 0
-            pct_change = (change / prev * 100) if prev else 0
-            
-            return {
-                'index': 'NEPSE',
-                'currentValue': current,
-                'change': change,
-                'perChange': pct_change,
-                'high': data[0].get('high'),
-                'low': data[0].get('low'),
-                'previousClose': data[0].get('previousClose')
-            }
-        return data
+        return self.market_snapshot().nepse_index()
     
     @trace_api
     def get_sub_indices(self) -> List[Dict[str, Any]]:
         """Get all sub-indices"""
-        data = self.client.getNepseSubIndices()
-        if isinstance(data, list):
-            return [{
-                'Sector': item.get('index', ''),
-                'Value': item.get('currentValue', 0),
-                'Change': item.get('change', 0),
-                '%Change': item.get('perChange', 0)
-            } for item in data]
-        return data
+        return self.market_snapshot().sub_indices()
         
+    @with_progress("Fetching market depth", on_error=error_row)
     @trace_api
-    def get_market_depth(self, symbol: str) -> Dict[str, Any]:
-        """Get market depth for a symbol"""
-        details = self.client.getCompanyDetails(symbol)
+    def get_market_depth(self, symbol: Union[str, List[str]]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """Get market depth for a symbol
+        
+        A list of symbols is fetched concurrently (see with_progress), one
+        dict per symbol tagged with its Symbol; see nepsense.depth for
+        analytics over many books.
+        """
+        details = self._call('getCompanyDetails', symbol)
         if not details:
             return {}
             
         depth = details.get('marketDepth', {})
         return {
+            'Symbol': symbol,
             'buyMarketDepthList': depth.get('buyMarketDepthList', []),
             'sellMarketDepthList': depth.get('sellMarketDepthList', []),
             'totalBuyQty': sum(item.get('orderQuantity', 0) 
@@ -202,99 +370,237 @@ class NepseClient:
                               for item in depth.get('sellMarketDepthList', []))
         }
         
+    def _ranking_table(self) -> 'MarketTable':
+        """Live-market snapshot shared by every top list of this run (or refresh interval)"""
+        def build():
+            from .screener import MarketTable
+            market = self.get_live_market()
+            with self.tracer.span('ranking_table', 'transform', rows=len(market)):
+                return MarketTable.from_rows(market)
+        return self._requests.do(('ranking_table',), build)
+
     @trace_api
-    def get_top_gainers(self) -> List[Dict[str, Any]]:
-        """Get top gaining stocks"""
-        data = self.client.getTopGainers()
+    def get_top(self, column: str, count: int = TOP_COUNT, ascending: bool = False) -> List[Dict[str, Any]]:
+        """Get the symbols with the highest (or lowest) values of a market column
         
-        if isinstance(data, list):
-            return [{
-                'Symbol': item.get('symbol', ''),
-                'LTP': item.get('lastTradedPrice', ''),
-                'Change': item.get('pointChange', ''),
-                '%Change': item.get('percentageChange', ''),
-                'Open': item.get('openPrice', ''),
-                'High': item.get('highPrice', ''),
-                'Low': item.get('lowPrice', ''),
-                'Volume': item.get('quantity', ''),
-                'Turnover': item.get('amount', '')
-            } for item in data]
-        return data
+        Every top list is ranked locally from one live-market snapshot, so
+        gainers, losers and the turnover, volume and transaction lists cost
+        one upstream call together and their rows are fully populated.
         
-    @trace_api
-    def get_top_losers(self) -> List[Dict[str, Any]]:
+        Args:
+            column: Column of the snapshot (see screener.MARKET_FIELDS)
+            count: Maximum number of rows
+            ascending: Rank the lowest (negative) values first
+        """
+        return self._ranking_table().top(column, count, ascending)
+
+    def get_top_gainers(self, count: int = TOP_COUNT) -> List[Dict[str, Any]]:
+        """Get top gaining stocks"""
+        return self.get_top('pct_change', count)
+        
+    def get_top_losers(self, count: int = TOP_COUNT) -> List[Dict[str, Any]]:
         """Get top losing stocks"""
-        data = self.client.getTopLosers()
-        if isinstance(data, list):
-            return [{
-                'Symbol': item.get('symbol', ''),
-                'LTP': item.get('lastTradedPrice', ''),
-                'Change': item.get('pointChange', ''),
-                '%Change': item.get('percentageChange', ''),
-                'Open': item.get('openPrice', ''),
-                'High': item.get('highPrice', ''),
-                'Low': item.get('lowPrice', ''),
-                'Volume': item.get('totalTradeQuantity', ''),
-                'Turnover': item.get('totalTradeValue', '')
-            } for item in data]
-        return data
+        return self.get_top('pct_change', count, ascending=True)
+
+    def get_top_turnover(self, count: int = TOP_COUNT) -> List[Dict[str, Any]]:
+        """Get the stocks with the highest turnover"""
+        return self.get_top('turnover', count)
+
+    def get_top_volume(self, count: int = TOP_COUNT) -> List[Dict[str, Any]]:
+        """Get the stocks with the highest traded volume"""
+        return self.get_top('volume', count)
+
+    def get_top_transactions(self, count: int = TOP_COUNT) -> List[Dict[str, Any]]:
+        """Get the stocks with the most transactions"""
+        return self.get_top('trades', count)
+
+    FLOORSHEET_PAGE_SIZE = 500
+
+    def _floorsheet_page(self, page: int) -> Dict[str, Any]:
+        """Fetch one page of today's floorsheet (never cached)"""
+        return self._upstream(FLOORSHEET_PAGE, page, self.FLOORSHEET_PAGE_SIZE)
+
+    def iter_floorsheet(self, start_page: int = 0) -> Iterator[Tuple[int, Dict[str, Any], List[Dict[str, Any]]]]:
+        """Yield today's floorsheet page by page as it is downloaded
+        
+        Args:
+            start_page: First page to fetch (for resuming)
+            
+        Yields:
+            (page number, page info with totalPages/totalElements, rows)
+        """
+        page = start_page
+        from .floorsheet import normalize_floorsheet
+        
+        while True:
+            sheet = self._floorsheet_page(page)
+            rows = normalize_floorsheet(sheet.get('content', []))
+            yield page, sheet, rows
+            page += 1
+            if page >= sheet.get('totalPages', 0) or not rows:
+                break
 
     @trace_api
-    def get_floorsheet(self, output_path: Path = None) -> None:
-        """Get today's floorsheet using nepse-cli"""
+    def get_floorsheet(self, output_path: Path = None, fmt: str = "csv", resume: bool = True) -> Path:
+        """Download today's floorsheet, writing each page as it arrives
+        
+        Progress is checkpointed after every page; if the download is
+        interrupted, the next call continues from the last completed page
+        (or starts again if the partial output no longer matches it).
+        
+        Args:
+            output_path: Output directory (defaults to the current directory)
+            fmt: "csv" or "columnar" (memory-mappable, see nepsense.floorsheet)
+            resume: Continue an interrupted download of the same day
+            
+        Returns:
+            Path of the saved floorsheet
+        """
+        from tqdm import tqdm
+        from .floorsheet import floorsheet_writer
+        
         # Default to current directory if no path specified
-        output_file = output_path / "floorsheet.json" if output_path else Path("floorsheet.json")
+        output_dir = output_path or Path.cwd()
+        today = datetime.now()
+        name = f"floorsheet_{today.date()}_{today.strftime('%A')}"
+        writer = floorsheet_writer(output_dir / name, fmt=fmt, date=str(today.date()))
+        state_file = output_dir / f".{name}.{fmt}.progress.json"
+        
+        start_page = 0
+        if resume and state_file.exists():
+            with open(state_file, encoding='utf-8') as f:
+                state = json.load(f)
+            if writer.restore(state['writer']):
+                start_page = state['page'] + 1
+        if start_page == 0:
+            writer.reset()
+        
+        with tqdm(desc="Floorsheet", unit="rows", unit_scale=True, initial=writer.rows,
+                  disable=not sys.stdout.isatty()) as pbar:
+            for page, sheet, rows in self.iter_floorsheet(start_page):
+                writer.write(rows)
+                pbar.total = sheet.get('totalElements') or None
+                pbar.set_postfix(page=f"{page + 1}/{sheet.get('totalPages', '?')}")
+                pbar.update(len(rows))
+                
+                # Checkpoint only after the page is fully written
+                tmp = state_file.with_suffix('.tmp')
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump({'page': page, 'writer': writer.checkpoint()}, f)
+                os.replace(tmp, state_file)
         
-        # Run nepse-cli command
-        cmd = ["nepse-cli", "--get-floorsheet", "--output-file", str(output_file)]
-        run(cmd)
+        path = writer.finish()
+        state_file.unlink(missing_ok=True)
+        return path
+
+    def query_floorsheet(self, archive: Path, symbol: str = None, buyer: int = None,
+                         seller: int = None, start: str = None, end: str = None,
+                         min_amount: float = None) -> List[Dict[str, Any]]:
+        """Query stored columnar floorsheets
+        
+        Uses the per-day symbol/broker row index, so only matching rows are
+        read from the archive.
+        
+        Args:
+            archive: Directory holding floorsheet_<date>_<day>.fsc directories
+            symbol: Traded symbol
+            buyer: Buyer broker ID
+            seller: Seller broker ID
+            start: First trading date (YYYY-MM-DD, inclusive)
+            end: Last trading date (YYYY-MM-DD, inclusive)
+            min_amount: Only trades with a larger amount
+            
+        Returns:
+            Matching trades, largest amount first
+        """
+        from .floorsheet import FloorsheetArchive
+        
+        result = FloorsheetArchive(archive).query(symbol=symbol, buyer=buyer, seller=seller,
+                                                  start=start, end=end, min_amount=min_amount)
+        return result.to_dict('records')
+
+    def get_company_metadata(self, symbol: str) -> Dict[str, Any]:
+        """Static fields of a company: name, sector, listed shares and ownership
+        
+        They rarely change, so they are kept for the client's lifetime and
+        for METADATA_TTL in the persistent cache, independently of the
+        short-lived price responses. A miss reads them from this run's
+        getCompanyDetails response, which a price lookup has usually
+        fetched already.
+        """
+        metadata = self._metadata.get(symbol)
+        if metadata is None and self.cache is not None:
+            metadata = self.cache.get(COMPANY_METADATA, (symbol,), None)
+        if metadata is None:
+            metadata = company_metadata(self._call('getCompanyDetails', symbol) or {})
+            if self.cache is not None and metadata['Symbol']:
+                self.cache.set(COMPANY_METADATA, (symbol,), metadata, ttl=METADATA_TTL)
+        self._metadata[symbol] = metadata
+        return metadata
+
+    @trace_api
+    def get_live_market(self) -> List[Dict[str, Any]]:
+        """Get the current session's prices of every traded symbol in one call
+
+        Uses the live market feed, or today's price/volume list once the
+        market has closed and the live feed is empty.
+        """
+        data = self._call('getLiveMarket') or self._call('getPriceVolume')
+        if not isinstance(data, list):
+            return []
+        rows = []
+        for item in data:
+            ltp = item.get('lastTradedPrice') or 0
+            prev_close = item.get('previousClose') or 0
+            change = ltp - prev_close if ltp and prev_close else 0
+            volume = item.get('totalTradeQuantity') or 0
+            # The key is present but null for some securities
+            pct = item.get('percentageChange')
+            if pct is None:
+                pct = (change / prev_close * 100) if prev_close else 0
+            rows.append({
+                'Symbol': item.get('symbol', ''),
+                'Name': item.get('securityName', ''),
+                'LTP': ltp,
+                'Change': change,
+                '%Change': pct,
+                'Open': item.get('openPrice'),
+                'High': item.get('highPrice'),
+                'Low': item.get('lowPrice'),
+                'Volume': volume,
+                'Turnover': item.get('totalTradeValue') or volume * ltp,
+                'Trades': item.get('totalTrades'),
+                'Prev Close': prev_close,
+            })
+        return rows
+
+    @trace_api
+    def get_company_list(self) -> List[Dict[str, Any]]:
+        """Get every listed company with its sector and instrument type"""
+        data = self._call('getCompanyList')
+        if not isinstance(data, list):
+            return []
+        return [{
+            'Symbol': item.get('symbol', ''),
+            'Company Id': item.get('id'),
+            'Name': item.get('securityName') or item.get('companyName', ''),
+            'Sector': item.get('sectorName', ''),
+            'Instrument': item.get('instrumentType', ''),
+            'Status': item.get('status', ''),
+        } for item in data]
 
     @trace_api
     def get_market_summary(self) -> Dict[str, Any]:
         """Get market summary data"""
-        # Get index data for turnover and volume
-        index_data = self.client.getNepseIndex()
-        
-        # Get total market cap from sub-indices
-        sub_indices = self.client.getNepseSubIndices()
-        total_market_cap = sum(float(item.get('marketCapitalization', 0)) 
-                              for item in sub_indices if isinstance(item, dict))
-
-        if isinstance(index_data, list) and index_data:
-            data = index_data[0]
-            return {
-                'Total Turnover': data.get('totalTurnover', 0),
-                'Total Traded Shares': data.get('totalTradedShares', 0),
-                'Total Transactions': data.get('totalTrades', 0),
-                'Total Scripts Traded': data.get('totalScripTraded', 0),
-                'Market Capitalization': total_market_cap
-            }
-        return {
-            'Total Turnover': 0,
-            'Total Traded Shares': 0,
-            'Total Transactions': 0,
-            'Total Scripts Traded': 0,
-            'Market Capitalization': total_market_cap
-        }
+        return self.market_snapshot().market_summary()
 
+    @with_progress("Fetching company details", on_error=error_row)
     @trace_api
-    @with_progress("Fetching company details")
     def get_company_details(self, symbol: Union[str, List[str]]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
         """Get detailed company information"""
-        return self.client.getCompanyDetails(symbol)
+        return self._call('getCompanyDetails', symbol)
 
     @trace_api
     def get_sector_summary(self) -> List[Dict[str, Any]]:
         """Get sector-wise market summary"""
-        data = self.client.getNepseSubIndices()
-        
-        result = []
-        if isinstance(data, list):
-            result = [{
-                'Sector': item.get('index', ''),
-                'Value': item.get('currentValue', 0),
-                'Change': item.get('change', 0),
-                '%Change': item.get('perChange', 0)
-            } for item in data]
-        
-        return result
\ No newline at end of file
+        return self.market_snapshot().sub_indices() or []
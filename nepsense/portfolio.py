@@ -0,0 +1,186 @@
+"""
+Portfolio valuation against current NEPSE prices
+
+Holdings are read once from a CSV: lots of the same symbol are merged and
+their cost basis summed up front, so revaluing a Portfolio (e.g. on every
+``--watch`` tick) only needs the current price rows and each symbol's
+sector, which NepseClient keeps in its static metadata cache.
+
+Holdings CSV columns (case-insensitive; the first matching name is used):
+    symbol:      Symbol, Scrip, Script, Stock
+    quantity:    Quantity, Qty, Units, Shares, Balance, Current Balance
+    cost basis:  Total Cost, Cost Basis, Investment, Amount
+    or per unit: Cost, Avg Cost, Average Cost, WACC, WACC Rate, Rate, Price
+
+Classes:
+    Portfolio: Aggregated holdings valued against price rows
+
+Functions:
+    read_holdings: Parse a holdings CSV into Symbol/Quantity/Cost rows
+"""
+
+import csv
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+SYMBOL_COLUMNS = ('symbol', 'scrip', 'script', 'stock')
+QUANTITY_COLUMNS = ('quantity', 'qty', 'units', 'shares', 'balance', 'currentbalance')
+TOTAL_COST_COLUMNS = ('totalcost', 'costbasis', 'investment', 'amount')
+UNIT_COST_COLUMNS = ('cost', 'avgcost', 'averagecost', 'wacc', 'waccrate', 'rate', 'price')
+
+def _normalize(header: str) -> str:
+    return ''.join(ch for ch in header.lower() if ch.isalnum())
+
+def _parse_number(value: Optional[str]) -> Optional[float]:
+    value = (value or '').replace(',', '').strip()
+    return float(value) if value else None
+
+def read_holdings(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """Parse a holdings CSV
+
+    Returns:
+        One row per lot with Symbol, Quantity and Cost (total cost basis,
+        None when the file has no cost column or the cell is empty)
+
+    Raises:
+        ValueError: Missing symbol/quantity columns or unreadable numbers
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        headers = {_normalize(name): name for name in reader.fieldnames or []}
+
+        def column(candidates):
+            return next((headers[name] for name in candidates if name in headers), None)
+
+        symbol_col, quantity_col = column(SYMBOL_COLUMNS), column(QUANTITY_COLUMNS)
+        total_col, unit_col = column(TOTAL_COST_COLUMNS), column(UNIT_COST_COLUMNS)
+        if not symbol_col or not quantity_col:
+            raise ValueError(f"{path}: needs a symbol and a quantity column "
+                             f"(found: {', '.join(reader.fieldnames or []) or 'none'})")
+
+        lots = []
+        for line, row in enumerate(reader, start=2):
+            symbol = (row.get(symbol_col) or '').strip().upper()
+            if not symbol:
+                continue
+            try:
+                quantity = _parse_number(row.get(quantity_col)) or 0
+                quantity = int(quantity) if float(quantity).is_integer() else quantity
+                cost = _parse_number(row.get(total_col)) if total_col else None
+                if cost is None and unit_col:
+                    unit = _parse_number(row.get(unit_col))
+                    cost = unit * quantity if unit is not None else None
+            except ValueError as e:
+                raise ValueError(f"{path}, line {line}: {e}") from None
+            lots.append({'Symbol': symbol, 'Quantity': quantity, 'Cost': cost})
+    return lots
+
+def _percent(part: Optional[float], whole: Optional[float]) -> Optional[float]:
+    return part / whole * 100 if part is not None and whole else None
+
+class Portfolio:
+    """Holdings aggregated per symbol
+
+    Attributes:
+        symbols: Held symbols in first-seen order
+        quantity: Symbol -> total quantity
+        cost: Symbol -> total cost basis (None if unknown for any lot)
+    """
+
+    def __init__(self, lots: Iterable[Dict[str, Any]]):
+        self.quantity: Dict[str, float] = {}
+        self.cost: Dict[str, Optional[float]] = {}
+        for lot in lots:
+            symbol = lot['Symbol']
+            self.quantity[symbol] = self.quantity.get(symbol, 0) + lot['Quantity']
+            known = self.cost.get(symbol, 0.0)
+            self.cost[symbol] = None if known is None or lot['Cost'] is None else known + lot['Cost']
+        # Fully sold positions (lots netting to zero) are not valued
+        self.symbols = [symbol for symbol, quantity in self.quantity.items() if quantity]
+
+    @classmethod
+    def from_csv(cls, path: Union[str, Path]) -> 'Portfolio':
+        """Read holdings from a CSV (see read_holdings)"""
+        return cls(read_holdings(path))
+
+    def value(self, prices: Iterable[Dict[str, Any]],
+              sectors: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Value the holdings at the given prices
+
+        Args:
+            prices: Rows as returned by NepseClient.get_stock_prices;
+                symbols without a row (or with an error row) are left out
+            sectors: Symbol -> sector name, for the sector weights
+
+        Returns:
+            Dict with 'positions' (one row per priced holding, by market
+            value), 'sectors' (weights and P&L per sector) and 'total'
+        """
+        sectors = sectors or {}
+        quotes = {row['Symbol']: row for row in prices if row and 'error' not in row}
+        positions = []
+        for symbol in self.symbols:
+            quote = quotes.get(symbol)
+            if quote is None:
+                continue
+            quantity, cost = self.quantity[symbol], self.cost[symbol]
+            ltp = float(quote.get('LTP') or 0)
+            value = quantity * ltp
+            pnl = value - cost if cost is not None else None
+            positions.append({
+                'Symbol': symbol,
+                'Sector': sectors.get(symbol, ''),
+                'Quantity': quantity,
+                'Avg Cost': cost / quantity if cost is not None else None,
+                'LTP': ltp,
+                'Market Value': value,
+                'Day Change': quantity * float(quote.get('change') or 0),
+                'Day %Change': float(quote.get('%change') or 0),
+                'Cost Basis': cost,
+                'Unrealized P&L': pnl,
+                'P&L %': _percent(pnl, cost),
+            })
+
+        total_value = sum(row['Market Value'] for row in positions)
+        for row in positions:
+            row['Weight %'] = _percent(row['Market Value'], total_value)
+        positions.sort(key=lambda row: -row['Market Value'])
+
+        by_sector: Dict[str, Dict[str, Any]] = {}
+        for row in positions:
+            sector = by_sector.setdefault(row['Sector'] or 'Unknown', {
+                'Sector': row['Sector'] or 'Unknown', 'Positions': 0, 'Market Value': 0.0,
+                'Day Change': 0.0, 'Cost Basis': 0.0, 'Unrealized P&L': 0.0,
+            })
+            sector['Positions'] += 1
+            sector['Market Value'] += row['Market Value']
+            sector['Day Change'] += row['Day Change']
+            if sector['Cost Basis'] is not None and row['Cost Basis'] is not None:
+                sector['Cost Basis'] += row['Cost Basis']
+                sector['Unrealized P&L'] += row['Unrealized P&L']
+            else:
+                sector['Cost Basis'] = sector['Unrealized P&L'] = None
+        for sector in by_sector.values():
+            sector['Weight %'] = _percent(sector['Market Value'], total_value)
+
+        return {
+            'positions': positions,
+            'sectors': sorted(by_sector.values(), key=lambda row: -row['Market Value']),
+            'total': self._total(positions, total_value),
+        }
+
+    @staticmethod
+    def _total(positions: List[Dict[str, Any]], total_value: float) -> Dict[str, Any]:
+        day_change = sum(row['Day Change'] for row in positions)
+        costs = [row['Cost Basis'] for row in positions]
+        cost = sum(costs) if positions and None not in costs else None
+        pnl = total_value - cost if cost is not None else None
+        return {
+            'Positions': len(positions),
+            'Market Value': total_value,
+            'Day Change': day_change,
+            'Day %Change': _percent(day_change, total_value - day_change),
+            'Cost Basis': cost,
+            'Unrealized P&L': pnl,
+            'P&L %': _percent(pnl, cost),
+        }
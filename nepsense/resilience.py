@@ -0,0 +1,175 @@
+"""
+Timeouts, retries and circuit breaking for upstream NEPSE calls
+
+The NEPSE site is often slow or briefly unreachable around the market
+open. NepseClient runs every upstream request through call_with_timeout
+so a hung request cannot stall a batch, retries transient failures with
+jittered exponential backoff (RetryPolicy), and stops calling altogether
+for a while once requests keep failing (CircuitBreaker), falling back to
+stale cached responses where it has them.
+
+Classes:
+    UpstreamUnavailable: NEPSE could not be reached (after retries)
+    UpstreamTimeout: An upstream call took longer than its timeout
+    CircuitOpen: Calls are being refused while the circuit is open
+    RetryPolicy: Number of attempts and backoff between them
+    CircuitBreaker: Fails fast after repeated upstream failures
+
+Functions:
+    is_transient: Whether an error is worth retrying
+    call_with_timeout: Run a blocking call, abandoning it after a timeout
+"""
+
+import random
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional
+
+DEFAULT_CALL_TIMEOUT = 20
+DEFAULT_RETRIES = 2
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30
+
+# Exception class names (from httpx, requests or the nepse library) that mean
+# the request never got a usable answer, so trying again may succeed
+TRANSIENT_NAMES = ('Timeout', 'Connect', 'Network', 'RemoteProtocol', 'ReadError',
+                   'ServerResponse', 'ChunkedEncoding')
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+
+class UpstreamUnavailable(ConnectionError):
+    """Raised when NEPSE cannot be reached, after any retries"""
+
+class UpstreamTimeout(TimeoutError):
+    """Raised when an upstream call does not return within its timeout"""
+
+class CircuitOpen(UpstreamUnavailable):
+    """Raised instead of calling NEPSE while the circuit breaker is open"""
+
+def is_transient(error: BaseException) -> bool:
+    """Whether a failed call may succeed if retried
+
+    Timeouts, connection errors and 408/429/5xx responses are transient;
+    anything else (bad arguments, missing fixtures, parse errors of a
+    valid response) is returned to the caller straight away.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status is None:
+        status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in TRANSIENT_STATUS
+    return any(marker in cls.__name__ for cls in type(error).__mro__ for marker in TRANSIENT_NAMES)
+
+def call_with_timeout(func: Callable[..., Any], timeout: Optional[float], *args) -> Any:
+    """Call func(*args), giving up after timeout seconds
+
+    Blocking network calls cannot be interrupted, so the call runs on a
+    daemon thread that is left to finish (or hang) on its own once the
+    timeout passes; it never holds up interpreter exit.
+
+    Raises:
+        UpstreamTimeout: func did not return in time
+    """
+    if timeout is None:
+        return func(*args)
+
+    from concurrent.futures import Future, TimeoutError as FutureTimeout
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name='nepsense-upstream', daemon=True).start()
+    try:
+        return future.result(timeout)
+    except FutureTimeout:
+        raise UpstreamTimeout(f"no response after {timeout:g}s") from None
+
+class RetryPolicy:
+    """How often and how patiently to retry a transient failure
+
+    Delays grow exponentially from base_delay up to max_delay, with
+    "full jitter" (a uniform draw below the cap) so that many clients
+    failing together do not retry in lockstep.
+
+    Attributes:
+        retries: Extra attempts after the first one
+        base_delay: Cap of the first backoff in seconds
+        max_delay: Largest backoff cap in seconds
+    """
+
+    def __init__(self, retries: int = DEFAULT_RETRIES, base_delay: float = 0.5,
+                 max_delay: float = 8.0, seed: Optional[int] = None):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._random = random.Random(seed)
+
+    def delays(self) -> Iterator[float]:
+        """Backoff before each retry"""
+        for attempt in range(self.retries):
+            yield self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+class CircuitBreaker:
+    """Stop calling an upstream that keeps failing
+
+    After failure_threshold consecutive transient failures the circuit
+    opens and calls fail immediately with CircuitOpen. Once reset_timeout
+    seconds have passed, a single trial call is let through (half open):
+    success closes the circuit, failure opens it again.
+
+    Attributes:
+        failure_threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds to wait before a trial call
+        failures: Current run of consecutive failures
+        opened_at: monotonic() time the circuit opened (None while closed)
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half-open"""
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if self._trial or time.monotonic() - self.opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go ahead"""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            waited = time.monotonic() - self.opened_at
+            if waited >= self.reset_timeout and not self._trial:
+                self._trial = True  # This caller makes the trial call
+                return
+            retry_in = max(0.0, self.reset_timeout - waited)
+        raise CircuitOpen(f"NEPSE unavailable after {self.failure_threshold} consecutive failures "
+                          f"(next attempt in {retry_in:.0f}s)")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
@@ -0,0 +1,316 @@
+"""
+Market-wide screening over one snapshot of every listed symbol
+
+A MarketTable holds the whole market as NumPy columns (one bulk
+live-market response plus sectors from the company list, optionally
+joined with metrics from the local history store), and screen
+expressions such as
+
+    pct_change > 5 and volume > 3 * avg_volume and sector == "Hydro Power"
+
+are parsed once into a tree of vectorized operations, so a condition
+costs one array operation over all symbols rather than a request or a
+Python loop per symbol. Expressions are never passed to eval(): only
+names of columns, numbers, strings, arithmetic, comparisons, and/or/not
+and the functions in FUNCTIONS are accepted.
+
+Classes:
+    ScreenError: Invalid screen or sort expression
+    MarketTable: Columnar market snapshot with screen() and top()
+
+Functions:
+    compile_expression: Parse an expression into a function of the columns
+    expression_names: Column names an expression refers to
+"""
+
+import ast
+import operator
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+
+# Column name -> key in NepseClient.get_live_market rows
+MARKET_FIELDS = {
+    'ltp': 'LTP',
+    'change': 'Change',
+    'pct_change': '%Change',
+    'open': 'Open',
+    'high': 'High',
+    'low': 'Low',
+    'prev_close': 'Prev Close',
+    'volume': 'Volume',
+    'turnover': 'Turnover',
+    'trades': 'Trades',
+}
+ALIASES = {'pct': 'pct_change', 'price': 'ltp', 'close': 'ltp', 'qty': 'volume'}
+
+# Columns joined from the history store (see MarketTable.join_history)
+HISTORY_FIELDS = ('avg_volume', 'rel_volume', 'sma20', 'sma50', 'ema20', 'rsi14', 'macd',
+                  'macd_signal', 'macd_hist', 'bb_middle', 'bb_upper', 'bb_lower', 'vwap20')
+
+# Row label -> column of the rows returned by MarketTable.top
+RANKING_COLUMNS = {'Symbol': 'symbol', 'LTP': 'ltp', 'Change': 'change', '%Change': 'pct_change',
+                   'Open': 'open', 'High': 'high', 'Low': 'low', 'Volume': 'volume',
+                   'Turnover': 'turnover', 'Trades': 'trades'}
+
+# Labels of columns shown in results besides the default ones
+LABELS = {'avg_volume': 'Avg Volume', 'rel_volume': 'Rel Volume', 'prev_close': 'Prev Close',
+          'macd': 'MACD', 'macd_signal': 'MACD Signal', 'macd_hist': 'MACD Hist',
+          'bb_middle': 'BB Middle', 'bb_upper': 'BB Upper', 'bb_lower': 'BB Lower'}
+
+_BINARY = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+           ast.Div: operator.truediv, ast.Mod: operator.mod, ast.Pow: operator.pow}
+_COMPARE = {ast.Gt: operator.gt, ast.GtE: operator.ge, ast.Lt: operator.lt, ast.LtE: operator.le,
+            ast.Eq: operator.eq, ast.NotEq: operator.ne}
+
+def _contains(text: np.ndarray, part: Any) -> np.ndarray:
+    return np.char.find(np.asarray(text, dtype=str), str(part).lower()) >= 0
+
+FUNCTIONS = {
+    'abs': np.abs,
+    'min': np.minimum,
+    'max': np.maximum,
+    'log': np.log,
+    'sqrt': np.sqrt,
+    'contains': _contains,  # contains(sector, "bank"), case-insensitive
+}
+
+class ScreenError(ValueError):
+    """Raised for expressions that cannot be parsed or refer to unknown names"""
+
+Evaluator = Callable[[Dict[str, np.ndarray]], Any]
+
+def _canonical(name: str) -> str:
+    name = name.lower()
+    return ALIASES.get(name, name)
+
+def _parse(expr: str) -> ast.AST:
+    try:
+        return ast.parse(expr.strip(), mode='eval').body
+    except SyntaxError as e:
+        raise ScreenError(f"Invalid expression {expr!r}: {e.msg}") from None
+
+def expression_names(expr: str) -> Set[str]:
+    """Column names (after aliases) an expression refers to"""
+    return {_canonical(node.id) for node in ast.walk(_parse(expr))
+            if isinstance(node, ast.Name) and node.id.lower() not in FUNCTIONS}
+
+def compile_expression(expr: str, known: Optional[Iterable[str]] = None) -> Evaluator:
+    """Parse an expression into a function of a dict of columns
+
+    String comparisons are case-insensitive (text columns are given to
+    the function lowercased, see MarketTable).
+
+    Args:
+        expr: Expression over column names, e.g. "pct_change > 5 and volume > 1e5"
+        known: Valid column names (any name is accepted if omitted)
+
+    Raises:
+        ScreenError: Syntax errors, unsupported constructs or unknown names
+    """
+    known = set(known) if known is not None else None
+
+    def build(node: ast.AST) -> Evaluator:
+        if isinstance(node, ast.BoolOp):
+            parts = [build(value) for value in node.values]
+            reduce = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return lambda cols: reduce.reduce([np.asarray(part(cols), dtype=bool) for part in parts])
+        if isinstance(node, ast.UnaryOp):
+            operand = build(node.operand)
+            if isinstance(node.op, ast.Not):
+                return lambda cols: np.logical_not(operand(cols))
+            if isinstance(node.op, ast.USub):
+                return lambda cols: -operand(cols)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            func, left, right = _BINARY[type(node.op)], build(node.left), build(node.right)
+            return lambda cols: func(left(cols), right(cols))
+        if isinstance(node, ast.Compare):
+            return compare(node)
+        if isinstance(node, ast.Name):
+            name = _canonical(node.id)
+            if known is not None and name not in known:
+                raise ScreenError(f"Unknown column {node.id!r}; available: {', '.join(sorted(known))}")
+            return lambda cols: cols[name]
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)) \
+                and not isinstance(node.value, bool):
+            value = node.value.lower() if isinstance(node.value, str) else node.value
+            return lambda cols: value
+        if isinstance(node, (ast.Tuple, ast.List)):
+            items = [build(item) for item in node.elts]
+            return lambda cols: [item(cols) for item in items]
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) \
+                and node.func.id.lower() in FUNCTIONS and not node.keywords:
+            func, args = FUNCTIONS[node.func.id.lower()], [build(arg) for arg in node.args]
+            return lambda cols: func(*(arg(cols) for arg in args))
+        raise ScreenError(f"Unsupported expression: {ast.unparse(node)!r}")
+
+    def compare(node: ast.Compare) -> Evaluator:
+        operands = [build(node.left)] + [build(right) for right in node.comparators]
+        steps = []
+        for op in node.ops:
+            if isinstance(op, (ast.In, ast.NotIn)):
+                negate = isinstance(op, ast.NotIn)
+                steps.append(lambda a, b, negate=negate: np.isin(a, b) != negate)
+            elif type(op) in _COMPARE:
+                steps.append(_COMPARE[type(op)])
+            else:
+                raise ScreenError(f"Unsupported comparison in {ast.unparse(node)!r}")
+
+        def evaluate(cols):
+            values = [operand(cols) for operand in operands]
+            return np.logical_and.reduce([np.asarray(step(a, b), dtype=bool)
+                                          for step, a, b in zip(steps, values, values[1:])])
+        return evaluate
+
+    return build(_parse(expr))
+
+def _numbers(rows: Sequence[Dict[str, Any]], key: str) -> np.ndarray:
+    values = np.empty(len(rows))
+    for i, row in enumerate(rows):
+        try:
+            values[i] = float(row.get(key))
+        except (TypeError, ValueError):
+            values[i] = np.nan
+    return values
+
+class MarketTable:
+    """One snapshot of the whole market as NumPy columns
+
+    Attributes:
+        columns: Column name -> array (numbers as float, text as str)
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        # Lowercased copies of text columns for case-insensitive comparisons
+        self._lower = {name: np.char.lower(values) for name, values in columns.items()
+                       if values.dtype.kind == 'U'}
+
+    @classmethod
+    def from_rows(cls, market: Sequence[Dict[str, Any]],
+                  companies: Sequence[Dict[str, Any]] = ()) -> 'MarketTable':
+        """Build the table from live-market rows and company list rows
+
+        Args:
+            market: Rows as returned by NepseClient.get_live_market
+            companies: Rows as returned by NepseClient.get_company_list,
+                used for the sector of each symbol
+        """
+        sectors = {str(row.get('Symbol', '')).upper(): row.get('Sector') or '' for row in companies}
+        symbols = [str(row.get('Symbol', '')).upper() for row in market]
+        columns = {
+            'symbol': np.array(symbols, dtype=str),
+            'name': np.array([row.get('Name') or '' for row in market], dtype=str),
+            'sector': np.array([sectors.get(symbol, '') for symbol in symbols], dtype=str),
+        }
+        columns.update((name, _numbers(market, key)) for name, key in MARKET_FIELDS.items())
+        return cls(columns)
+
+    def __len__(self) -> int:
+        return len(self.columns['symbol'])
+
+    def join_history(self, engine: Any):
+        """Add average volume and indicator columns from an IndicatorEngine
+
+        Symbols without stored history get NaN, which fails every
+        comparison, so they drop out of screens that use these columns.
+        """
+        index = {symbol: i for i, symbol in enumerate(engine.symbols)}
+        rows = np.array([index.get(symbol, -1) for symbol in self.columns['symbol']], dtype=np.intp)
+        found = rows >= 0
+
+        def take(values: np.ndarray) -> np.ndarray:
+            column = np.full(len(rows), np.nan)
+            column[found] = values[rows[found]]
+            return column
+
+        for name, values in engine.latest.items():
+            key = name.replace('_', '') if name.startswith(('sma', 'ema', 'rsi', 'vwap')) else name
+            self.columns[key] = take(values)
+        self.columns['avg_volume'] = take(engine.average_volume())
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.columns['rel_volume'] = self.columns['volume'] / self.columns['avg_volume']
+
+    def screen(self, expr: Optional[str] = None, sort: str = 'pct_change', ascending: bool = False,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Symbols matching an expression, sorted
+
+        Args:
+            expr: Filter expression (all symbols if empty)
+            sort: Expression to sort by (NaN values last)
+            ascending: Sort ascending instead of descending
+            limit: Maximum number of rows returned
+
+        Returns:
+            Rows with Symbol, Sector, LTP, Change, %Change, Volume and
+            Turnover, plus any other column the expressions use
+
+        Raises:
+            ScreenError: Invalid expression or unknown column
+        """
+        known = set(self.columns)
+        columns = {**self.columns, **self._lower}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mask = np.ones(len(self), dtype=bool)
+            if expr and expr.strip():
+                mask = np.broadcast_to(np.asarray(compile_expression(expr, known)(columns), dtype=bool),
+                                       mask.shape)
+            keys = np.broadcast_to(np.asarray(compile_expression(sort, known)(self.columns)),
+                                   mask.shape)
+        selected = np.flatnonzero(mask)
+        keys = keys[selected]
+        if keys.dtype.kind == 'f':
+            keys = np.where(np.isnan(keys), np.inf, keys if ascending else -keys)
+            order = np.argsort(keys, kind='stable')
+        else:
+            order = np.argsort(keys, kind='stable')
+            order = order if ascending else order[::-1]
+        selected = selected[order][:limit]
+
+        extra = [name for name in sorted(expression_names(expr or '') | expression_names(sort))
+                 if name in known and name not in ('symbol', 'name', 'sector', 'ltp', 'change',
+                                                   'pct_change', 'volume', 'turnover')]
+        shown = [('Symbol', 'symbol'), ('Sector', 'sector'), ('LTP', 'ltp'), ('Change', 'change'),
+                 ('%Change', 'pct_change'), ('Volume', 'volume'), ('Turnover', 'turnover')]
+        shown += [(LABELS.get(name) or name.upper(), name) for name in extra]
+        return [{label: _value(self.columns[name][i], name in _COUNTS) for label, name in shown}
+                for i in selected]
+
+    def top(self, column: str, count: int, ascending: bool = False) -> List[Dict[str, Any]]:
+        """The symbols with the highest (or lowest) values of a column
+
+        Only symbols with a positive value (negative when ascending) are
+        ranked, so gainers never include unchanged symbols and turnover
+        or volume rankings skip symbols that have not traded. The top
+        count are selected with a partial sort and only those are sorted.
+
+        Args:
+            column: Numeric column, e.g. pct_change or turnover
+            count: Maximum number of rows returned
+            ascending: Rank the lowest values first (e.g. losers)
+
+        Returns:
+            Rows with the RANKING_COLUMNS labels, best first
+        """
+        values = self.columns[column]
+        candidates = np.flatnonzero(values < 0 if ascending else values > 0)
+        keys = values[candidates] if ascending else -values[candidates]
+        if 0 < count < len(candidates):
+            chosen = np.argpartition(keys, count - 1)[:count]
+            candidates, keys = candidates[chosen], keys[chosen]
+        selected = candidates[np.argsort(keys, kind='stable')][:max(count, 0)]
+        return [{label: _value(self.columns[name][i], name in _COUNTS)
+                 for label, name in RANKING_COLUMNS.items()} for i in selected]
+
+_COUNTS = {'volume', 'trades'}
+
+def _value(value: Any, count: bool = False) -> Any:
+    """Plain Python value for a row (NaN becomes None)"""
+    if isinstance(value, np.str_):
+        return str(value)
+    value = float(value)
+    if np.isnan(value):
+        return None
+    return int(value) if count else value
@@ -0,0 +1,298 @@
+"""
+Local HTTP/JSON service for NEPSE market data
+
+This module implements ``priceof serve``: a long-lived asyncio HTTP
+server sharing one NepseClient between all of its callers. Upstream
+responses are kept in memory for a refresh interval (see
+NepseClient(refresh_interval=...)), identical concurrent requests are
+coalesced into a single upstream call, and latency is recorded per
+endpoint, so any number of local tools cost one upstream fetch per
+refresh interval. Symbols missing from the local company index (see
+companies.py) are rejected without an upstream call.
+
+Endpoints (GET, JSON responses):
+    /prices?symbols=NABIL,ADBL  Price rows, in the order requested ({"Symbol",
+                                "error"} for symbols that failed)
+    /index                      NEPSE index
+    /sub-indices                Sub-indices
+    /sectors                    Sector summary
+    /summary                    Market summary
+    /depth?symbol=NABIL         Market depth (404 for an unlisted symbol)
+    /gainers, /losers           Top gainers/losers
+    /turnover, /volume, /transactions
+                                Symbols with the highest turnover, volume
+                                and number of trades
+    /metrics                    Request counts and latency per endpoint
+    /health                     Liveness check
+
+Classes:
+    EndpointMetrics: Request counts and latency samples for one endpoint
+    NepseServer: asyncio HTTP server around a NepseClient
+"""
+
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .companies import load_index, not_listed
+from .nepse_client import error_row
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_REFRESH = 15
+LATENCY_SAMPLES = 1024  # Recent requests kept per endpoint for percentiles
+
+class HTTPError(Exception):
+    """Error returned to the caller with an HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class EndpointMetrics:
+    """Request counts and recent latencies for one endpoint
+
+    Attributes:
+        requests: Requests served
+        errors: Requests that failed upstream (5xx)
+        coalesced: Upstream calls joined while already in flight
+        latencies: Most recent request latencies in seconds
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.coalesced = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, seconds: float, error: bool = False):
+        self.requests += 1
+        self.errors += error
+        self.latencies.append(seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts plus mean/p50/p95/p99/max latency in milliseconds"""
+        samples = sorted(self.latencies)
+        latency = {}
+        if samples:
+            def percentile(q):
+                return samples[min(len(samples) - 1, round(q * (len(samples) - 1)))] * 1000
+            latency = {
+                'mean': round(sum(samples) / len(samples) * 1000, 3),
+                'p50': round(percentile(0.50), 3),
+                'p95': round(percentile(0.95), 3),
+                'p99': round(percentile(0.99), 3),
+                'max': round(samples[-1] * 1000, 3),
+            }
+        return {'requests': self.requests, 'errors': self.errors,
+                'coalesced': self.coalesced, 'latency_ms': latency}
+
+class NepseServer:
+    """Serve NepseClient methods over HTTP
+
+    Client methods block, so they run on a thread pool bounded by the
+    client's max_workers; the event loop only parses requests, joins
+    identical in-flight calls and writes responses.
+
+    Attributes:
+        client: Shared NepseClient (ideally created with a refresh_interval)
+        host, port: Listening address (port 0 picks a free port)
+        metrics: EndpointMetrics per API path
+        companies: Local CompanyIndex the requested symbols are checked against
+    """
+
+    def __init__(self, client, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.client = client
+        self.client.show_progress = False
+        self.host = host
+        self.port = port
+        self.routes: Dict[str, Callable] = {
+            '/prices': self._prices,
+            '/index': lambda query, metrics: self._shared(metrics, ('index',), self.client.get_nepse_index),
+            '/sub-indices': lambda query, metrics: self._shared(metrics, ('sub-indices',),
+                                                                self.client.get_sub_indices),
+            '/sectors': lambda query, metrics: self._shared(metrics, ('sectors',), self.client.get_sector_summary),
+            '/summary': lambda query, metrics: self._shared(metrics, ('summary',), self.client.get_market_summary),
+            '/depth': self._depth,
+            '/gainers': lambda query, metrics: self._shared(metrics, ('gainers',), self.client.get_top_gainers),
+            '/losers': lambda query, metrics: self._shared(metrics, ('losers',), self.client.get_top_losers),
+            '/turnover': lambda query, metrics: self._shared(metrics, ('turnover',), self.client.get_top_turnover),
+            '/volume': lambda query, metrics: self._shared(metrics, ('volume',), self.client.get_top_volume),
+            '/transactions': lambda query, metrics: self._shared(metrics, ('transactions',),
+                                                                 self.client.get_top_transactions),
+        }
+        self.metrics = {path: EndpointMetrics() for path in self.routes}
+        self.companies = load_index()
+        self._index_refresh = None
+        self.started = time.time()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, client.max_workers),
+                                            thread_name_prefix='nepsense-serve')
+
+    async def _shared(self, metrics: EndpointMetrics, key: Hashable, func: Callable, *args) -> Any:
+        """Run func(*args) on the pool, joining an identical call already in flight"""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+            self._inflight[key] = future
+            future.add_done_callback(
+                lambda done: self._inflight.pop(key) if self._inflight.get(key) is done else None)
+        else:
+            metrics.coalesced += 1
+        # Shielded so one caller disconnecting does not cancel the others
+        return await asyncio.shield(future)
+
+    @staticmethod
+    def _symbols(query: Dict[str, List[str]], name: str) -> List[str]:
+        symbols = [symbol.strip().upper() for value in query.get(name, [])
+                   for symbol in value.split(',') if symbol.strip()]
+        if not symbols:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Missing ?{name}= parameter")
+        return list(dict.fromkeys(symbols))
+
+    def _unlisted(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Error rows, with suggestions, for the symbols missing from the company index
+
+        A stale index is refreshed on the pool in the background; requests
+        are checked against the current one meanwhile.
+        """
+        if self.companies.stale and (self._index_refresh is None or self._index_refresh.done()):
+            self._index_refresh = asyncio.get_running_loop().run_in_executor(
+                self._executor, self.companies.refresh, self.client)
+        _, unknown = self.companies.check(symbols)
+        return {symbol: {'Symbol': symbol, 'error': not_listed(close)} for symbol, close in unknown.items()}
+
+    async def _prices(self, query: Dict[str, List[str]], metrics: EndpointMetrics) -> List[Dict[str, Any]]:
+        symbols = self._symbols(query, 'symbols')
+        unlisted = self._unlisted(symbols)
+
+        async def fetch(symbol: str) -> Dict[str, Any]:
+            if symbol in unlisted:
+                return unlisted[symbol]
+            # One shared call per symbol, so overlapping symbol lists reuse each other's fetches
+            return await self._shared(metrics, ('price', symbol), self._price, symbol)
+
+        rows = await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+        return [row for row in rows if row]
+
+    def _price(self, symbol: str) -> Dict[str, Any]:
+        """One symbol's price row, or an error row so the others are still returned"""
+        try:
+            return self.client.get_stock_prices(symbol)
+        except Exception as e:
+            return error_row(symbol, e)
+
+    async def _depth(self, query: Dict[str, List[str]], metrics: EndpointMetrics) -> Dict[str, Any]:
+        symbol = self._symbols(query, 'symbol')[0]
+        unlisted = self._unlisted([symbol])
+        if unlisted:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"{symbol}: {unlisted[symbol]['error']}")
+        return await self._shared(metrics, ('depth', symbol), self.client.get_market_depth, symbol)
+
+    def metrics_report(self) -> Dict[str, Any]:
+        """Uptime, upstream call counts, circuit breaker state and per-endpoint metrics"""
+        return {
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'upstream_calls': self.client.upstream_calls,
+            'stale_responses': self.client.stale_responses,
+            'circuit': self.client.breaker.state,
+            'endpoints': {path: metrics.summary() for path, metrics in self.metrics.items()},
+        }
+
+    async def dispatch(self, method: str, target: str) -> Tuple[int, Any]:
+        """Route one request and return (status, JSON body)"""
+        url = urlsplit(target)
+        path = url.path.rstrip('/') or '/'
+        if path == '/health':
+            return HTTPStatus.OK, {'status': 'ok'}
+        if path == '/metrics':
+            return HTTPStatus.OK, self.metrics_report()
+
+        handler = self.routes.get(path)
+        if handler is None:
+            return HTTPStatus.NOT_FOUND, {'error': f"Unknown endpoint {path}",
+                                          'endpoints': sorted(self.routes) + ['/health', '/metrics']}
+        if method not in ('GET', 'HEAD'):
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': "Only GET is supported"}
+
+        metrics = self.metrics[path]
+        started = time.perf_counter()
+        try:
+            status, body = HTTPStatus.OK, await handler(parse_qs(url.query), metrics)
+        except HTTPError as e:
+            status, body = e.status, {'error': e.message}
+        except Exception as e:
+            status, body = HTTPStatus.BAD_GATEWAY, {'error': f"Upstream request failed: {e}"}
+        metrics.record(time.perf_counter() - started, error=status >= 500)
+        return status, body
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve HTTP/1.x requests on one connection (keep-alive aware)"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': "Malformed request"}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                if headers.get('content-length', '0').isdigit():
+                    await reader.readexactly(int(headers.get('content-length', '0')))  # Ignored
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' or (version == 'HTTP/1.1' and connection != 'close')
+                status, body = await self.dispatch(method.upper(), target)
+                await self._respond(writer, status, body, keep_alive, head=method.upper() == 'HEAD')
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, body: Any, keep_alive: bool,
+                       head: bool = False):
+        payload = json.dumps(body, default=str).encode('utf-8')
+        status = HTTPStatus(status)
+        writer.write((
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        ).encode('latin-1') + (b'' if head else payload))
+        await writer.drain()
+
+    async def serve_forever(self):
+        """Listen and serve until cancelled"""
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        print(f"Serving NEPSE data on http://{self.host}:{self.port} (Ctrl+C to stop)", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        """Serve until interrupted"""
+        try:
+            asyncio.run(self.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
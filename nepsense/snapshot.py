@@ -0,0 +1,94 @@
+"""
+Market-wide snapshot of NEPSE index data
+
+This module bundles the index and sub-index payloads so that every
+market panel (index, sub-indices, sectors, market summary) is derived
+from a single pair of upstream calls.
+
+Classes:
+    MarketSnapshot: Index and sub-index payloads with derived views
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+class MarketSnapshot:
+    """Index and sub-index data fetched together
+
+    Attributes:
+        index_data: Raw getNepseIndex response
+        sub_index_data: Raw getNepseSubIndices response
+    """
+
+    def __init__(self, index_data: Any, sub_index_data: Any):
+        self.index_data = index_data
+        self.sub_index_data = sub_index_data
+
+    @classmethod
+    def fetch(cls, call: Callable[..., Any]) -> 'MarketSnapshot':
+        """Fetch both payloads in parallel
+
+        Args:
+            call: Function taking an API method name (e.g. NepseClient._call)
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            index_future = executor.submit(call, 'getNepseIndex')
+            sub_index_future = executor.submit(call, 'getNepseSubIndices')
+            return cls(index_future.result(), sub_index_future.result())
+
+    def nepse_index(self) -> Dict[str, Any]:
+        """NEPSE index with absolute and percentage change"""
+        data = self.index_data
+        if isinstance(data, list) and data:
+            current = data[0].get('currentValue', 0)
+            prev = data[0].get('previousClose', 0)
+            # Calculate changes
+            change = current - prev if current and prev else 0
+            pct_change = (change / prev * 100) if prev else 0
+
+            return {
+                'index': 'NEPSE',
+                'currentValue': current,
+                'change': change,
+                'perChange': pct_change,
+                'high': data[0].get('high'),
+                'low': data[0].get('low'),
+                'previousClose': data[0].get('previousClose')
+            }
+        return data
+
+    def sub_indices(self) -> List[Dict[str, Any]]:
+        """Sub-index rows (also used for the sector summary)"""
+        data = self.sub_index_data
+        if isinstance(data, list):
+            return [{
+                'Sector': item.get('index', ''),
+                'Value': item.get('currentValue', 0),
+                'Change': item.get('change', 0),
+                '%Change': item.get('perChange', 0)
+            } for item in data]
+        return data
+
+    def market_summary(self) -> Dict[str, Any]:
+        """Turnover, volume and market capitalization totals"""
+        sub_indices = self.sub_index_data if isinstance(self.sub_index_data, list) else []
+        # Total market cap from sub-indices
+        total_market_cap = sum(float(item.get('marketCapitalization', 0))
+                              for item in sub_indices if isinstance(item, dict))
+
+        if isinstance(self.index_data, list) and self.index_data:
+            data = self.index_data[0]
+            return {
+                'Total Turnover': data.get('totalTurnover', 0),
+                'Total Traded Shares': data.get('totalTradedShares', 0),
+                'Total Transactions': data.get('totalTrades', 0),
+                'Total Scripts Traded': data.get('totalScripTraded', 0),
+                'Market Capitalization': total_market_cap
+            }
+        return {
+            'Total Turnover': 0,
+            'Total Traded Shares': 0,
+            'Total Transactions': 0,
+            'Total Scripts Traded': 0,
+            'Market Capitalization': total_market_cap
+        }
@@ -0,0 +1,444 @@
+"""
+Intraday tick log: compact, append-only snapshots of a trading session
+
+``priceof record`` polls the live market (and optionally the order books)
+of a set of symbols at a fixed cadence and appends only the fields that
+changed since the previous poll to one log per session. Records are
+fixed-width, prices are stored as integer paisa and every value as its
+change since the previous record of the same symbol and field, so a
+symbol that did not trade costs nothing and a full session of the whole
+market stays a few MB. Reading decodes a whole log in a few vectorized
+passes.
+
+Layout of a ticks directory:
+    <YYYY-MM-DD>.ticks     HEADER followed by RECORD entries
+    <YYYY-MM-DD>.symbols   symbol of each symbol id, one per line
+
+Records:
+    time      symbol == TIME_SYMBOL; value is the milliseconds since the
+              previous time record (the first one: since the header's
+              start time); the data records after it belong to that poll
+    data      symbol id, field id (index into FIELDS) and the change of
+              the field's integer value since its previous record
+    wide      flags & WIDE: a change that does not fit 32 bits; its upper
+              32 bits are in the next record (symbol == CONTINUATION)
+    missing   flags & MISSING: the field has no value from this poll on
+              (e.g. an empty side of the order book); the change resets
+              its integer value to 0
+
+Classes:
+    TickWriter: Appends polls to one session's tick log
+    TickLog: A decoded tick log with per-symbol series and field panels
+    TickRecorder: Polls a NepseClient at a fixed cadence into tick logs
+
+Functions:
+    tick_dir: Default directory of the tick logs
+    log_path: Tick log of a session date
+"""
+
+import struct
+import sys
+import time
+from datetime import date as Date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .cache import NEPAL_TZ
+from .history import user_data_dir
+
+FORMAT_VERSION = 1
+SUFFIX = '.ticks'
+MAGIC = b'NPSTICK' + bytes([FORMAT_VERSION])
+
+# Magic and the start time in epoch milliseconds
+HEADER = struct.Struct('<8sq')
+
+RECORD = np.dtype([
+    ('symbol', '<u2'),
+    ('field', 'u1'),
+    ('flags', 'u1'),
+    ('value', '<i4'),
+])
+
+TIME_SYMBOL = 0xFFFF
+CONTINUATION = 0xFFFE
+MAX_SYMBOLS = 0xFFFE
+
+WIDE = 1
+MISSING = 2
+
+# Field name -> (row key, integer units per unit of value); the row keys
+# are those of NepseClient.get_live_market rows and DepthBook.rank rows
+FIELDS = {
+    'ltp': ('LTP', 100),
+    'open': ('Open', 100),
+    'high': ('High', 100),
+    'low': ('Low', 100),
+    'volume': ('Volume', 1),
+    'turnover': ('Turnover', 100),
+    'trades': ('Trades', 1),
+    'bid': ('Best Bid', 100),
+    'bid_qty': ('Bid Qty', 1),
+    'ask': ('Best Ask', 100),
+    'ask_qty': ('Ask Qty', 1),
+}
+FIELD_IDS = {name: i for i, name in enumerate(FIELDS)}
+_SCALES = np.array([scale for _, scale in FIELDS.values()], dtype=float)
+
+_UNSEEN = object()  # No record yet for a symbol's field
+
+def tick_dir() -> Path:
+    """Return the default directory of the tick logs"""
+    return user_data_dir() / 'ticks'
+
+def log_path(day: Union[str, Date], root: Optional[Union[str, Path]] = None) -> Path:
+    """Return the tick log of a session date"""
+    return Path(root or tick_dir()) / f"{day}{SUFFIX}"
+
+def _scaled(value: Any, scale: int) -> Optional[int]:
+    """Integer units of a row value (None when missing or not a number)"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return round(value * scale) if value == value else None
+
+def _encode(symbol: int, field: int, flags: int, change: int) -> List[Tuple[int, int, int, int]]:
+    """Records for one change, splitting it over two when it needs 64 bits"""
+    if -2**31 <= change < 2**31:
+        return [(symbol, field, flags, change)]
+    low = change & 0xFFFFFFFF
+    return [(symbol, field, flags | WIDE, low - 2**32 if low >= 2**31 else low),
+            (CONTINUATION, field, 0, change >> 32)]
+
+class TickLog:
+    """One session's tick log, decoded
+
+    Attributes:
+        path: The .ticks file
+        symbols: Symbol of each symbol id
+        start: Epoch seconds of the first poll
+        times: Epoch seconds of every recorded poll
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{self.path}: not a tick log")
+        magic, start_ms = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path}: unsupported tick log format")
+        symbols_path = self.path.with_suffix('.symbols')
+        self.symbols = symbols_path.read_text(encoding='utf-8').split() if symbols_path.exists() else []
+        self._ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        count = (self.path.stat().st_size - HEADER.size) // RECORD.itemsize
+        records = np.fromfile(self.path, dtype=RECORD, count=count, offset=HEADER.size)
+        # A wide change cut off by a torn write is dropped with the rest of its poll
+        wide = np.flatnonzero(records['flags'] & WIDE)
+        if len(wide) and wide[-1] + 1 == len(records):
+            records = records[:wide[-1]]
+            wide = wide[:-1]
+        self.records = len(records)
+
+        values = records['value'].astype(np.int64)
+        values[wide] = values[wide + 1] * 2**32 + (values[wide] & 0xFFFFFFFF)
+        is_time = records['symbol'] == TIME_SYMBOL
+        tick = np.cumsum(is_time) - 1
+        self.start = start_ms / 1000
+        self.times = (start_ms + np.cumsum(values[is_time])) / 1000
+
+        data = ~is_time & (records['symbol'] < len(self.symbols)) & (tick >= 0)
+        key = records['symbol'][data].astype(np.int64) * len(FIELDS) + records['field'][data]
+        # Group records by (symbol, field), each group in poll order, and
+        # undo the delta encoding with one cumulative sum per group
+        order = np.argsort(key, kind='stable')
+        self._key = key[order]
+        self._tick = tick[data][order]
+        self._missing = (records['flags'][data][order] & MISSING) != 0
+        totals = np.cumsum(values[data][order])
+        first = np.flatnonzero(np.r_[True, self._key[1:] != self._key[:-1]] if len(key) else [])
+        before = np.r_[0, totals][first]
+        self._raw = totals - np.repeat(before, np.diff(np.r_[first, len(key)]))
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def _group(self, symbol_id: int, field: int) -> slice:
+        key = symbol_id * len(FIELDS) + field
+        return slice(np.searchsorted(self._key, key, 'left'), np.searchsorted(self._key, key, 'right'))
+
+    def _values(self, group: slice, field: int) -> np.ndarray:
+        return np.where(self._missing[group], np.nan, self._raw[group] / _SCALES[field])
+
+    def series(self, symbol: str, fields: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """A symbol's values at every poll where any of them changed
+
+        Args:
+            symbol: Recorded symbol
+            fields: Names from FIELDS (all of them if omitted)
+
+        Returns:
+            Dict with 'time' (epoch seconds) and one array per field,
+            carrying values forward between changes (NaN before the
+            field's first record or while it is missing)
+
+        Raises:
+            ValueError: Unknown field name
+        """
+        unknown = [name for name in fields or () if name not in FIELD_IDS]
+        if unknown:
+            raise ValueError(f"Unknown tick field(s): {', '.join(unknown)}; available: {', '.join(FIELDS)}")
+        fields = list(fields or FIELDS)
+        symbol_id = self._ids.get(symbol.upper())
+        if symbol_id is None:
+            return {'time': np.zeros(0), **{name: np.zeros(0) for name in fields}}
+
+        groups = {name: self._group(symbol_id, FIELD_IDS[name]) for name in fields}
+        ticks = np.unique(np.concatenate([self._tick[group] for group in groups.values()]))
+        result = {'time': self.times[ticks]}
+        for name, group in groups.items():
+            changed = self._tick[group]
+            if not len(changed):
+                result[name] = np.full(len(ticks), np.nan)
+                continue
+            position = np.searchsorted(changed, ticks, 'right') - 1
+            values = self._values(group, FIELD_IDS[name])
+            result[name] = np.where(position >= 0, values[np.maximum(position, 0)], np.nan)
+        return result
+
+    def panel(self, field: str) -> np.ndarray:
+        """One field of every symbol at every poll, as a (polls, symbols) matrix
+
+        Values are carried forward between changes; NaN before a symbol's
+        first record of the field or while the field is missing.
+        """
+        if field not in FIELD_IDS:
+            raise ValueError(f"Unknown tick field {field!r}; available: {', '.join(FIELDS)}")
+        selected = self._key % len(FIELDS) == FIELD_IDS[field]
+        symbols = self._key[selected] // len(FIELDS)
+        ticks = self._tick[selected]
+        values = np.where(self._missing[selected], np.nan, self._raw[selected] / _SCALES[FIELD_IDS[field]])
+
+        matrix = np.full((len(self.times), len(self.symbols)), np.nan)
+        last = np.full(matrix.shape, -1, dtype=np.int64)
+        matrix[ticks, symbols] = values
+        last[ticks, symbols] = ticks
+        # Forward fill: each cell takes the row of the latest change at or above it
+        last = np.maximum.accumulate(last, axis=0)
+        filled = matrix[np.maximum(last, 0), np.arange(len(self.symbols))]
+        return np.where(last >= 0, filled, np.nan)
+
+    def rows(self, symbol: str) -> List[Dict[str, Any]]:
+        """A symbol's series as rows with Time and the fields it has records for"""
+        series = self.series(symbol)
+        labels = [(name, FIELDS[name][0]) for name in FIELDS
+                  if np.any(~np.isnan(series[name]))]
+        rows = []
+        for i, moment in enumerate(series['time']):
+            row = {'Time': datetime.fromtimestamp(moment, NEPAL_TZ).strftime('%H:%M:%S')}
+            for name, label in labels:
+                value = series[name][i]
+                row[label] = None if value != value else \
+                    int(value) if FIELDS[name][1] == 1 else float(value)
+            rows.append(row)
+        return rows
+
+    def state(self) -> Tuple[Dict[str, int], Dict[Tuple[int, int], Optional[int]], Optional[int]]:
+        """Symbol ids, the latest integer value of every (symbol id, field)
+        (None while missing) and the last poll time in milliseconds, for
+        resuming a TickWriter"""
+        last = np.flatnonzero(np.r_[self._key[1:] != self._key[:-1], True]) if len(self._key) else []
+        values = {(int(self._key[i]) // len(FIELDS), int(self._key[i]) % len(FIELDS)):
+                  None if self._missing[i] else int(self._raw[i]) for i in last}
+        last_ms = round(self.times[-1] * 1000) if len(self.times) else None
+        return dict(self._ids), values, last_ms
+
+class TickWriter:
+    """Appends polls to one session's tick log
+
+    Reopening an existing log resumes it: the values it ends with are
+    read back so that only later changes are appended, and a torn
+    final record is cut off.
+
+    Attributes:
+        path: The .ticks file
+        bytes: Current size of the log
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._symbols_path = self.path.with_suffix('.symbols')
+        self._ids: Dict[str, int] = {}
+        self._last: Dict[Tuple[int, int], Optional[int]] = {}
+        self._start_ms: Optional[int] = None
+        self._time_ms: Optional[int] = None
+        self._labels = [(label, FIELD_IDS[name], scale) for name, (label, scale) in FIELDS.items()]
+
+        if self.path.exists() and self.path.stat().st_size >= HEADER.size:
+            log = TickLog(self.path)
+            self._ids, self._last, self._time_ms = log.state()
+            self._start_ms = round(log.start * 1000)
+            with open(self.path, 'r+b') as f:
+                f.truncate(HEADER.size + log.records * RECORD.itemsize)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._symbols_path.write_text('', encoding='utf-8')
+            open(self.path, 'wb').close()
+        self._file = open(self.path, 'ab')
+        self.bytes = self._file.tell()
+
+    def write(self, timestamp: float, rows: Iterable[Dict[str, Any]]) -> int:
+        """Append one poll
+
+        Args:
+            timestamp: Epoch seconds of the poll
+            rows: Rows with Symbol and any FIELDS row keys; error rows are
+                skipped and keys absent from a row leave the field as is
+
+        Returns:
+            Number of changed fields recorded
+        """
+        records: List[Tuple[int, int, int, int]] = []
+        new_symbols = []
+        for row in rows:
+            symbol = row.get('Symbol')
+            if not symbol or 'error' in row:
+                continue
+            symbol_id = self._ids.get(symbol)
+            if symbol_id is None:
+                if len(self._ids) >= MAX_SYMBOLS:
+                    continue
+                symbol_id = self._ids[symbol] = len(self._ids)
+                new_symbols.append(symbol)
+            for label, field, scale in self._labels:
+                if label not in row:
+                    continue
+                value = _scaled(row[label], scale)
+                last = self._last.get((symbol_id, field), _UNSEEN)
+                if value is None:
+                    if last is None or last is _UNSEEN:
+                        continue
+                    records += _encode(symbol_id, field, MISSING, -last)
+                elif value != last:
+                    base = last if isinstance(last, int) else 0
+                    records += _encode(symbol_id, field, 0, value - base)
+                else:
+                    continue
+                self._last[symbol_id, field] = value
+        if not records:
+            return 0
+
+        moment = round(timestamp * 1000)
+        if self._start_ms is None:
+            self._start_ms = moment
+            self._file.write(HEADER.pack(MAGIC, moment))
+        previous = self._time_ms if self._time_ms is not None else self._start_ms
+        elapsed = max(0, moment - previous)  # Never let a clock step back reorder polls
+        self._time_ms = previous + elapsed
+
+        # Symbols first, so every id in the log is always resolvable
+        if new_symbols:
+            with open(self._symbols_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(f"{symbol}\n" for symbol in new_symbols))
+        self._file.write(np.array(_encode(TIME_SYMBOL, 0, 0, elapsed) + records, dtype=RECORD).tobytes())
+        self._file.flush()
+        self.bytes = self._file.tell()
+        return sum(1 for record in records if record[0] != CONTINUATION)
+
+    def close(self):
+        self._file.close()
+
+class TickRecorder:
+    """Polls a NepseClient at a fixed cadence and records every tick
+
+    Each poll is one live-market request for every symbol (plus one
+    market depth request per symbol with depth=True), written to the
+    log of the current session date.
+
+    Attributes:
+        client: NepseClient kept alive between polls
+        symbols: Recorded symbols (every traded symbol if empty)
+        root: Directory of the tick logs
+        interval: Seconds between polls
+        depth: Whether best bid/ask and their quantities are recorded
+    """
+
+    def __init__(self, client, symbols: Sequence[str] = (), root: Optional[Union[str, Path]] = None,
+                 interval: float = 5.0, depth: bool = False, stream=None):
+        self.client = client
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.root = Path(root) if root else tick_dir()
+        self.interval = interval
+        self.depth = depth
+        self.stream = stream or sys.stderr
+        self._writer: Optional[TickWriter] = None
+        self._day: Optional[Date] = None
+
+        # Every poll must reach NEPSE
+        self.client.show_progress = False
+        if getattr(self.client, 'cache', None) is not None:
+            self.client.cache.refresh = True
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Fetch one snapshot of the recorded symbols"""
+        self.client.reset()
+        market = self.client.get_live_market()
+        wanted = set(self.symbols)
+        rows = {row['Symbol']: dict(row) for row in market if not wanted or row['Symbol'] in wanted}
+        if self.depth:
+            from .depth import DepthBook
+            depths = [row for row in self.client.get_market_depth(self.symbols or list(rows))
+                      if 'error' not in row]
+            for row in DepthBook.from_depths({row['Symbol']: row for row in depths}).rank():
+                rows.setdefault(row['Symbol'], {'Symbol': row['Symbol']}).update(row)
+        return list(rows.values())
+
+    def tick(self) -> int:
+        """Poll once and append the changes to the current session's log"""
+        from .cache import session_date
+        rows = self.poll()
+        day = session_date()
+        if day != self._day:
+            self.close()
+            self._writer, self._day = TickWriter(log_path(day, self.root)), day
+        return self._writer.write(time.time(), rows)
+
+    def run(self, ticks: Optional[int] = None, until_close: bool = False):
+        """Poll until interrupted, for a number of polls or until the market closes
+
+        A poll that fails because NEPSE is unavailable is reported and
+        skipped; recording continues at the next poll.
+        """
+        from .cache import is_market_open
+        from .resilience import UpstreamUnavailable
+        count = 0
+        try:
+            while ticks is None or count < ticks:
+                started = time.monotonic()
+                if until_close and not is_market_open():
+                    break
+                try:
+                    changed = self.tick()
+                    status = (f"{datetime.now(NEPAL_TZ):%H:%M:%S} {changed} change(s), "
+                              f"{self._writer.bytes:,} bytes in {self._writer.path}")
+                except UpstreamUnavailable as e:
+                    status = f"{datetime.now(NEPAL_TZ):%H:%M:%S} skipped: {e}"
+                print(status, file=self.stream, flush=True)
+                count += 1
+                if ticks is not None and count >= ticks:
+                    break
+                time.sleep(max(0, self.interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
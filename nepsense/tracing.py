@@ -0,0 +1,306 @@
+"""
+Structured tracing for NEPSE client calls and rendering
+
+A Tracer times named spans and hands each finished span to its sinks.
+NepseClient opens a span for every upstream request, cache hit and
+client method, and the CLI opens one around every table or output
+dataset, so a run can be broken down by phase. With no sinks attached,
+span() returns a shared no-op span and tracing costs next to nothing.
+
+Phases:
+    upstream: Request sent through the transport (network or fixtures)
+    cache: Response served from the on-disk cache
+    wait: Blocked on upstream requests running in other threads
+    transform: Client method shaping responses into rows
+    render: Printing a table or writing machine-readable output
+
+Classes:
+    Span: One timed operation with its attributes
+    Tracer: Creates spans and dispatches them to sinks
+    StderrSink: One compact line per span on stderr
+    JsonLinesSink: One JSON object per span appended to a file
+    MemorySink: Keeps spans in memory and reports a per-phase breakdown
+
+Functions:
+    payload_size: Size of a response once serialized as compact JSON
+    timed_rows: Stream rows through a span without counting the waits
+"""
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Union
+
+PHASES = ('upstream', 'cache', 'wait', 'transform', 'render')
+_END = object()
+
+def payload_size(data: Any) -> int:
+    """Bytes of data serialized as compact JSON"""
+    return len(json.dumps(data, default=str, separators=(',', ':')).encode('utf-8'))
+
+class Span:
+    """A timed operation
+
+    Spans nest per thread: a span's self_time excludes the time of the
+    spans opened inside it on the same thread, so a client method's
+    transform time does not include its upstream requests.
+
+    Attributes:
+        name: Operation (e.g. an API method or a dataset)
+        phase: One of PHASES
+        attrs: Extra fields (args, bytes, cache, rows, error, ...)
+        start: Wall-clock start time (seconds since the epoch)
+        duration: Elapsed seconds, excluding paused time
+        self_time: duration minus nested spans on the same thread
+        thread: Name of the thread the span ran on
+    """
+
+    def __init__(self, tracer: 'Tracer', name: str, phase: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.phase = phase
+        self.attrs = attrs
+        self.start = 0.0
+        self.duration = 0.0
+        self.self_time = 0.0
+        self.thread = ''
+        self._started = 0.0
+        self._nested = 0.0
+        self._paused = 0.0
+        self._parent: Optional[Span] = None
+
+    def set(self, **attrs):
+        """Add attributes to the span"""
+        self.attrs.update(attrs)
+
+    @contextmanager
+    def pause(self):
+        """Exclude the enclosed block (e.g. waiting for input) from the span"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._paused += time.perf_counter() - started
+
+    def __enter__(self) -> 'Span':
+        stack = self.tracer._stack()
+        self._parent = stack[-1] if stack else None
+        stack.append(self)
+        self.thread = threading.current_thread().name
+        self.start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._started - self._paused
+        self.self_time = max(0.0, self.duration - self._nested)
+        self.tracer._stack().pop()
+        if self._parent is not None:
+            self._parent._nested += self.duration
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer._emit(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready record of the span (times in milliseconds)"""
+        return {
+            'name': self.name,
+            'phase': self.phase,
+            'start': datetime.fromtimestamp(self.start).isoformat(timespec='milliseconds'),
+            'duration_ms': round(self.duration * 1000, 3),
+            'self_ms': round(self.self_time * 1000, 3),
+            'thread': self.thread,
+            **self.attrs,
+        }
+
+class _NullSpan:
+    """Span stand-in used while no sink is attached"""
+
+    def set(self, **attrs):
+        pass
+
+    @contextmanager
+    def pause(self):
+        yield
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Tracer:
+    """Create spans and pass finished ones to sinks
+
+    Attributes:
+        sinks: Objects with emit(span) and close()
+    """
+
+    def __init__(self, sinks: Iterable[Any] = ()):
+        self.sinks = list(sinks)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether spans are recorded (callers can skip costly attributes)"""
+        return bool(self.sinks)
+
+    def span(self, name: str, phase: str, **attrs) -> Union[Span, _NullSpan]:
+        """Context manager timing one operation
+
+        Args:
+            name: Operation name
+            phase: One of PHASES
+            **attrs: Extra fields recorded with the span
+        """
+        if not self.sinks:
+            return _NULL_SPAN
+        return Span(self, name, phase, attrs)
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _emit(self, span: Span):
+        with self._lock:
+            for sink in self.sinks:
+                sink.emit(span)
+
+    def close(self):
+        """Flush and close all sinks"""
+        for sink in self.sinks:
+            sink.close()
+
+def _describe(span: Span) -> str:
+    args = span.attrs.get('args')
+    if args is None:
+        return span.name
+    text = ', '.join(map(repr, args))
+    return f"{span.name}({text if len(text) <= 60 else text[:57] + '...'})"
+
+class StderrSink:
+    """Print one line per span, e.g.
+
+    12:01:02.345 upstream  getCompanyDetails('NABIL')  183.2 ms  4.1 KB miss
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream or sys.stderr
+
+    def emit(self, span: Span):
+        extra = []
+        if 'bytes' in span.attrs:
+            extra.append(f"{span.attrs['bytes'] / 1024:.1f} KB")
+        for key in ('cache', 'rows', 'error'):
+            if key in span.attrs:
+                extra.append(f"{key}={span.attrs[key]}" if key != 'cache' else span.attrs[key])
+        timestamp = datetime.fromtimestamp(span.start).strftime('%H:%M:%S.%f')[:-3]
+        print(f"{timestamp} {span.phase:9} {_describe(span)}  {span.self_time * 1000:.1f} ms  "
+              f"{' '.join(map(str, extra))}".rstrip(), file=self.stream)
+
+    def close(self):
+        self.stream.flush()
+
+class JsonLinesSink:
+    """Append one JSON object per span to a file"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def emit(self, span: Span):
+        self._file.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def close(self):
+        self._file.close()
+
+class MemorySink:
+    """Keep finished spans and summarize them by phase
+
+    Attributes:
+        spans: Spans in the order they finished
+        started: perf_counter() value when the sink was created
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.started = time.perf_counter()
+
+    def emit(self, span: Span):
+        self.spans.append(span)
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _stats(times: List[float]) -> Dict[str, float]:
+        times = sorted(times)
+        return {
+            'count': len(times),
+            'total_ms': round(sum(times) * 1000, 3),
+            'mean_ms': round(sum(times) / len(times) * 1000, 3),
+            'p95_ms': round(times[min(len(times) - 1, round(0.95 * (len(times) - 1)))] * 1000, 3),
+            'max_ms': round(times[-1] * 1000, 3),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Wall time plus self-time statistics per phase and per upstream method"""
+        phases: Dict[str, List[float]] = {}
+        methods: Dict[str, List[float]] = {}
+        payload = 0
+        for span in self.spans:
+            phases.setdefault(span.phase, []).append(span.self_time)
+            if span.phase == 'upstream':
+                methods.setdefault(span.name, []).append(span.self_time)
+                payload += span.attrs.get('bytes', 0)
+        order = {phase: i for i, phase in enumerate(PHASES)}
+        return {
+            'wall_ms': round((time.perf_counter() - self.started) * 1000, 3),
+            'upstream_bytes': payload,
+            'phases': {phase: self._stats(phases[phase])
+                       for phase in sorted(phases, key=lambda p: order.get(p, len(order)))},
+            'upstream': {method: self._stats(times) for method, times in sorted(methods.items())},
+        }
+
+    def report(self, stream: Optional[TextIO] = None):
+        """Print the per-phase latency breakdown"""
+        stream = stream or sys.stderr
+        summary = self.summary()
+        header = f"{'':20} {'spans':>6} {'total ms':>10} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}"
+
+        def line(name, stats):
+            return (f"{name:20} {stats['count']:6} {stats['total_ms']:10.1f} {stats['mean_ms']:9.1f} "
+                    f"{stats['p95_ms']:9.1f} {stats['max_ms']:9.1f}")
+
+        print(f"\nProfile: {summary['wall_ms']:.1f} ms wall, "
+              f"{summary['upstream_bytes'] / 1024:.1f} KB from upstream "
+              f"(parallel spans are summed, so totals can exceed wall time)", file=stream)
+        if not summary['phases']:
+            print("No spans recorded", file=stream)
+            return
+        print(header, file=stream)
+        for phase, stats in summary['phases'].items():
+            print(line(phase, stats), file=stream)
+        if summary['upstream']:
+            print("\nupstream by method", file=stream)
+            for method, stats in summary['upstream'].items():
+                print(line(method, stats), file=stream)
+
+def timed_rows(span: Union[Span, _NullSpan], rows: Iterable[Any]) -> Iterator[Any]:
+    """Yield rows, excluding the time spent waiting for each from the span"""
+    rows = iter(rows)
+    while True:
+        with span.pause():
+            row = next(rows, _END)
+        if row is _END:
+            return
+        yield row
@@ -0,0 +1,182 @@
+"""
+Transports carrying NepseClient's upstream calls
+
+NepseClient never talks to the NEPSE site directly: every upstream call
+goes through a transport's ``call(method, *args)``, where method is the
+name of a NepseBase method (e.g. "getCompanyDetails") or FLOORSHEET_PAGE.
+Swapping the transport lets the client run against recorded fixtures,
+so batch fetching, caching and formatting can be benchmarked and tested
+deterministically without a network. A transport that stores responses
+also answers ``size(method, *args)`` with the stored bytes, which traces
+report instead of serializing the response again.
+
+Classes:
+    LiveTransport: Calls the NEPSE API through the nepse library
+    RecordingTransport: Wraps a transport and saves every response to disk
+    ReplayTransport: Serves saved responses with optional latency and jitter
+    FixtureNotFound: No recorded response for a replayed call
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Union
+
+from .cache import ResponseCache
+
+if TYPE_CHECKING:
+    from nepse import Nepse as NepseBase
+
+FLOORSHEET_PAGE = 'floorsheetPage'  # Args: (page, size)
+
+class FixtureNotFound(LookupError):
+    """Raised when a replayed call was never recorded"""
+
+class LiveTransport:
+    """Transport calling the live NEPSE API
+
+    Attributes:
+        client: Underlying NEPSE API client (created on first call)
+    """
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> 'NepseBase':
+        """Underlying NEPSE API client, created lazily so cache hits skip it"""
+        with self._lock:
+            if self._client is None:
+                from nepse import Nepse as NepseBase
+                self._client = NepseBase()
+                self._client.setTLSVerification(False)  # Required until NEPSE fixes SSL
+            return self._client
+
+    def call(self, method: str, *args) -> Any:
+        if method == FLOORSHEET_PAGE:
+            return self._floorsheet_page(*args)
+        return getattr(self.client, method)(*args)
+
+    def _floorsheet_page(self, page: int, size: int) -> Dict[str, Any]:
+        """Fetch one page of today's floorsheet
+
+        Pages are requested in ascending contract order so that trades
+        added while downloading land on later pages and a resumed download
+        does not shift the pages already written.
+        """
+        url = (f"{self.client.api_end_points['floor_sheet']}"
+               f"?&size={size}&sort=contractId,asc&page={page}")
+        sheet = self.client.requestPOSTAPI(url=url, payload_generator=self.client.getPOSTPayloadIDForFloorSheet)
+        return sheet['floorsheets']
+
+def _fixture_path(directory: Path, method: str, args: Tuple[Any, ...]) -> Path:
+    return directory / method / f"{ResponseCache.key(method, args)}.json"
+
+class RecordingTransport:
+    """Pass calls through to another transport, saving each response
+
+    Responses are written as directory/<method>/<key>.json holding the
+    method, its arguments and the raw response, ready for ReplayTransport.
+
+    Attributes:
+        inner: Transport actually serving the calls
+        directory: Where fixtures are written
+    """
+
+    def __init__(self, inner: Any, directory: Union[str, Path]):
+        self.inner = inner
+        self.directory = Path(directory)
+
+    @property
+    def client(self) -> 'NepseBase':
+        return self.inner.client
+
+    def call(self, method: str, *args) -> Any:
+        result = self.inner.call(method, *args)
+        path = _fixture_path(self.directory, method, args)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'method': method, 'args': list(args), 'data': result}, f, default=str)
+        os.replace(tmp, path)
+        return result
+
+    def size(self, method: str, *args) -> Optional[int]:
+        """Bytes of the fixture written for a call"""
+        try:
+            return _fixture_path(self.directory, method, args).stat().st_size
+        except OSError:
+            return None
+
+class ReplayTransport:
+    """Serve recorded responses instead of calling NEPSE
+
+    Each call sleeps for `latency` seconds, plus or minus a uniformly
+    drawn `jitter`, before returning, to mimic the live site. The jitter
+    sequence is seeded so runs are repeatable.
+
+    Attributes:
+        directory: Directory written by RecordingTransport
+        latency: Mean delay per call in seconds
+        jitter: Maximum deviation from the mean delay in seconds
+        any_args: Answer calls whose arguments were not recorded with a
+            recording of the same method (e.g. to fan out over more
+            symbols than were captured)
+    """
+
+    def __init__(self, directory: Union[str, Path], latency: float = 0.0, jitter: float = 0.0,
+                 seed: Optional[int] = 0, any_args: bool = False):
+        self.directory = Path(directory)
+        self.latency = latency
+        self.jitter = jitter
+        self.any_args = any_args
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._responses: Dict[Path, Any] = {}
+        if not self.directory.is_dir():
+            raise FileNotFoundError(f"Fixture directory not found: {self.directory}")
+
+    def _delay(self):
+        if not (self.latency or self.jitter):
+            return
+        with self._lock:
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, delay))
+
+    def _load(self, path: Path) -> Any:
+        with self._lock:
+            if path in self._responses:
+                return self._responses[path]
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)['data']
+        with self._lock:
+            self._responses[path] = data
+        return data
+
+    def _path(self, method: str, args: Tuple[Any, ...]) -> Path:
+        """Fixture answering a call"""
+        path = _fixture_path(self.directory, method, args)
+        if not path.exists() and self.any_args:
+            recorded = sorted((self.directory / method).glob('*.json')) if (self.directory / method).is_dir() else []
+            if recorded:
+                # Same arguments always map to the same recording
+                path = recorded[int(ResponseCache.key(method, args), 16) % len(recorded)]
+        if not path.exists():
+            raise FixtureNotFound(f"No recorded response for {method}({', '.join(map(repr, args))})")
+        return path
+
+    def call(self, method: str, *args) -> Any:
+        path = self._path(method, args)
+        self._delay()
+        return self._load(path)
+
+    def size(self, method: str, *args) -> Optional[int]:
+        """Bytes of the fixture replayed for a call"""
+        try:
+            return self._path(method, args).stat().st_size
+        except (FixtureNotFound, OSError):
+            return None
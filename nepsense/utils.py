@@ -4,22 +4,273 @@ Utility functions for NEPSE market data handling
 This module provides common utility functions used across the package
 for data processing, formatting, and display.
 
+Classes:
+    SingleFlight: Coalesces repeated and concurrent calls for the same key
+    LazyModule: Module proxy that imports on first attribute access
+
 Functions:
+    lazy_import: Defer importing a heavy module until it is used
+    iter_fetch: Bounded-concurrency fetch yielding results as they complete
+    fetch_many: Bounded-concurrency fetch preserving input order
     with_progress: Progress bar decorator for long operations
 """
 
+import importlib
 import sys
+import time
+import threading
+import types
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
 from functools import wraps
-from tqdm import tqdm
+from typing import Any, Callable, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
+
+DEFAULT_MAX_WORKERS = 8
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is imported on first attribute access"""
+    
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def __getattr__(self, attr: str) -> Any:
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_module'] = module
+        return getattr(module, attr)
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Return the module if already loaded, otherwise a LazyModule proxy
+    
+    Keeps heavy dependencies such as pandas off the startup path of
+    commands that never touch them (e.g. `priceof --help`).
+    """
+    return sys.modules.get(name) or LazyModule(name)
+
+class SingleFlight:
+    """Coalesce calls that share a key
+    
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for the same result, and later callers get the stored
+    result until it expires or clear() is called. Failures are not stored,
+    so the next caller retries.
+    
+    Attributes:
+        ttl: Seconds a stored result is served (a number or a callable
+            returning one when the result is stored); None keeps results
+            until clear()
+    """
+    
+    def __init__(self, ttl: Union[float, Callable[[], float], None] = None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._results = {}
+        self._inflight = {}
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Return func() for key, running it at most once per key (and ttl)"""
+        with self._lock:
+            if key in self._results:
+                result, expires = self._results[key]
+                if expires is None or expires > time.monotonic():
+                    return result
+                del self._results[key]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        ttl = self.ttl() if callable(self.ttl) else self.ttl
+        with self._lock:
+            self._results[key] = (result, None if ttl is None else time.monotonic() + ttl)
+            self._inflight.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def forget(self, key: Hashable):
+        """Drop the stored result for key"""
+        with self._lock:
+            self._results.pop(key, None)
+
+    def clear(self):
+        """Drop all stored results (in-flight calls are unaffected)"""
+        with self._lock:
+            self._results.clear()
+
+def iter_fetch(func: Callable[[Any], Any], items: Iterable[Any],
+               max_workers: int = DEFAULT_MAX_WORKERS,
+               timeout: Optional[float] = None,
+               desc: str = "Fetching data",
+               show_progress: bool = True,
+               deadline: Optional[float] = None,
+               on_error: Optional[Callable[[Any, Exception], Any]] = None) -> Iterator[Tuple[int, Any]]:
+    """Call func for every item using a bounded thread pool, yielding as calls finish
+    
+    Calls running longer than the timeout, and calls still pending when
+    the batch deadline passes, are abandoned. Without on_error a warning
+    is printed to stderr for them, nothing is yielded, and a call raising
+    an exception aborts the batch.
+    
+    Args:
+        func: Callable taking a single item
+        items: Items to fetch (e.g. symbols)
+        max_workers: Maximum number of calls in flight
+        timeout: Optional per-call timeout in seconds
+        desc: Description to show in the progress bar
+        show_progress: Show the progress bar (only ever shown on a TTY)
+        deadline: Optional time budget in seconds for the whole batch
+        on_error: Optional callable(item, exception) whose return value is
+            yielded in place of a result for calls that failed or were
+            abandoned (with a TimeoutError), so the batch always completes
+        
+    Yields:
+        (index of the item, result) in completion order
+    """
+    items = list(items)
+    if not items:
+        return
 
-def with_progress(desc="Fetching data"):
-    """Decorator to show progress bar during function execution"""
+    from tqdm import tqdm
+
+    started = {}
+    batch_started = time.monotonic()
+    futures = [Future() for _ in items]
+    queue = deque(range(len(items)))
+    lock = threading.Lock()
+
+    def worker():
+        # Daemon threads rather than a ThreadPoolExecutor, whose workers are
+        # joined at exit: an abandoned call must not keep the process alive
+        while True:
+            with lock:
+                if not queue:
+                    return
+                index = queue.popleft()
+            future = futures[index]
+            if not future.set_running_or_notify_cancel():
+                continue
+            started[index] = time.monotonic()
+            try:
+                future.set_result(func(items[index]))
+            except BaseException as e:
+                future.set_exception(e)
+
+    for _ in range(max(1, min(max_workers, len(items)))):
+        threading.Thread(target=worker, name='nepsense-fetch', daemon=True).start()
+    try:
+        with tqdm(total=len(items), desc=desc, leave=False,
+                  disable=not (show_progress and sys.stdout.isatty())) as pbar:
+            pending = {future: i for i, future in enumerate(futures)}
+
+            def abandon(future, message):
+                index = pending.pop(future)
+                future.cancel()
+                pbar.update(1)
+                if on_error is None:
+                    print(f"Warning: {items[index]} {message}", file=sys.stderr)
+                    return None
+                return index, on_error(items[index], TimeoutError(message))
+
+            while pending:
+                wait_for = None
+                now = time.monotonic()
+                if timeout is not None:
+                    deadlines = [started[i] + timeout for i in pending.values() if i in started]
+                    wait_for = max(0, min(deadlines) - now) if deadlines else timeout
+                if deadline is not None:
+                    remaining = max(0, batch_started + deadline - now)
+                    wait_for = remaining if wait_for is None else min(wait_for, remaining)
+
+                done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    pbar.update(1)
+                    if on_error is None:
+                        yield index, future.result()
+                        continue
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = on_error(items[index], e)
+                    yield index, result
+
+                now = time.monotonic()
+                abandoned = []
+                if timeout is not None:
+                    abandoned += [abandon(future, f"timed out after {timeout}s")
+                                  for future, index in list(pending.items())
+                                  if index in started and now - started[index] > timeout]
+                if deadline is not None and now >= batch_started + deadline:
+                    abandoned += [abandon(future, f"not fetched within the {deadline}s deadline")
+                                  for future in list(pending)]
+                for marker in abandoned:
+                    if marker is not None:
+                        yield marker
+    finally:
+        for future in futures:
+            future.cancel()  # Calls not started yet are skipped
+
+def fetch_many(func: Callable[[Any], Any], items: Iterable[Any],
+               max_workers: int = DEFAULT_MAX_WORKERS,
+               timeout: Optional[float] = None,
+               desc: str = "Fetching data",
+               show_progress: bool = True,
+               deadline: Optional[float] = None,
+               on_error: Optional[Callable[[Any, Exception], Any]] = None) -> List[Any]:
+    """Call func for every item using a bounded thread pool
+    
+    Results are returned in input order while the progress bar advances
+    as individual calls complete. Calls running longer than the timeout
+    or past the batch deadline are abandoned and their slot in the result
+    list is left as None (or filled by on_error, see iter_fetch).
+    
+    Args:
+        func: Callable taking a single item
+        items: Items to fetch (e.g. symbols)
+        max_workers: Maximum number of calls in flight
+        timeout: Optional per-call timeout in seconds
+        desc: Description to show in the progress bar
+        show_progress: Show the progress bar (only ever shown on a TTY)
+        deadline: Optional time budget in seconds for the whole batch
+        on_error: Optional callable(item, exception) producing the result
+            of a failed or abandoned call instead of raising
+        
+    Returns:
+        List of results aligned with items
+    """
+    items = list(items)
+    results = [None] * len(items)
+    for index, result in iter_fetch(func, items, max_workers, timeout, desc, show_progress,
+                                    deadline, on_error):
+        results[index] = result
+    return results
+
+def with_progress(desc="Fetching data", on_error: Optional[Callable[[Any, Exception], Any]] = None):
+    """Decorator to fetch a list of symbols concurrently with a progress bar
+    
+    Single symbols are passed straight through. Lists are fanned out via
+    fetch_many, honouring the instance's max_workers, timeout, deadline
+    and show_progress settings, and empty results are dropped. With
+    on_error, symbols that fail or miss the deadline are returned as
+    on_error(symbol, exception) instead of aborting the whole list.
+    """
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            if not sys.stdout.isatty():
-                return func(*args, **kwargs)
-
             # Get the symbols argument
             symbols = args[1] if len(args) > 1 else []
             
@@ -27,16 +278,19 @@ def with_progress(desc="Fetching data"):
             if isinstance(symbols, str):
                 return func(*args, **kwargs)
                 
-            # For list of symbols, handle iteration here
-            results = []
-            with tqdm(total=len(symbols), desc=desc, leave=False) as pbar:
-                for symbol in symbols:
-                    # Call the function with one symbol at a time
-                    result = func(args[0], symbol)
-                    if result:
-                        results.append(result)
-                    pbar.update(1)
-                return results
+            # For list of symbols, fan out one call per symbol
+            self = args[0]
+            results = fetch_many(
+                lambda symbol: func(self, symbol),
+                symbols,
+                max_workers=getattr(self, 'max_workers', DEFAULT_MAX_WORKERS),
+                timeout=getattr(self, 'timeout', None),
+                desc=desc,
+                show_progress=getattr(self, 'show_progress', True),
+                deadline=getattr(self, 'deadline', None),
+                on_error=on_error
+            )
+            return [result for result in results if result]
 
         return wrapper
-    return decorator 
\ No newline at end of file
+    return decorator
@@ -0,0 +1,267 @@
+"""
+Live terminal dashboard for NEPSE market data
+
+This module implements ``priceof --watch``: one NepseClient is kept alive
+and polled at a fixed interval, each view is diffed against the previous
+tick and only rows that changed are redrawn in place. Changed prices are
+briefly highlighted (green background when up, red when down).
+
+Classes:
+    View: Description of a watched table
+    Watcher: Polls views and redraws changed rows
+"""
+
+import shutil
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from colorama import Back, Fore, Style
+
+# Column spec: (header, row field, kind)
+Column = Tuple[str, str, str]
+
+PRICE_COLUMNS = [
+    ('Symbol', 'Symbol', 'text'), ('LTP', 'LTP', 'price'), ('Change', 'change', 'change'),
+    ('%Change', '%change', 'pct'), ('Open', 'Open', 'price'), ('High', 'High', 'price'),
+    ('Low', 'Low', 'price'), ('Volume', 'Volume', 'int'), ('Turnover', 'Turnover', 'amount'),
+    ('Prev Close', 'Prev Close', 'price')
+]
+INDEX_COLUMNS = [
+    ('Index', 'index', 'text'), ('Value', 'currentValue', 'price'), ('Change', 'change', 'change'),
+    ('%Change', 'perChange', 'pct'), ('High', 'high', 'price'), ('Low', 'low', 'price'),
+    ('Prev Close', 'previousClose', 'price')
+]
+SECTOR_COLUMNS = [
+    ('Sector', 'Sector', 'text'), ('Value', 'Value', 'amount'), ('Change', 'Change', 'change'),
+    ('%Change', '%Change', 'pct')
+]
+SUMMARY_COLUMNS = [
+    (name, name, 'amount') for name in ('Total Turnover', 'Total Traded Shares', 'Total Transactions',
+                                        'Total Scripts Traded', 'Market Capitalization')
+]
+TOP_COLUMNS = [
+    ('Symbol', 'Symbol', 'text'), ('LTP', 'LTP', 'price'), ('Change', 'Change', 'change'),
+    ('%Change', '%Change', 'pct'), ('Volume', 'Volume', 'int'), ('Turnover', 'Turnover', 'amount'),
+    ('Trades', 'Trades', 'int')
+]
+PORTFOLIO_COLUMNS = [
+    ('Symbol', 'Symbol', 'text'), ('Quantity', 'Quantity', 'int'), ('LTP', 'LTP', 'price'),
+    ('Market Value', 'Market Value', 'amount'), ('Day Change', 'Day Change', 'change'),
+    ('Day %Change', 'Day %Change', 'pct'), ('Unrealized P&L', 'Unrealized P&L', 'amount'),
+    ('P&L %', 'P&L %', 'amount'), ('Weight %', 'Weight %', 'amount')
+]
+
+def format_cell(value: Any, kind: str) -> str:
+    """Format a value for display according to its column kind"""
+    if value is None or value == '':
+        return ''
+    if kind == 'text':
+        return str(value)
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    if kind == 'int':
+        return f"{number:,.0f}"
+    if kind == 'amount':
+        return f"{number:,.2f}"
+    if kind == 'change':
+        return f"{number:+.2f}"
+    if kind == 'pct':
+        return f"{number:+.2f}%"
+    return f"{number:.2f}"
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+class View:
+    """A table shown in watch mode
+
+    Attributes:
+        title: Heading printed above the table
+        fetch: Callable returning the current rows (list or single dict)
+        columns: Column specs as (header, field, kind)
+        key: Field identifying a row across ticks (None keys rows by position)
+        change_field: Field whose sign colors the change columns
+        flash_field: Field highlighted when its value moves
+    """
+
+    def __init__(self, title: str, fetch: Callable[[], Any], columns: Sequence[Column],
+                 key: Optional[str] = None, change_field: Optional[str] = None,
+                 flash_field: Optional[str] = None):
+        self.title = title
+        self.fetch = fetch
+        self.columns = list(columns)
+        self.key = key
+        self.change_field = change_field
+        self.flash_field = flash_field
+
+    def rows(self) -> List[Dict[str, Any]]:
+        data = self.fetch()
+        if not data:
+            return []
+        return data if isinstance(data, list) else [data]
+
+    def row_key(self, position: int, row: Dict[str, Any]) -> Any:
+        return row.get(self.key) if self.key else position
+
+class Watcher:
+    """Poll views at an interval and redraw only what changed
+
+    The first tick (and any tick where rows are added, removed, reordered
+    or outgrow their column) draws every table. Other ticks only rewrite
+    the terminal lines of rows whose data differs from the previous tick.
+
+    Attributes:
+        client: NepseClient kept alive between ticks
+        views: Views to poll
+        interval: Seconds between ticks
+    """
+
+    SLACK = 2  # Spare column width so small changes don't force a full redraw
+
+    def __init__(self, client, views: Sequence[View], interval: float, stream=None):
+        self.client = client
+        self.views = list(views)
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self.style = {'up': Fore.GREEN, 'down': Fore.RED, 'neutral': Fore.CYAN, 'reset': Style.RESET_ALL}
+        self._rows: Dict[int, List[Dict[str, Any]]] = {}
+        self._widths: Dict[int, List[int]] = {}
+        self._lines: Dict[Tuple[int, Any], int] = {}
+        self._flashed: set = set()
+        self._status_line = 0
+
+        # Keep one session alive; skip cached reads so each tick is live
+        self.client.show_progress = False
+        if getattr(self.client, 'cache', None) is not None:
+            self.client.cache.refresh = True
+
+    def run(self, ticks: Optional[int] = None):
+        """Poll until interrupted (or for a number of ticks)"""
+        count = 0
+        try:
+            while ticks is None or count < ticks:
+                started = time.monotonic()
+                self.tick()
+                count += 1
+                if ticks is not None and count >= ticks:
+                    break
+                time.sleep(max(0, self.interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self._status_line:
+                self._write(f"\x1b[{self._status_line + 1};1H")
+            self.stream.flush()
+
+    def tick(self):
+        """Fetch every view once and update the screen"""
+        self.client.reset()
+        fresh = {index: view.rows() for index, view in enumerate(self.views)}
+
+        if self._rows and self._status_line and not self._needs_full_redraw(fresh):
+            changed = self._partial_redraw(fresh)
+        else:
+            self._full_redraw(fresh)
+            changed = sum(len(rows) for rows in fresh.values())
+
+        self._rows = fresh
+        status = (f"Updated {datetime.now().strftime('%H:%M:%S')} - {changed} row(s) changed, "
+                  f"every {self.interval:g}s (Ctrl+C to quit)")
+        if self._status_line:
+            self._write(f"\x1b[{self._status_line};1H\x1b[K{status}")
+        else:
+            self._write(status + "\n")
+        self.stream.flush()
+
+    def _cells(self, view: View, row: Dict[str, Any]) -> List[str]:
+        return [format_cell(row.get(field), kind) for _, field, kind in view.columns]
+
+    def _needs_full_redraw(self, fresh: Dict[int, List[Dict[str, Any]]]) -> bool:
+        for index, view in enumerate(self.views):
+            old, new = self._rows.get(index, []), fresh[index]
+            if len(old) != len(new):
+                return True
+            if [view.row_key(i, r) for i, r in enumerate(old)] != [view.row_key(i, r) for i, r in enumerate(new)]:
+                return True
+            widths = self._widths[index]
+            for old_row, new_row in zip(old, new):
+                if old_row != new_row and any(len(c) > w for c, w in zip(self._cells(view, new_row), widths)):
+                    return True
+        return False
+
+    def _line(self, view: View, widths: List[int], row: Dict[str, Any],
+              previous: Optional[Dict[str, Any]] = None) -> str:
+        change = _number(row.get(view.change_field)) if view.change_field else 0
+        direction = self.style['up'] if change > 0 else self.style['down'] if change < 0 else ''
+
+        parts = []
+        for (_, field, kind), width, cell in zip(view.columns, widths, self._cells(view, row)):
+            text = cell.ljust(width)
+            color = direction if kind in ('change', 'pct') else ''
+            if previous is not None and field == view.flash_field and row.get(field) != previous.get(field):
+                moved = _number(row.get(field)) - _number(previous.get(field))
+                color = (Back.GREEN if moved > 0 else Back.RED) + Fore.WHITE
+            parts.append(f"{color}{text}{self.style['reset']}" if color else text)
+        return "| " + " | ".join(parts) + " |"
+
+    def _full_redraw(self, fresh: Dict[int, List[Dict[str, Any]]]):
+        lines = []
+        self._lines.clear()
+        self._flashed.clear()
+        for index, view in enumerate(self.views):
+            rows = fresh[index]
+            widths = [len(header) for header, _, _ in view.columns]
+            for row in rows:
+                widths = [max(w, len(c)) for w, c in zip(widths, self._cells(view, row))]
+            widths = [w + self.SLACK for w in widths]
+            self._widths[index] = widths
+
+            border = "+" + "+".join("-" * (w + 2) for w in widths) + "+"
+            lines.append("")
+            lines.append(f"{self.style['neutral']}{view.title}{self.style['reset']}")
+            if not rows:
+                lines.append(f"No {view.title} data available")
+                continue
+            lines.append(border)
+            lines.append("| " + " | ".join(h.ljust(w) for (h, _, _), w in zip(view.columns, widths)) + " |")
+            lines.append(border)
+            for position, row in enumerate(rows):
+                self._lines[(index, view.row_key(position, row))] = len(lines) + 1
+                lines.append(self._line(view, widths, row))
+            lines.append(border)
+
+        self._status_line = len(lines) + 2
+        height = shutil.get_terminal_size().lines
+        if self.stream.isatty() and self._status_line <= height:
+            self._write("\x1b[H\x1b[2J" + "\n".join(lines) + "\n")
+        else:
+            # Too tall (or not a terminal) for in-place updates: just print
+            self._write("\n".join(lines) + "\n")
+            self._status_line = 0
+
+    def _partial_redraw(self, fresh: Dict[int, List[Dict[str, Any]]]) -> int:
+        changed = 0
+        flashed = set()
+        for index, view in enumerate(self.views):
+            widths = self._widths[index]
+            for position, (old, new) in enumerate(zip(self._rows[index], fresh[index])):
+                key = (index, view.row_key(position, new))
+                if old == new and key not in self._flashed:
+                    continue
+                if old != new:
+                    changed += 1
+                    flashed.add(key)
+                self._write(f"\x1b[{self._lines[key]};1H" +
+                            self._line(view, widths, new, previous=old if old != new else None) + "\x1b[K")
+        self._flashed = flashed
+        return changed
+
+    def _write(self, text: str):
+        self.stream.write(text)